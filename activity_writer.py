@@ -0,0 +1,130 @@
+# 操作日志异步写入模块
+# 操作日志（operation_logs）和最后登录时间先缓存在内存中，
+# 由后台线程按数量或时间阈值合并为多行写入，用户操作无需等待数据库。
+import threading
+import time
+from datetime import datetime
+
+class ActivityWriter:
+    """操作日志与最后登录时间的后台批量写入器
+
+    - 日志条数达到 max_batch 或距上次写入超过 flush_interval 秒时写入一次
+    - 同一用户的多次登录只保留最后一次时间
+    - 写入失败的数据放回缓冲区重试一次，缓冲区超过 max_pending 条时丢弃最旧的日志
+    - 程序退出前必须调用 close()，保证缓冲区中的数据全部写入
+    """
+
+    LOG_COLUMNS = ('user_id', 'case_id', 'operation_type', 'operation_detail', 'ip_address', 'created_at')
+
+    def __init__(self, db_manager, max_batch=200, flush_interval=2.0, max_pending=10000):
+        self.db = db_manager
+        self.max_batch = max_batch
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+
+        self._pending_logs = []  # 待写入的日志行
+        self._pending_logins = {}  # 用户ID -> 最后登录时间
+        self._cond = threading.Condition()
+        self._flush_lock = threading.Lock()  # 保证同一时刻只有一个线程在写入
+        self._closed = False
+        self._retrying = False  # 上一批是否写入失败、正在重试
+        self.dropped = 0  # 因缓冲区溢出或重试失败丢弃的日志数
+
+        self._thread = threading.Thread(target=self._run, name="ActivityWriter", daemon=True)
+        self._thread.start()
+
+    def log_operation(self, user_id, operation_type, case_id=None, detail=None, ip_address=None):
+        """记录一条操作日志（立即返回，稍后批量写入）"""
+        row = (user_id, case_id, operation_type, detail, ip_address, datetime.now())
+        with self._cond:
+            if self._closed:
+                return
+            self._pending_logs.append(row)
+            overflow = len(self._pending_logs) - self.max_pending
+            if overflow > 0:
+                del self._pending_logs[:overflow]
+                self.dropped += overflow
+            if len(self._pending_logs) >= self.max_batch:
+                self._cond.notify()
+
+    def touch_last_login(self, user_id, login_time=None):
+        """记录用户最后登录时间（立即返回，稍后批量写入）"""
+        with self._cond:
+            if self._closed:
+                return
+            self._pending_logins[user_id] = login_time or datetime.now()
+
+    def flush(self):
+        """在当前线程立即写入缓冲区中的全部数据，返回是否成功"""
+        with self._flush_lock:
+            with self._cond:
+                logs, self._pending_logs = self._pending_logs, []
+                logins, self._pending_logins = self._pending_logins, {}
+            if not logs and not logins:
+                return True
+
+            if self._write(logs, logins):
+                self._retrying = False
+                return True
+
+            if self._retrying:
+                # 重试后仍然失败（如数据本身有误），丢弃这一批，避免阻塞后续写入
+                self._retrying = False
+                self.dropped += len(logs)
+                return False
+
+            # 写入失败，放回缓冲区等待下次重试（较新的数据优先保留）
+            self._retrying = True
+            with self._cond:
+                self._pending_logs[:0] = logs
+                overflow = len(self._pending_logs) - self.max_pending
+                if overflow > 0:
+                    del self._pending_logs[:overflow]
+                    self.dropped += overflow
+                for user_id, login_time in logins.items():
+                    self._pending_logins.setdefault(user_id, login_time)
+            return False
+
+    def close(self):
+        """停止后台线程并写入剩余数据"""
+        with self._cond:
+            self._closed = True
+            self._cond.notify()
+        self._thread.join()
+        self.flush()
+
+    def _run(self):
+        """后台线程：等待数量阈值或时间阈值后写入"""
+        last_flush = time.monotonic()
+        while True:
+            with self._cond:
+                while not self._closed:
+                    remaining = self.flush_interval - (time.monotonic() - last_flush)
+                    if len(self._pending_logs) >= self.max_batch or remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+                if self._closed:
+                    return
+            self.flush()
+            last_flush = time.monotonic()
+
+    def _write(self, logs, logins):
+        """在一个事务中写入日志和登录时间"""
+        try:
+            with self.db.transaction() as tx:
+                for start in range(0, len(logs), self.max_batch):
+                    tx.insert_many('operation_logs', self.LOG_COLUMNS, logs[start:start + self.max_batch])
+                if logins:
+                    items = list(logins.items())
+                    query = (
+                        "UPDATE users SET last_login = CASE id "
+                        + " ".join(["WHEN %s THEN %s"] * len(items))
+                        + " END WHERE id IN (" + ", ".join(["%s"] * len(items)) + ")"
+                    )
+                    params = [value for item in items for value in item]
+                    params.extend(user_id for user_id, _ in items)
+                    tx.execute(query, params)
+            return True
+        except self.db.errors as e:
+            print(f"写入操作日志失败: {e}")
+            return False
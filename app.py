@@ -9,37 +9,79 @@
 3. 管理应用程序生命周期
 """
 
+import time
+
+# 启动计时起点（--profile-startup 使用），放在其他导入之前
+_STARTUP_BEGIN = time.perf_counter()
+
+import importlib
+import importlib.util
 import os
 import sys
+import threading
 import tkinter as tk
 from tkinter import messagebox
-from database_config import DatabaseManager
+from database_config import DatabaseConfig, DatabaseManager
+from database_maintenance import SessionPurgeJob
 from login_window import LoginWindow
 
+_IMPORTS_DONE = time.perf_counter()
+
+class StartupProfiler:
+    """记录启动各阶段的耗时（--profile-startup）"""
+    
+    def __init__(self, enabled=False):
+        self.enabled = enabled
+        self.phases = [('导入模块', _STARTUP_BEGIN, _IMPORTS_DONE)]
+        self._last = _IMPORTS_DONE
+        self._lock = threading.Lock()
+    
+    def mark(self, phase, start=None):
+        """记录从上一个阶段结束（或 start）到现在的耗时"""
+        now = time.perf_counter()
+        with self._lock:
+            begin = self._last if start is None else start
+            self.phases.append((phase, begin, now))
+            if start is None:
+                self._last = now
+    
+    def report(self):
+        """输出各阶段耗时（相对于进程开始导入模块的时间）"""
+        if not self.enabled:
+            return
+        print("\n启动耗时：")
+        with self._lock:
+            phases = list(self.phases)
+        for phase, begin, end in phases:
+            print(f"  {phase:<16} {(end - begin) * 1000:8.1f} ms   (完成于 {(end - _STARTUP_BEGIN) * 1000:8.1f} ms)")
+
+# 依赖包：(导入名, pip 包名)
+REQUIRED_PACKAGES = [
+    ('fitz', 'PyMuPDF'),
+    ('PIL', 'Pillow'),
+    ('pdfplumber', 'pdfplumber'),
+    ('PyPDF2', 'PyPDF2'),
+]
+
+# PDF 相关的重量级模块，在登录窗口显示后于后台线程中预先导入
+WARMUP_MODULES = ['fitz', 'PIL.ImageTk', 'main']
+
 def check_dependencies():
-    """检查必要的依赖包"""
-    required_packages = [
-        'PyPDF2',
-        'pdfplumber', 
-        'fitz',  # PyMuPDF
-        'PIL',   # Pillow
-        'mysql.connector'
-    ]
+    """检查必要的依赖包（只查找模块是否安装，不导入）"""
+    required_packages = list(REQUIRED_PACKAGES)
+    if DatabaseConfig.BACKEND == 'mysql':
+        required_packages.append(('mysql.connector', 'mysql-connector-python'))
     
     missing_packages = []
     
-    for package in required_packages:
+    for module_name, package_name in required_packages:
         try:
-            if package == 'fitz':
-                import fitz
-            elif package == 'PIL':
-                from PIL import Image
-            elif package == 'mysql.connector':
-                import mysql.connector
-            else:
-                __import__(package)
+            found = importlib.util.find_spec(module_name) is not None
         except ImportError:
-            missing_packages.append(package)
+            # 查找子模块时父包不存在
+            found = False
+        if not found:
+            missing_packages.append(package_name)
     
     if missing_packages:
         print("缺少以下依赖包:")
@@ -51,6 +93,22 @@ def check_dependencies():
     
     return True
 
+def warm_up_pdf_stack(profiler=None):
+    """在后台线程中导入 PDF 处理相关模块，用户登录时主界面可以立即打开"""
+    def worker():
+        start = time.perf_counter()
+        for module_name in WARMUP_MODULES:
+            try:
+                importlib.import_module(module_name)
+            except ImportError as e:
+                print(f"预加载模块 {module_name} 失败: {e}")
+        if profiler is not None:
+            profiler.mark('后台预加载PDF模块', start)
+    
+    thread = threading.Thread(target=worker, name="PDFWarmup", daemon=True)
+    thread.start()
+    return thread
+
 def init_database():
     """初始化数据库"""
     print("正在初始化数据库...")
@@ -61,7 +119,7 @@ def init_database():
     if not db_manager.connect():
         print("数据库连接失败！")
         print("请确保：")
-        print("1. MySQL服务已启动")
+        print("1. MySQL服务已启动（单机使用可设置 LAWYER_DB_BACKEND=sqlite）")
         print("2. 数据库配置正确 (database_config.py)")
         print("3. 数据库用户有足够权限")
         return False
@@ -70,6 +128,11 @@ def init_database():
     try:
         # 检查用户表
         result = db_manager.execute_query("SHOW TABLES LIKE 'users'")
+        if not result and db_manager.backend.name == 'sqlite':
+            # SQLite 单机安装：首次启动时自动创建表结构
+            print("正在创建 SQLite 数据库表结构...")
+            if db_manager.initialize_schema():
+                result = db_manager.execute_query("SHOW TABLES LIKE 'users'")
         if not result:
             print("数据库表不存在，请先运行 database_schema.sql 创建表结构")
             return False
@@ -127,8 +190,11 @@ def create_sample_data():
     finally:
         db_manager.disconnect()
 
-def main():
+def main(argv=None):
     """主函数"""
+    argv = sys.argv[1:] if argv is None else argv
+    profiler = StartupProfiler('--profile-startup' in argv)
+    
     print("="*50)
     print("律师办案智能助手")
     print("版本: 1.0.0")
@@ -140,30 +206,48 @@ def main():
         input("\n按回车键退出...")
         return
     print("依赖检查通过！")
+    profiler.mark('检查依赖')
     
     # 初始化数据库
     print("\n2. 初始化数据库...")
     if not init_database():
         input("\n按回车键退出...")
         return
+    profiler.mark('初始化数据库')
     
     # 创建示例数据
     print("\n3. 检查示例数据...")
     create_sample_data()
+    profiler.mark('检查示例数据')
     
     print("\n4. 启动应用程序...")
     
+    # 后台定期清理过期会话
+    purge_db_manager = DatabaseManager()
+    purge_db_manager.connect()
+    session_purge_job = SessionPurgeJob(purge_db_manager)
+    session_purge_job.start()
+    
     try:
         # 启动GUI应用程序
         root = tk.Tk()
         app = LoginWindow(root)
+        profiler.mark('创建登录窗口')
+        # 登录窗口第一次绘制完成后再开始预加载 PDF 模块
+        root.after_idle(lambda: (profiler.mark('显示登录窗口'), warm_up_pdf_stack(profiler)))
         root.mainloop()
         
     except Exception as e:
         print(f"应用程序启动失败: {e}")
         messagebox.showerror("错误", f"应用程序启动失败: {e}")
     
+    finally:
+        session_purge_job.stop()
+        # 关闭共享的数据库连接池
+        DatabaseConfig.close_pool()
+        profiler.report()
+    
     print("\n应用程序已退出")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,443 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+基准测试套件
+
+按律所的实际数据规模生成合成数据（N 个用户、每人 M 个卷宗、每个卷宗 K 条目录、数百页的 PDF），
+测量卷宗列表、目录读取、登录/会话验证、PDF 打开/渲染/文本提取和页面预加载的耗时，
+结果保存为 JSON，不同版本之间用 --compare 对比，发现性能回退。
+
+运行（默认使用临时 SQLite 库，--backend mysql 使用 DatabaseConfig.DB_CONFIG 中的本地 MySQL）：
+    python benchmark_suite.py --users 20 --cases 50 --directories 200 --pdf-pages 300 --json 结果.json
+    python benchmark_suite.py --json 新结果.json --compare 旧结果.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import secrets
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from database_config import DatabaseConfig, DatabaseManager, UserManager, CaseManager, DirectoryManager
+
+# 合成数据的用户名前缀，清理时按前缀删除
+USER_PREFIX = 'bench_'
+# 合成用户的统一密码
+BENCH_PASSWORD = 'bench123'
+# 与 PDFChatApp.PRELOAD_ZOOM 一致
+PRELOAD_ZOOM = 1.5
+
+# 生成卷宗名称、目录和 PDF 正文用的词汇
+CASE_TYPES = ('合同纠纷', '劳动争议', '借款合同纠纷', '房屋买卖合同纠纷', '交通事故责任纠纷', '股权转让纠纷', '知识产权侵权')
+DOCUMENT_TITLES = (
+    '起诉状', '答辩状', '证据目录', '证据材料', '授权委托书', '法定代表人身份证明',
+    '庭审笔录', '代理词', '质证意见', '判决书', '调解书', '送达回证'
+)
+BODY_PHRASES = (
+    '原告与被告于签订合同，约定', '被告未按约定履行付款义务', '经多次催告仍未支付',
+    '根据《中华人民共和国民法典》相关规定', '请求法院依法判令被告承担违约责任',
+    '上述事实有合同原件及转账记录为证', '本案诉讼费用由被告承担', '双方当事人均到庭参加诉讼'
+)
+
+class SyntheticDataGenerator:
+    """生成基准测试用的合成数据
+
+    数据库数据通过多行 INSERT 批量写入；目录通过 DirectoryManager.create_directories_bulk 写入，
+    与界面导入目录走同一路径（同时维护 directory_count）。
+    """
+
+    # 每条多行 INSERT 包含的最大行数
+    CHUNK_SIZE = 500
+
+    def __init__(self, db_manager, seed=0):
+        self.db = db_manager
+        self.random = random.Random(seed)
+        self.run_id = secrets.token_hex(4)  # 区分多次生成的数据（卷宗案号唯一）
+
+    def generate(self, users=10, cases_per_user=20, directories_per_case=100):
+        """生成用户、会话、卷宗和目录，返回 {'users': [...], 'cases': [...], 'sessions': [...]}"""
+        user_rows = [
+            (f"{USER_PREFIX}{self.run_id}_{index}", UserManager.hash_password(BENCH_PASSWORD),
+             f"测试律师{index}", f"{USER_PREFIX}{self.run_id}_{index}@example.com")
+            for index in range(users)
+        ]
+        now = datetime.now()
+        with self.db.transaction() as tx:
+            user_ids = []
+            for start in range(0, len(user_rows), self.CHUNK_SIZE):
+                user_ids.extend(tx.insert_many(
+                    'users', ('username', 'password', 'full_name', 'email'),
+                    user_rows[start:start + self.CHUNK_SIZE]
+                ))
+            session_rows = [
+                (user_id, UserManager.generate_session_token(), now + timedelta(hours=24))
+                for user_id in user_ids
+            ]
+            tx.insert_many('user_sessions', ('user_id', 'session_token', 'expires_at'), session_rows)
+
+            # 约 10% 的卷宗已归档，更新时间分散在过去一年内，使列表查询的过滤和排序有实际意义
+            case_rows = []
+            for user_id in user_ids:
+                for index in range(cases_per_user):
+                    updated_at = now - timedelta(minutes=self.random.randint(0, 525600))
+                    case_rows.append((
+                        f"{self.random.choice(CASE_TYPES)}案（{user_id}-{index}）",
+                        f"({now.year})京0105民初{self.run_id}{user_id:05d}{index:04d}号",
+                        f"/data/cases/{user_id}/{index}.pdf",
+                        self.random.randint(1, 200) * 1024 * 1024,
+                        "合成测试数据",
+                        user_id,
+                        'archived' if self.random.random() < 0.1 else 'active',
+                        updated_at,
+                        updated_at
+                    ))
+            case_ids = []
+            columns = ('case_name', 'case_number', 'file_path', 'file_size', 'description',
+                       'created_by', 'status', 'created_at', 'updated_at')
+            for start in range(0, len(case_rows), self.CHUNK_SIZE):
+                case_ids.extend(tx.insert_many('cases', columns, case_rows[start:start + self.CHUNK_SIZE]))
+
+        directory_manager = DirectoryManager(self.db)
+        for case_id in case_ids:
+            if directories_per_case:
+                directory_manager.create_directories_bulk(case_id, self.directory_entries(directories_per_case))
+
+        return {
+            'users': [{'id': user_id, 'username': row[0]} for user_id, row in zip(user_ids, user_rows)],
+            'sessions': [row[1] for row in session_rows],
+            'cases': case_ids
+        }
+
+    def directory_entries(self, count):
+        """生成一份卷宗目录：文书标题依次排列，页码递增"""
+        entries = []
+        page = 1
+        for index in range(count):
+            entries.append({
+                'sequence_number': str(index + 1),
+                'file_name': f"{self.random.choice(DOCUMENT_TITLES)}（{index + 1}）",
+                'page_number': page
+            })
+            page += self.random.randint(1, 12)
+        return entries
+
+    def generate_pdfs(self, directory, files=2, pages=300):
+        """生成多页 PDF（中文正文、每隔数页一个较大字号的文书标题、表格线），返回文件路径列表"""
+        import fitz
+
+        paths = []
+        for file_index in range(files):
+            doc = fitz.open()
+            title = None
+            for page_index in range(pages):
+                page = doc.new_page(width=595, height=842)  # A4
+                if page_index % self.random.randint(3, 12) == 0 or title is None:
+                    title = self.random.choice(DOCUMENT_TITLES)
+                    page.insert_text((72, 90), title, fontsize=20, fontname='china-s')
+                y = 130
+                while y < 760:
+                    line = "".join(self.random.choice(BODY_PHRASES) for _ in range(2))[:36]
+                    page.insert_text((72, y), line, fontsize=11, fontname='china-s')
+                    y += 18
+                if page_index % 5 == 0:
+                    # 每五页画一个表格，使渲染包含矢量图形
+                    for row in range(6):
+                        page.draw_line((72, 600 + row * 20), (523, 600 + row * 20))
+                    for column in range(5):
+                        page.draw_line((72 + column * 112.75, 600), (72 + column * 112.75, 700))
+                page.insert_text((290, 815), f"- {page_index + 1} -", fontsize=9)
+            path = os.path.join(directory, f"卷宗{file_index + 1}.pdf")
+            doc.save(path, garbage=3, deflate=True)
+            doc.close()
+            paths.append(path)
+        return paths
+
+    def cleanup(self):
+        """删除所有合成数据（按用户名前缀），返回删除的用户数"""
+        pattern = USER_PREFIX.replace('_', '!_') + '%'
+        users = self.db.execute_query(
+            "SELECT id FROM users WHERE username LIKE %s ESCAPE '!'", (pattern,)
+        )
+        if not users:
+            return 0
+        ids = [row['id'] for row in users]
+        placeholders = ", ".join(["%s"] * len(ids))
+        with self.db.transaction() as tx:
+            # cases.created_by 为 ON DELETE RESTRICT，先删卷宗（目录、页面文本级联删除）
+            tx.execute(f"DELETE FROM cases WHERE created_by IN ({placeholders})", ids)
+            deleted = tx.execute(f"DELETE FROM users WHERE id IN ({placeholders})", ids)
+        self.db.cache.clear()
+        return deleted
+
+class HeadlessRoot:
+    """代替 Tk 根窗口的最小事件循环，用于在没有界面的情况下运行 PreloadScheduler"""
+
+    def __init__(self):
+        self._callbacks = []  # [(到期时间, 回调)]
+
+    def after(self, delay, callback):
+        self._callbacks.append((time.perf_counter() + delay / 1000, callback))
+
+    def run_until(self, done, timeout=300):
+        """执行到期的回调，直到 done() 为真或超时"""
+        deadline = time.perf_counter() + timeout
+        while not done() and time.perf_counter() < deadline:
+            if not self._callbacks:
+                time.sleep(0.005)
+                continue
+            self._callbacks.sort(key=lambda item: item[0])
+            due, callback = self._callbacks.pop(0)
+            delay = due - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            callback()
+
+def summarize(samples):
+    """把耗时样本（秒）汇总为毫秒统计"""
+    ordered = sorted(samples)
+    return {
+        'calls': len(ordered),
+        'mean_ms': statistics.fmean(ordered) * 1000,
+        'median_ms': statistics.median(ordered) * 1000,
+        'p95_ms': ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))] * 1000,
+        'min_ms': ordered[0] * 1000,
+        'max_ms': ordered[-1] * 1000
+    }
+
+class BenchmarkSuite:
+    """对数据库访问和 PDF 处理的热点路径计时
+
+    每项测试返回 summarize() 的统计结果；结果按名称汇总在 results 中。
+    """
+
+    def __init__(self, db_manager, data, pdf_files=(), repeat=5, pdf_pages=20):
+        self.db = db_manager
+        self.data = data
+        self.pdf_files = list(pdf_files)
+        self.repeat = repeat
+        self.pdf_pages = pdf_pages  # 每个 PDF 测试的页数
+        self.results = {}
+
+    def run(self, groups=('database', 'pdf')):
+        if 'database' in groups:
+            self.run_database()
+        if 'pdf' in groups and self.pdf_files:
+            self.run_pdf()
+        return self.results
+
+    def measure(self, name, func, args_list):
+        """对每组参数调用 func，重复 repeat 次，记录每次调用的耗时"""
+        samples = []
+        for _ in range(self.repeat):
+            for args in args_list:
+                start = time.perf_counter()
+                func(*args)
+                samples.append(time.perf_counter() - start)
+        self.results[name] = summarize(samples)
+        print(f"{name:<32} 平均 {self.results[name]['mean_ms']:8.2f}ms  p95 {self.results[name]['p95_ms']:8.2f}ms")
+        return self.results[name]
+
+    def run_database(self):
+        users = [(user['id'],) for user in self.data['users']]
+        case_manager = CaseManager(self.db)
+        directory_manager = DirectoryManager(self.db)
+        user_manager = UserManager(self.db)
+        cache = self.db.cache
+
+        self.measure('db.get_user_cases', case_manager.get_user_cases, users)
+        self.measure('db.get_user_cases_page', case_manager.get_user_cases_page, users)
+
+        # 目录：清空缓存测数据库读取，再测缓存命中
+        sample_cases = [(case_id,) for case_id in self.data['cases'][::max(1, len(self.data['cases']) // 50)]]
+
+        def directories_cold(case_id):
+            cache.invalidate(('directories', case_id))
+            return directory_manager.get_case_directories(case_id)
+
+        self.measure('db.get_case_directories', directories_cold, sample_cases)
+        self.measure('db.get_case_directories.cached', directory_manager.get_case_directories, sample_cases)
+
+        logins = [(user['username'], BENCH_PASSWORD) for user in self.data['users']]
+        self.measure('db.authenticate_user', user_manager.authenticate_user, logins)
+
+        def session_cold(token):
+            cache.invalidate(('session', token))
+            return user_manager.validate_session(token)
+
+        tokens = [(token,) for token in self.data['sessions']]
+        self.measure('db.validate_session', session_cold, tokens)
+        self.measure('db.validate_session.cached', user_manager.validate_session, tokens)
+        # 登录的后台写入不计入之后的测试
+        self.db.get_activity_writer().flush()
+
+    def run_pdf(self):
+        from pdf_engine import PDFEngine
+        from pdf_handles import DocumentPool
+        from pdf_cache import PDFCache
+        from preload_scheduler import PreloadScheduler
+        from render_cache import RenderCache
+
+        files = [(path,) for path in self.pdf_files]
+        # 不保留空闲句柄，每次打开都真实解析文件
+        cold_pool = DocumentPool(max_idle=0)
+
+        def open_document(path):
+            engine = PDFEngine(path, pool=cold_pool)
+            engine.page_count
+            engine.close()
+
+        self.measure('pdf.open', open_document, files)
+
+        engines = {path: PDFEngine(path) for path in self.pdf_files}
+        try:
+            pages = [
+                (engines[path], index)
+                for path in self.pdf_files
+                for index in range(min(self.pdf_pages, engines[path].page_count))
+            ]
+            self.measure('pdf.render', lambda engine, index: engine.render(index, PRELOAD_ZOOM), pages)
+            self.measure('pdf.extract_text', lambda engine, index: engine.extract_text(index), pages)
+            self.measure('pdf.extract_words', lambda engine, index: engine.extract_words(index), pages)
+
+            # 预加载：与主窗口相同的调度器和加载函数；第一次为空磁盘缓存，第二次命中磁盘缓存
+            cache_dir = tempfile.mkdtemp(prefix='bench_render_')
+            try:
+                render_cache = RenderCache(cache_dir)
+                self.measure_preload('pdf.preload', engines, render_cache, PreloadScheduler, PDFCache)
+                self.measure_preload('pdf.preload.disk_cached', engines, render_cache, PreloadScheduler, PDFCache)
+            finally:
+                shutil.rmtree(cache_dir, ignore_errors=True)
+        finally:
+            for engine in engines.values():
+                engine.close()
+
+    def measure_preload(self, name, engines, render_cache, scheduler_class, cache_class):
+        """预加载每个文件的前 pdf_pages 页，记录每页的平均耗时"""
+        root = HeadlessRoot()
+        cache = cache_class()
+
+        def load_page(path, page):
+            return render_cache.get_or_render(
+                path, page, 72 * PRELOAD_ZOOM, lambda: engines[path].render(page, PRELOAD_ZOOM)
+            )
+
+        def on_loaded(path, page, image):
+            cache.put((path, page), image)
+
+        scheduler = scheduler_class(
+            root, load_page, on_loaded,
+            get_page_count=lambda path: min(self.pdf_pages, engines[path].page_count),
+            is_loaded=lambda path, page: (path, page) in cache
+        )
+        total_pages = sum(min(self.pdf_pages, engine.page_count) for engine in engines.values())
+        start = time.perf_counter()
+        first, *others = self.pdf_files
+        scheduler.focus(first, 0, min(self.pdf_pages, engines[first].page_count), other_files=others)
+        root.run_until(lambda: len(cache) >= total_pages)
+        elapsed = time.perf_counter() - start
+        scheduler.shutdown()
+
+        self.results[name] = {
+            'pages': len(cache),
+            'total_ms': elapsed * 1000,
+            'mean_ms': elapsed * 1000 / max(len(cache), 1)
+        }
+        print(f"{name:<32} 平均 {self.results[name]['mean_ms']:8.2f}ms/页  共 {len(cache)} 页")
+        return self.results[name]
+
+def compare(old_results, new_results, tolerance=0.2):
+    """对比两次结果的平均耗时，返回 [(名称, 旧ms, 新ms, 变化比例, 是否回退)]"""
+    rows = []
+    for name, new in new_results.items():
+        old = old_results.get(name)
+        if old is None or not old.get('mean_ms'):
+            continue
+        change = new['mean_ms'] / old['mean_ms'] - 1
+        rows.append((name, old['mean_ms'], new['mean_ms'], change, change > tolerance))
+    return rows
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="律师办案智能助手基准测试")
+    parser.add_argument('--backend', choices=['sqlite', 'mysql'], default='sqlite', help="数据库后端")
+    parser.add_argument('--db', help="SQLite 数据库文件（默认使用临时文件，测试后删除）")
+    parser.add_argument('--users', type=int, default=10, help="合成用户数")
+    parser.add_argument('--cases', type=int, default=50, help="每个用户的卷宗数")
+    parser.add_argument('--directories', type=int, default=100, help="每个卷宗的目录条数")
+    parser.add_argument('--pdf-files', type=int, default=2, help="合成 PDF 文件数（0 表示不测试 PDF）")
+    parser.add_argument('--pdf-pages', type=int, default=300, help="每个合成 PDF 的页数")
+    parser.add_argument('--sample-pages', type=int, default=20, help="PDF 测试的页数（每个文件）")
+    parser.add_argument('--repeat', type=int, default=5, help="重复次数")
+    parser.add_argument('--seed', type=int, default=0, help="随机数种子")
+    parser.add_argument('--keep-data', action='store_true', help="测试后保留合成数据")
+    parser.add_argument('--json', help="把结果写入 JSON 文件")
+    parser.add_argument('--compare', help="与之前的 JSON 结果对比")
+    parser.add_argument('--tolerance', type=float, default=0.2, help="平均耗时增加超过该比例视为回退")
+    args = parser.parse_args(argv)
+
+    work_dir = tempfile.mkdtemp(prefix='lawyer_bench_')
+    DatabaseConfig.BACKEND = args.backend
+    if args.backend == 'sqlite':
+        DatabaseConfig.SQLITE_CONFIG['path'] = args.db or os.path.join(work_dir, 'bench.db')
+
+    db_manager = DatabaseManager()
+    if not db_manager.connect():
+        print("数据库连接失败")
+        shutil.rmtree(work_dir, ignore_errors=True)
+        return 1
+    generator = SyntheticDataGenerator(db_manager, args.seed)
+    try:
+        if args.backend == 'sqlite' and not db_manager.initialize_schema():
+            return 1
+
+        start = time.perf_counter()
+        data = generator.generate(args.users, args.cases, args.directories)
+        pdf_files = generator.generate_pdfs(work_dir, args.pdf_files, args.pdf_pages) if args.pdf_files else []
+        print(f"合成数据生成完成，用时 {time.perf_counter() - start:.1f}s")
+
+        suite = BenchmarkSuite(db_manager, data, pdf_files, args.repeat, args.sample_pages)
+        results = suite.run()
+    finally:
+        if not args.keep_data:
+            generator.cleanup()
+        db_manager.close()
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    report = {
+        'created_at': datetime.now().isoformat(timespec='seconds'),
+        'environment': {
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'backend': args.backend
+        },
+        'parameters': {
+            'users': args.users, 'cases_per_user': args.cases, 'directories_per_case': args.directories,
+            'pdf_files': args.pdf_files, 'pdf_pages': args.pdf_pages,
+            'sample_pages': args.sample_pages, 'repeat': args.repeat, 'seed': args.seed
+        },
+        'results': results
+    }
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            previous = json.load(f)
+        regressions = 0
+        for name, old_ms, new_ms, change, regressed in compare(previous['results'], results, args.tolerance):
+            regressions += regressed
+            print(f"{name:<32} {old_ms:8.2f}ms -> {new_ms:8.2f}ms  {change:+.0%}{'  回退' if regressed else ''}")
+        if previous.get('parameters') != report['parameters']:
+            print("注意：两次测试的参数不同，结果不能直接比较")
+        return 1 if regressions else 0
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
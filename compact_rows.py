@@ -0,0 +1,82 @@
+# 紧凑行模块
+# 查询结果每行保存为一个元组，列名到位置的映射由同一结果集（同一组列）的所有行共享，
+# 比每行一个字典节省大部分内存，构建也更快；访问方式与字典相同（row['id']、row.get()、dict(row)）。
+# 用于数据量大且在界面中长期保留的结果：卷宗列表和卷宗目录。
+from collections.abc import Mapping
+from functools import lru_cache
+
+class Row(tuple):
+    """只读的查询结果行
+
+    - 按列名访问：row['case_name']、row.get('status')、row.case_name、'id' in row
+    - 按位置访问：row[0]，与 SELECT 的列顺序一致
+    - keys() / values() / items()、dict(row)，以及与字典比较（row == {...}）
+    - 迭代得到列名（与字典一致），len(row) 为列数
+    行不可修改，需要修改时先 dict(row)；序列化为 JSON 时也应先转换为字典。
+    """
+
+    __slots__ = ()
+    _keys = ()
+    _index = {}
+
+    def __getitem__(self, key):
+        if isinstance(key, str):
+            return tuple.__getitem__(self, self._index[key])
+        return tuple.__getitem__(self, key)
+
+    def __getattr__(self, name):
+        try:
+            return tuple.__getitem__(self, self._index[name])
+        except KeyError:
+            raise AttributeError(name) from None
+
+    def get(self, key, default=None):
+        index = self._index.get(key)
+        return default if index is None else tuple.__getitem__(self, index)
+
+    def keys(self):
+        return self._keys
+
+    def values(self):
+        return [tuple.__getitem__(self, index) for index in self._index.values()]
+
+    def items(self):
+        return [(key, tuple.__getitem__(self, index)) for key, index in self._index.items()]
+
+    def to_dict(self):
+        return dict(self.items())
+
+    def __iter__(self):
+        return iter(self._keys)
+
+    def __contains__(self, key):
+        return key in self._index
+
+    def __eq__(self, other):
+        if isinstance(other, Row):
+            return self._keys == other._keys and tuple.__eq__(self, other)
+        if isinstance(other, Mapping):
+            return self.to_dict() == dict(other)
+        return NotImplemented
+
+    def __ne__(self, other):
+        result = self.__eq__(other)
+        return result if result is NotImplemented else not result
+
+    __hash__ = None
+
+    def __repr__(self):
+        return f"Row({self.to_dict()!r})"
+
+@lru_cache(maxsize=256)
+def row_class(columns):
+    """返回一组列对应的行类（同一组列共用一个类和列名索引）
+
+    列名重复时（如 JOIN 的同名列）按字典的习惯取最后一列。
+    """
+    index = {name: position for position, name in enumerate(columns)}
+    return type('Row', (Row,), {'__slots__': (), '_keys': tuple(index), '_index': index})
+
+def make_rows(columns, values):
+    """把元组列表转换为紧凑行列表"""
+    return list(map(row_class(tuple(columns)), values))
@@ -0,0 +1,223 @@
+# 数据库后端模块
+# DatabaseManager 通过后端对象完成连接、健康检查和 SQL 方言转换，
+# 目前提供 MySQL（多用户部署）和 SQLite（单机安装、基准测试）两种实现。
+import os
+import re
+import sqlite3
+from datetime import date, datetime
+from functools import lru_cache
+
+class MySQLBackend:
+    """MySQL 数据库后端"""
+
+    name = 'mysql'
+
+    def __init__(self, config):
+        # 创建后端时才导入驱动：仅使用 SQLite 后端时无需安装，也不拖慢启动
+        try:
+            import mysql.connector
+            from mysql.connector import errors as mysql_errors
+        except ImportError:
+            raise ImportError("使用 MySQL 后端需要安装 mysql-connector-python")
+        self._connector = mysql.connector
+        self.config = dict(config)
+        self.Error = mysql_errors.Error
+        # 连接断开类错误，查询语句遇到时可以换一个连接重试
+        self.retryable_errors = (mysql_errors.OperationalError, mysql_errors.InterfaceError)
+
+    def connect(self):
+        """建立数据库连接，失败时返回 None"""
+        try:
+            connection = self._connector.connect(**self.config)
+            if connection.is_connected():
+                return connection
+        except self.Error as e:
+            print(f"数据库连接错误: {e}")
+        return None
+
+    def close(self, connection):
+        """关闭数据库连接"""
+        if connection and connection.is_connected():
+            connection.close()
+
+    def is_alive(self, connection):
+        """检查连接是否可用，断线时尝试重连一次"""
+        try:
+            connection.ping(reconnect=True, attempts=1, delay=0)
+            return True
+        except self.Error:
+            return False
+
+    def translate(self, query):
+        """转换为本后端的 SQL 方言（MySQL 无需转换）"""
+        return query
+
+    def begin(self, connection):
+        """开启事务"""
+        connection.start_transaction()
+
+    def column_exists(self, connection, table, column):
+        """检查表中是否存在指定列"""
+        cursor = connection.cursor()
+        try:
+            cursor.execute(
+                "SELECT 1 FROM information_schema.columns "
+                "WHERE table_schema = DATABASE() AND table_name = %s AND column_name = %s",
+                (table, column)
+            )
+            return bool(cursor.fetchall())
+        finally:
+            cursor.close()
+
+    def index_exists(self, connection, table, index):
+        """检查表上是否存在指定索引"""
+        cursor = connection.cursor()
+        try:
+            cursor.execute(
+                "SELECT 1 FROM information_schema.statistics "
+                "WHERE table_schema = DATABASE() AND table_name = %s AND index_name = %s",
+                (table, index)
+            )
+            return bool(cursor.fetchall())
+        finally:
+            cursor.close()
+
+    def inserted_ids(self, cursor, row_count):
+        """多行 INSERT 后的新ID列表
+
+        InnoDB 为行数确定的多行 INSERT 一次分配连续的自增值，
+        lastrowid 为其中第一行的ID。
+        """
+        return list(range(cursor.lastrowid, cursor.lastrowid + row_count))
+
+    def prepared_cursor(self, connection):
+        """创建预处理语句游标：第一次执行时在服务端准备语句，之后只发送参数"""
+        return connection.cursor(prepared=True)
+
+    def explain(self, connection, query, params=()):
+        """返回语句的执行计划（EXPLAIN 的结果行，字典列表）"""
+        cursor = connection.cursor()
+        try:
+            cursor.execute("EXPLAIN " + query, params)
+            columns = [column[0] for column in cursor.description]
+            return [dict(zip(columns, row)) for row in cursor.fetchall()]
+        finally:
+            cursor.close()
+
+class SQLiteBackend:
+    """SQLite 数据库后端（WAL 模式）
+
+    数据库文件只在本机访问，省去了每条语句的网络往返；
+    SQL 中的 %s 占位符和部分 MySQL 专有语句会自动转换。
+    注意：数据库路径必须是文件，连接池中的每个连接都要能打开同一个库。
+    """
+
+    name = 'sqlite'
+
+    # SQLite 版本的表结构脚本
+    SCHEMA_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'database_schema_sqlite.sql')
+
+    def __init__(self, path, busy_timeout=5000, cached_statements=128):
+        self.path = os.path.expanduser(path)
+        self.busy_timeout = busy_timeout
+        self.cached_statements = cached_statements  # 每个连接缓存的已编译语句数（按 SQL 文本 LRU）
+        self.Error = sqlite3.Error
+        self.retryable_errors = ()
+
+    def connect(self):
+        """建立数据库连接，失败时返回 None"""
+        try:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            # isolation_level=None 与 MySQL 的 autocommit 行为一致，事务由 begin() 显式开启；
+            # check_same_thread=False 允许连接池把连接交给其他线程（同一时刻只有一个线程使用）
+            connection = sqlite3.connect(
+                self.path,
+                isolation_level=None,
+                check_same_thread=False,
+                detect_types=sqlite3.PARSE_DECLTYPES,
+                cached_statements=self.cached_statements
+            )
+            connection.execute("PRAGMA journal_mode = WAL")
+            connection.execute("PRAGMA synchronous = NORMAL")
+            connection.execute("PRAGMA foreign_keys = ON")
+            connection.execute(f"PRAGMA busy_timeout = {int(self.busy_timeout)}")
+            return connection
+        except sqlite3.Error as e:
+            print(f"数据库连接错误: {e}")
+            return None
+
+    def close(self, connection):
+        """关闭数据库连接"""
+        if connection:
+            connection.close()
+
+    def is_alive(self, connection):
+        """检查连接是否可用"""
+        try:
+            connection.execute("SELECT 1")
+            return True
+        except sqlite3.Error:
+            return False
+
+    def translate(self, query):
+        """把 MySQL 风格的 SQL 转换为 SQLite 方言"""
+        return _translate_mysql_to_sqlite(query)
+
+    def begin(self, connection):
+        """开启事务（IMMEDIATE 模式，避免读后写时的锁升级冲突）"""
+        connection.execute("BEGIN IMMEDIATE")
+
+    def column_exists(self, connection, table, column):
+        """检查表中是否存在指定列"""
+        rows = connection.execute(f"PRAGMA table_info({table})").fetchall()
+        return any(row[1] == column for row in rows)
+
+    def index_exists(self, connection, table, index):
+        """检查表上是否存在指定索引"""
+        rows = connection.execute(f"PRAGMA index_list({table})").fetchall()
+        return any(row[1] == index for row in rows)
+
+    def inserted_ids(self, cursor, row_count):
+        """多行 INSERT 后的新ID列表
+
+        事务持有写锁，同一语句插入的行ID连续，lastrowid 为其中最后一行的ID。
+        """
+        return list(range(cursor.lastrowid - row_count + 1, cursor.lastrowid + 1))
+
+    def execute_script(self, connection, script):
+        """执行多语句的 SQL 脚本"""
+        connection.executescript(script)
+
+    def prepared_cursor(self, connection):
+        """创建复用的游标（sqlite3 在连接内按 SQL 文本缓存已编译的语句，见 cached_statements）"""
+        return connection.cursor()
+
+    def explain(self, connection, query, params=()):
+        """返回语句的执行计划（EXPLAIN QUERY PLAN 的结果行，字典列表）"""
+        rows = connection.execute("EXPLAIN QUERY PLAN " + query, params).fetchall()
+        return [{'id': row[0], 'parent': row[1], 'detail': row[3]} for row in rows]
+
+# 日期时间统一按 MySQL 的 'YYYY-MM-DD HH:MM:SS' 格式存储，
+# 与 CURRENT_TIMESTAMP 默认值保持可比较，读取时还原为 datetime
+sqlite3.register_adapter(datetime, lambda value: value.isoformat(sep=' ', timespec='seconds'))
+sqlite3.register_adapter(date, lambda value: value.isoformat())
+sqlite3.register_converter('TIMESTAMP', lambda value: datetime.fromisoformat(value.decode()))
+
+_SHOW_TABLES_LIKE = re.compile(r"^\s*SHOW\s+TABLES\s+LIKE\s+('(?:[^']|'')*')\s*;?\s*$", re.IGNORECASE)
+_STRING_LITERAL = re.compile(r"('(?:[^'\\]|\\.|'')*')")
+_NOW = re.compile(r"\bNOW\(\)", re.IGNORECASE)
+
+@lru_cache(maxsize=256)
+def _translate_mysql_to_sqlite(query):
+    """转换占位符和 MySQL 专有语句（结果按 SQL 文本缓存）"""
+    match = _SHOW_TABLES_LIKE.match(query)
+    if match:
+        return f"SELECT name FROM sqlite_master WHERE type = 'table' AND name LIKE {match.group(1)}"
+
+    # 只替换字符串字面量以外的部分
+    parts = _STRING_LITERAL.split(query)
+    for i in range(0, len(parts), 2):
+        parts[i] = _NOW.sub('CURRENT_TIMESTAMP', parts[i].replace('%s', '?'))
+    return ''.join(parts)
@@ -1,13 +1,24 @@
 # 数据库配置文件
-import mysql.connector
-from mysql.connector import Error
 import hashlib
+import os
 import secrets
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
 from datetime import datetime, timedelta
+from activity_writer import ActivityWriter
+from compact_rows import make_rows
+from database_backends import MySQLBackend, SQLiteBackend
+from query_cache import LRUCache
+from query_metrics import QueryMetrics
 
 class DatabaseConfig:
     """数据库配置类"""
     
+    # 数据库后端：'mysql' 或 'sqlite'（单机安装可使用 SQLite，无需 MySQL 服务）
+    BACKEND = os.environ.get('LAWYER_DB_BACKEND', 'mysql')
+    
     # 数据库连接配置
     DB_CONFIG = {
         'host': 'localhost',
@@ -19,83 +30,586 @@ class DatabaseConfig:
         'autocommit': True
     }
     
+    # SQLite 数据库配置
+    SQLITE_CONFIG = {
+        'path': os.environ.get('LAWYER_DB_PATH', os.path.join('~', '.lawyer_assistant', 'lawyer_assistant.db')),
+        'busy_timeout': 5000,      # 等待写锁的最长时间（毫秒）
+        'cached_statements': 128   # 每个连接缓存的已编译语句数
+    }
+    
+    # 连接池配置
+    POOL_CONFIG = {
+        'min_size': 1,               # 常驻的最少连接数
+        'max_size': 5,               # 允许同时借出的最多连接数
+        'checkout_timeout': 10,      # 等待空闲连接的最长时间（秒）
+        'health_check_interval': 30, # 空闲超过该时间（秒）的连接取出时先做健康检查
+        'statement_cache_size': 64   # 每个连接缓存的预处理语句数（0 表示不使用预处理语句）
+    }
+    
+    # 卷宗/目录查询缓存配置
+    CACHE_CONFIG = {
+        'max_entries': 512,  # 最多缓存的查询结果数
+        'ttl': 120           # 缓存有效期（秒），兼顾其他客户端的修改
+    }
+    
+    # 查询统计配置
+    METRICS_CONFIG = {
+        'enabled': os.environ.get('LAWYER_DB_METRICS', '1') != '0',
+        'slow_query_threshold': 0.2  # 超过该耗时（秒）的语句写入慢查询日志
+    }
+    
+    _pool = None
+    _pool_lock = threading.Lock()
+    _metrics = None
+    
+    @classmethod
+    def get_backend(cls):
+        """根据配置创建数据库后端"""
+        if cls.BACKEND == 'sqlite':
+            return SQLiteBackend(**cls.SQLITE_CONFIG)
+        if cls.BACKEND == 'mysql':
+            return MySQLBackend(cls.DB_CONFIG)
+        raise ValueError(f"不支持的数据库后端: {cls.BACKEND}")
+    
     @staticmethod
     def get_connection():
-        """获取数据库连接"""
-        try:
-            connection = mysql.connector.connect(**DatabaseConfig.DB_CONFIG)
-            if connection.is_connected():
-                return connection
-        except Error as e:
-            print(f"数据库连接错误: {e}")
-            return None
+        """获取数据库连接（不经过连接池）"""
+        return DatabaseConfig.get_backend().connect()
     
     @staticmethod
     def close_connection(connection):
         """关闭数据库连接"""
-        if connection and connection.is_connected():
-            connection.close()
+        DatabaseConfig.get_backend().close(connection)
+    
+    @classmethod
+    def get_pool(cls):
+        """获取进程内共享的连接池（首次调用时创建）"""
+        with cls._pool_lock:
+            if cls._pool is None or cls._pool.closed:
+                cls._pool = ConnectionPool(cls.get_backend(), **cls.POOL_CONFIG)
+            return cls._pool
+    
+    @classmethod
+    def get_metrics(cls):
+        """获取进程内共享的查询统计（未启用时返回 None）"""
+        if not cls.METRICS_CONFIG['enabled']:
+            return None
+        with cls._pool_lock:
+            if cls._metrics is None:
+                cls._metrics = QueryMetrics(cls.METRICS_CONFIG['slow_query_threshold'])
+            return cls._metrics
+    
+    @classmethod
+    def close_pool(cls):
+        """关闭共享连接池（程序退出时调用）"""
+        with cls._pool_lock:
+            if cls._pool is not None:
+                cls._pool.close()
+                cls._pool = None
+
+class ConnectionPoolError(Exception):
+    """连接池错误（无可用连接、等待超时或连接池已关闭）"""
+
+class PooledConnection:
+    """连接池中的连接及其使用信息"""
+    
+    def __init__(self, connection):
+        self.connection = connection
+        self.last_used = time.monotonic()
+
+class StatementCache:
+    """单个连接的预处理语句缓存（按 SQL 文本 LRU 淘汰）
+    
+    每条 SQL 对应一个预处理游标：MySQL 第一次执行时在服务端解析并准备语句，
+    之后只发送参数；SQLite 的游标复用连接内已编译的语句。
+    淘汰或出错时关闭游标（MySQL 同时释放服务端的语句）。
+    连接同一时刻只由一个线程使用，因此无需加锁。
+    """
+    
+    # 只预处理 DML 语句；过长的 SQL 多为按批量大小拼接的一次性语句（IN 列表、多行 VALUES），不缓存
+    PREPARABLE = ('SELECT', 'INSERT', 'UPDATE', 'DELETE', 'REPLACE')
+    MAX_SQL_LENGTH = 1024
+    
+    def __init__(self, backend, connection, max_statements=64):
+        self.backend = backend
+        self.connection = connection
+        self.max_statements = max_statements
+        self._cursors = OrderedDict()  # SQL -> 游标
+        self.hits = 0
+        self.misses = 0
+    
+    @classmethod
+    def accepts(cls, query):
+        """该语句是否适合预处理并缓存"""
+        return len(query) <= cls.MAX_SQL_LENGTH and query.lstrip()[:7].upper().startswith(cls.PREPARABLE)
+    
+    def cursor(self, query):
+        """返回执行 query（已转换方言的 SQL）用的游标"""
+        cursor = self._cursors.get(query)
+        if cursor is not None:
+            self._cursors.move_to_end(query)
+            self.hits += 1
+            return cursor
+        self.misses += 1
+        cursor = self._cursors[query] = self.backend.prepared_cursor(self.connection)
+        while len(self._cursors) > self.max_statements:
+            _, evicted = self._cursors.popitem(last=False)
+            self._close_cursor(evicted)
+        return cursor
+    
+    def discard(self, query):
+        """丢弃出错的语句，下次执行时重新准备"""
+        cursor = self._cursors.pop(query, None)
+        if cursor is not None:
+            self._close_cursor(cursor)
+    
+    def close(self):
+        """关闭全部游标（连接关闭前调用）"""
+        cursors, self._cursors = list(self._cursors.values()), OrderedDict()
+        for cursor in cursors:
+            self._close_cursor(cursor)
+    
+    def _close_cursor(self, cursor):
+        try:
+            cursor.close()
+        except self.backend.Error:
+            pass
+
+class ConnectionPool:
+    """线程安全的数据库连接池
+    
+    - 空闲连接按后进先出复用，保持少量连接常驻
+    - 连接数在 min_size 和 max_size 之间，用满时等待其他线程归还
+    - 空闲超过 health_check_interval 秒的连接在取出时做健康检查，
+      失效的连接会被丢弃并透明地重建
+    - statement_cache_size 大于 0 时每个连接带一个预处理语句缓存（见 statement_cache()）
+    """
+    
+    def __init__(self, backend, min_size=1, max_size=5, checkout_timeout=10,
+                 health_check_interval=30, statement_cache_size=0):
+        if min_size < 0 or max_size < 1 or min_size > max_size:
+            raise ValueError("连接池大小配置无效")
+        self.backend = backend
+        self.min_size = min_size
+        self.max_size = max_size
+        self.checkout_timeout = checkout_timeout
+        self.health_check_interval = health_check_interval
+        self.statement_cache_size = statement_cache_size
+        
+        self._statements = {}  # 连接 -> StatementCache
+        self._idle = []  # 空闲连接，栈顶为最近归还的连接
+        self._size = 0  # 已创建（空闲 + 借出）的连接数
+        self._cond = threading.Condition()
+        self.closed = False
+        
+        # 预先建立最小数量的连接
+        for _ in range(min_size):
+            connection = self.backend.connect()
+            if connection is None:
+                break
+            self._idle.append(self._pooled(connection))
+            self._size += 1
+    
+    @property
+    def size(self):
+        """已创建的连接数"""
+        with self._cond:
+            return self._size
+    
+    @property
+    def idle_count(self):
+        """空闲连接数"""
+        with self._cond:
+            return len(self._idle)
+    
+    def _new_connection(self):
+        """建立新连接，失败时抛出 ConnectionPoolError"""
+        connection = self.backend.connect()
+        if connection is None:
+            raise ConnectionPoolError("无法建立数据库连接")
+        return self._pooled(connection)
+    
+    def _pooled(self, connection):
+        """登记新连接（启用预处理语句时同时创建该连接的语句缓存）"""
+        if self.statement_cache_size > 0:
+            with self._cond:
+                self._statements[connection] = StatementCache(
+                    self.backend, connection, self.statement_cache_size
+                )
+        return PooledConnection(connection)
+    
+    def statement_cache(self, connection):
+        """返回借出连接的预处理语句缓存，未启用时返回 None"""
+        return self._statements.get(connection)
+    
+    def acquire(self, timeout=None):
+        """从连接池取出一个可用连接"""
+        timeout = self.checkout_timeout if timeout is None else timeout
+        deadline = time.monotonic() + timeout
+        
+        with self._cond:
+            while True:
+                if self.closed:
+                    raise ConnectionPoolError("连接池已关闭")
+                if self._idle:
+                    pooled = self._idle.pop()
+                    break
+                if self._size < self.max_size:
+                    # 预占一个名额，在锁外建立连接
+                    self._size += 1
+                    pooled = None
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise ConnectionPoolError("等待可用数据库连接超时")
+                self._cond.wait(remaining)
+        
+        if pooled is not None:
+            idle_seconds = time.monotonic() - pooled.last_used
+            if idle_seconds < self.health_check_interval or self.backend.is_alive(pooled.connection):
+                return pooled
+            # 连接已失效，丢弃后重建
+            self._close_quietly(pooled)
+        
+        try:
+            return self._new_connection()
+        except Exception:
+            with self._cond:
+                self._size -= 1
+                self._cond.notify()
+            raise
+    
+    def release(self, pooled, discard=False):
+        """归还连接；discard 为 True 时关闭该连接而不再复用"""
+        with self._cond:
+            if discard or self.closed:
+                self._size -= 1
+            else:
+                pooled.last_used = time.monotonic()
+                self._idle.append(pooled)
+                pooled = None
+            self._cond.notify()
+        if pooled is not None:
+            self._close_quietly(pooled)
+    
+    @contextmanager
+    def connection(self, timeout=None):
+        """以上下文管理器方式借出连接，退出时自动归还"""
+        pooled = self.acquire(timeout)
+        discard = False
+        try:
+            yield pooled.connection
+        except self.backend.Error:
+            # 出错后若连接已断开，则不再放回连接池
+            discard = not self.backend.is_alive(pooled.connection)
+            raise
+        finally:
+            self.release(pooled, discard)
+    
+    def close(self):
+        """关闭连接池及所有空闲连接，借出中的连接在归还时关闭"""
+        with self._cond:
+            self.closed = True
+            idle, self._idle = self._idle, []
+            self._size -= len(idle)
+            self._cond.notify_all()
+        for pooled in idle:
+            self._close_quietly(pooled)
+    
+    def _close_quietly(self, pooled):
+        """关闭连接并忽略关闭时的错误"""
+        with self._cond:
+            statements = self._statements.pop(pooled.connection, None)
+        try:
+            if statements is not None:
+                statements.close()
+            self.backend.close(pooled.connection)
+        except self.backend.Error:
+            pass
+
+class Transaction:
+    """事务内的语句执行器（由 DatabaseManager.transaction() 创建）
+    
+    SQL 与 DatabaseManager 的其他方法一样按 MySQL 风格书写。
+    statements 为连接的预处理语句缓存（可选）；cursor 为最近一次执行所用的游标。
+    """
+    
+    def __init__(self, backend, cursor, metrics=None, statements=None):
+        self.backend = backend
+        self.cursor = cursor
+        self.metrics = metrics
+        self.statements = statements
+        self._plain_cursor = cursor
+    
+    def _execute(self, query, params, fetch=False, prepared=True, compact=False):
+        """执行语句并记录统计；fetch 为 True 时返回查询结果（字典列表，compact 时为紧凑行列表）"""
+        started = time.perf_counter()
+        translated = self.backend.translate(query)
+        use_cache = prepared and self.statements is not None and self.statements.accepts(translated)
+        self.cursor = self.statements.cursor(translated) if use_cache else self._plain_cursor
+        try:
+            self.cursor.execute(translated, params or ())
+            rows = DatabaseManager._fetch(self.cursor, compact) if fetch else None
+        except self.backend.Error:
+            if use_cache:
+                self.statements.discard(translated)
+            if self.metrics is not None:
+                self.metrics.record(query, time.perf_counter() - started, error=True)
+            raise
+        if self.metrics is not None:
+            count = len(rows) if fetch else self.cursor.rowcount
+            self.metrics.record(query, time.perf_counter() - started, count)
+        return rows
+    
+    def execute(self, query, params=None):
+        """执行一条语句，返回影响的行数"""
+        self._execute(query, params)
+        return max(self.cursor.rowcount, 0)
+    
+    def query(self, query, params=None, compact=False):
+        """执行查询语句，返回字典列表（compact 为 True 时返回紧凑行列表，见 compact_rows）"""
+        return self._execute(query, params, fetch=True, compact=compact)
+    
+    def insert(self, query, params=None):
+        """执行插入语句，返回插入的ID"""
+        self._execute(query, params)
+        return self.cursor.lastrowid
+    
+    def insert_many(self, table, columns, rows):
+        """用一条多行 VALUES 语句插入多行，返回按输入顺序排列的新ID列表"""
+        if not rows:
+            return []
+        placeholders = "(" + ", ".join(["%s"] * len(columns)) + ")"
+        query = (
+            f"INSERT INTO {table} ({', '.join(columns)}) VALUES "
+            + ", ".join([placeholders] * len(rows))
+        )
+        params = [value for row in rows for value in row]
+        # 多行 INSERT 的 SQL 随行数变化、很少重复，不值得在服务端预处理
+        self._execute(query, params, prepared=False)
+        return self.backend.inserted_ids(self.cursor, len(rows))
 
 class DatabaseManager:
-    """数据库管理类"""
+    """数据库管理类
+    
+    所有实例默认共享同一个连接池，每次执行语句时借出一个连接、
+    执行完毕立即归还，因此可以在多个后台线程中并行查询。
+    SQL 统一按 MySQL 风格（%s 占位符）书写，由数据库后端转换方言。
+    cache 为各管理类共享的查询缓存，写操作由管理类负责失效。
+    """
     
-    def __init__(self):
-        self.connection = None
+    def __init__(self, pool=None):
+        self.pool = pool
+        self.cache = LRUCache(**DatabaseConfig.CACHE_CONFIG)
+        self.activity_writer = None
+        self._activity_writer_lock = threading.Lock()
+        self.backend = pool.backend if pool is not None else DatabaseConfig.get_backend()
+        self.errors = (self.backend.Error, ConnectionPoolError)
+        self.metrics = DatabaseConfig.get_metrics()  # 查询统计（各实例共享）
     
     def connect(self):
-        """连接数据库"""
-        self.connection = DatabaseConfig.get_connection()
-        return self.connection is not None
+        """连接数据库（获取连接池并确认可以借出连接）"""
+        if self.pool is None:
+            self.pool = DatabaseConfig.get_pool()
+            self.backend = self.pool.backend
+            self.errors = (self.backend.Error, ConnectionPoolError)
+        try:
+            with self.pool.connection():
+                return True
+        except self.errors as e:
+            print(f"数据库连接错误: {e}")
+            return False
     
     def disconnect(self):
-        """断开数据库连接"""
-        if self.connection:
-            DatabaseConfig.close_connection(self.connection)
-            self.connection = None
+        """断开数据库连接
+        
+        连接在每条语句执行后已归还连接池，这里无需额外处理；
+        共享连接池在程序退出时通过 close() 关闭。
+        """
+    
+    def get_activity_writer(self):
+        """获取操作日志异步写入器（首次调用时创建）"""
+        with self._activity_writer_lock:
+            if self.activity_writer is None:
+                self.activity_writer = ActivityWriter(self)
+            return self.activity_writer
+    
+    def close(self):
+        """写入缓冲的操作日志并关闭共享连接池（程序退出时调用）"""
+        with self._activity_writer_lock:
+            writer, self.activity_writer = self.activity_writer, None
+        if writer is not None:
+            writer.close()
+        if self.pool is not None:
+            self.pool.close()
+            self.pool = None
+        DatabaseConfig.close_pool()
     
-    def execute_query(self, query, params=None):
-        """执行查询语句"""
+    @contextmanager
+    def checkout(self, timeout=None):
+        """借出一个数据库连接供调用方直接使用"""
+        if self.pool is None:
+            raise ConnectionPoolError("数据库未连接")
+        with self.pool.connection(timeout) as connection:
+            yield connection
+    
+    @staticmethod
+    def _fetch_dicts(cursor):
+        """读取结果集并转换为字典列表"""
+        columns = [column[0] for column in cursor.description or ()]
+        return [dict(zip(columns, row)) for row in cursor.fetchall()]
+    
+    @staticmethod
+    def _fetch(cursor, compact=False):
+        """读取结果集：compact 为 True 时返回紧凑行（共享列索引的只读元组），否则返回字典"""
+        if not compact:
+            return DatabaseManager._fetch_dicts(cursor)
+        return make_rows([column[0] for column in cursor.description or ()], cursor.fetchall())
+    
+    @contextmanager
+    def _cursor(self, connection, query):
+        """返回执行 query（已转换方言的 SQL）用的游标
+        
+        连接带预处理语句缓存时复用缓存的游标（出错时丢弃），否则新建游标并在用完后关闭。
+        """
+        statements = self.pool.statement_cache(connection)
+        if statements is None or not statements.accepts(query):
+            cursor = connection.cursor()
+            try:
+                yield cursor
+            finally:
+                cursor.close()
+            return
         try:
-            cursor = self.connection.cursor(dictionary=True)
-            cursor.execute(query, params or ())
-            result = cursor.fetchall()
-            cursor.close()
-            return result
-        except Error as e:
-            print(f"查询执行错误: {e}")
-            return None
+            yield statements.cursor(query)
+        except BaseException:
+            statements.discard(query)
+            raise
+    
+    def _record(self, query, started, rows=0, error=False):
+        """记录语句的耗时、行数和是否出错"""
+        if self.metrics is not None:
+            self.metrics.record(query, time.perf_counter() - started, rows, error)
+    
+    def execute_query(self, query, params=None, compact=False):
+        """执行查询语句，返回字典列表
+        
+        compact 为 True 时返回紧凑行列表（compact_rows.Row：按列名访问方式与字典相同，但不可修改），
+        适合行数多、结果需要长期保留的查询。
+        """
+        started = time.perf_counter()
+        translated = self.backend.translate(query)
+        for attempt in range(2):
+            try:
+                with self.checkout() as connection:
+                    with self._cursor(connection, translated) as cursor:
+                        cursor.execute(translated, params or ())
+                        rows = self._fetch(cursor, compact)
+                self._record(query, started, len(rows))
+                return rows
+            except self.backend.retryable_errors as e:
+                if attempt == 0:
+                    continue
+                self._record(query, started, error=True)
+                print(f"查询执行错误: {e}")
+                return None
+            except self.errors as e:
+                self._record(query, started, error=True)
+                print(f"查询执行错误: {e}")
+                return None
     
     def execute_update(self, query, params=None):
         """执行更新语句"""
+        started = time.perf_counter()
+        translated = self.backend.translate(query)
         try:
-            cursor = self.connection.cursor()
-            cursor.execute(query, params or ())
-            self.connection.commit()
-            affected_rows = cursor.rowcount
-            cursor.close()
+            with self.checkout() as connection:
+                with self._cursor(connection, translated) as cursor:
+                    try:
+                        cursor.execute(translated, params or ())
+                        connection.commit()
+                        # DDL 等语句在部分驱动中 rowcount 为 -1，统一按 0 行处理
+                        affected_rows = max(cursor.rowcount, 0)
+                    except self.backend.Error:
+                        connection.rollback()
+                        raise
+            self._record(query, started, affected_rows)
             return affected_rows
-        except Error as e:
+        except self.errors as e:
+            self._record(query, started, error=True)
             print(f"更新执行错误: {e}")
-            self.connection.rollback()
             return -1
     
     def execute_insert(self, query, params=None):
         """执行插入语句，返回插入的ID"""
+        started = time.perf_counter()
+        translated = self.backend.translate(query)
         try:
-            cursor = self.connection.cursor()
-            cursor.execute(query, params or ())
-            self.connection.commit()
-            insert_id = cursor.lastrowid
-            cursor.close()
+            with self.checkout() as connection:
+                with self._cursor(connection, translated) as cursor:
+                    try:
+                        cursor.execute(translated, params or ())
+                        connection.commit()
+                        insert_id = cursor.lastrowid
+                    except self.backend.Error:
+                        connection.rollback()
+                        raise
+            self._record(query, started, 1)
             return insert_id
-        except Error as e:
+        except self.errors as e:
+            self._record(query, started, error=True)
             print(f"插入执行错误: {e}")
-            self.connection.rollback()
             return -1
+    
+    @contextmanager
+    def transaction(self):
+        """在同一连接的一个事务中执行多条语句，正常退出时提交，出错时回滚"""
+        with self.checkout() as connection:
+            self.backend.begin(connection)
+            cursor = connection.cursor()
+            try:
+                yield Transaction(self.backend, cursor, self.metrics, self.pool.statement_cache(connection))
+                connection.commit()
+            except BaseException:
+                connection.rollback()
+                raise
+            finally:
+                cursor.close()
+    
+    def column_exists(self, table, column):
+        """检查表中是否存在指定列"""
+        with self.checkout() as connection:
+            return self.backend.column_exists(connection, table, column)
+    
+    def index_exists(self, table, index):
+        """检查表上是否存在指定索引"""
+        with self.checkout() as connection:
+            return self.backend.index_exists(connection, table, index)
+    
+    def initialize_schema(self):
+        """为新建的数据库创建表结构（仅支持自带建表脚本的后端，如 SQLite）"""
+        schema_file = getattr(self.backend, 'SCHEMA_FILE', None)
+        if schema_file is None:
+            return False
+        try:
+            with open(schema_file, encoding='utf-8') as f:
+                script = f.read()
+            with self.checkout() as connection:
+                self.backend.execute_script(connection, script)
+            return True
+        except (OSError, *self.errors) as e:
+            print(f"创建表结构失败: {e}")
+            return False
 
 class UserManager:
     """用户管理类"""
     
+    # 会话验证结果的缓存时间（秒），登出时立即失效
+    SESSION_CACHE_TTL = 30
+    
+    # 清理过期会话时每批删除的行数，避免长时间持有锁
+    SESSION_PURGE_BATCH_SIZE = 500
+    
     def __init__(self, db_manager):
         self.db = db_manager
     
@@ -121,13 +635,15 @@ class UserManager:
         
         if result:
             user = result[0]
-            # 更新最后登录时间
-            self.update_last_login(user['id'])
+            # 最后登录时间和登录日志交给后台批量写入，不阻塞登录
+            writer = self.db.get_activity_writer()
+            writer.touch_last_login(user['id'])
+            writer.log_operation(user['id'], 'login')
             return user
         return None
     
     def update_last_login(self, user_id):
-        """更新最后登录时间"""
+        """立即更新最后登录时间"""
         query = "UPDATE users SET last_login = %s WHERE id = %s"
         self.db.execute_update(query, (datetime.now(), user_id))
     
@@ -147,25 +663,80 @@ class UserManager:
         return None
     
     def validate_session(self, token):
-        """验证会话令牌"""
+        """验证会话令牌（验证通过的结果短时间缓存）"""
+        cache_key = ('session', token)
+        session = self.db.cache.get(cache_key)
+        if session is not None:
+            return dict(session)
+        generation = self.db.cache.generation(cache_key)
+        
         query = """
-            SELECT s.user_id, u.username, u.full_name, u.role
+            SELECT s.user_id, u.username, u.full_name, u.role, s.expires_at
             FROM user_sessions s
             JOIN users u ON s.user_id = u.id
             WHERE s.session_token = %s AND s.expires_at > %s AND u.status = 'active'
         """
         
-        result = self.db.execute_query(query, (token, datetime.now()))
-        return result[0] if result else None
+        now = datetime.now()
+        result = self.db.execute_query(query, (token, now))
+        if not result:
+            return None
+        
+        session = result[0]
+        expires_at = session.pop('expires_at')
+        # 缓存不能超过会话本身的过期时间
+        ttl = min(self.SESSION_CACHE_TTL, (expires_at - now).total_seconds())
+        self.db.cache.put(cache_key, session, ttl, generation=generation)
+        return dict(session)
     
     def logout_user(self, token):
         """用户登出"""
+        self.db.cache.invalidate(('session', token))
         query = "DELETE FROM user_sessions WHERE session_token = %s"
         return self.db.execute_update(query, (token,)) > 0
+    
+    def purge_expired_sessions(self, batch_size=None, max_batches=None, pause=0.05):
+        """分批删除过期会话，返回删除的行数
+        
+        每批先按 idx_expires_at 取出一批过期会话ID，再按主键删除，
+        每条语句只锁定少量行；批次之间暂停 pause 秒，让出数据库给前台请求。
+        """
+        batch_size = batch_size or self.SESSION_PURGE_BATCH_SIZE
+        select_query = """
+            SELECT id FROM user_sessions
+            WHERE expires_at <= %s
+            ORDER BY expires_at
+            LIMIT %s
+        """
+        
+        now = datetime.now()
+        deleted = 0
+        batches = 0
+        while max_batches is None or batches < max_batches:
+            rows = self.db.execute_query(select_query, (now, batch_size))
+            if not rows:
+                break
+            ids = [row['id'] for row in rows]
+            delete_query = (
+                "DELETE FROM user_sessions WHERE id IN ("
+                + ", ".join(["%s"] * len(ids)) + ")"
+            )
+            result = self.db.execute_update(delete_query, ids)
+            if result < 0:
+                break
+            deleted += result
+            batches += 1
+            if len(ids) < batch_size:
+                break
+            time.sleep(pause)
+        return deleted
 
 class CaseManager:
     """卷宗管理类"""
     
+    # 卷宗列表每页的数量
+    CASE_PAGE_SIZE = 50
+    
     def __init__(self, db_manager):
         self.db = db_manager
     
@@ -175,10 +746,13 @@ class CaseManager:
             INSERT INTO cases (case_name, case_number, description, created_by)
             VALUES (%s, %s, %s, %s)
         """
-        return self.db.execute_insert(query, (case_name, case_number, description, created_by))
+        case_id = self.db.execute_insert(query, (case_name, case_number, description, created_by))
+        if case_id > 0:
+            self.db.get_activity_writer().log_operation(created_by, 'create_case', case_id, case_name)
+        return case_id
     
     def get_user_cases(self, user_id):
-        """获取用户的卷宗列表"""
+        """获取用户的卷宗列表（紧凑行，只读）"""
         query = """
             SELECT 
                 c.id,
@@ -187,43 +761,226 @@ class CaseManager:
                 c.description,
                 c.status,
                 c.created_at,
-                COUNT(cd.id) as directory_count
+                c.directory_count
             FROM cases c
-            LEFT JOIN case_directories cd ON c.id = cd.case_id
             WHERE c.created_by = %s AND c.status = 'active'
-            GROUP BY c.id
             ORDER BY c.updated_at DESC
         """
-        return self.db.execute_query(query, (user_id,))
+        return self.db.execute_query(query, (user_id,), compact=True)
     
-    def get_case_by_id(self, case_id, user_id):
-        """根据ID获取卷宗信息"""
-        query = """
-            SELECT * FROM cases 
-            WHERE id = %s AND created_by = %s AND status = 'active'
+    def get_user_cases_page(self, user_id, limit=None, after=None):
+        """按页获取用户的卷宗列表（键集分页）
+        
+        按 (updated_at, id) 倒序排列，after 为上一页返回的游标。
+        返回 (本页卷宗列表, 下一页游标)，没有更多数据时游标为 None，查询失败时返回 (None, None)。
+        卷宗为紧凑行（只读）。
+        """
+        limit = limit or self.CASE_PAGE_SIZE
+        conditions = "c.created_by = %s AND c.status = 'active'"
+        params = [user_id]
+        if after is not None:
+            updated_at, case_id = after
+            conditions += " AND (c.updated_at < %s OR (c.updated_at = %s AND c.id < %s))"
+            params.extend([updated_at, updated_at, case_id])
+        query = f"""
+            SELECT 
+                c.id,
+                c.case_name,
+                c.case_number,
+                c.description,
+                c.status,
+                c.created_at,
+                c.updated_at,
+                c.directory_count
+            FROM cases c
+            WHERE {conditions}
+            ORDER BY c.updated_at DESC, c.id DESC
+            LIMIT %s
         """
-        result = self.db.execute_query(query, (case_id, user_id))
-        return result[0] if result else None
+        # 多取一行用于判断是否还有下一页
+        params.append(limit + 1)
+        rows = self.db.execute_query(query, params, compact=True)
+        if rows is None:
+            return None, None
+        if len(rows) <= limit:
+            return rows, None
+        rows = rows[:limit]
+        return rows, (rows[-1]['updated_at'], rows[-1]['id'])
+    
+    def iter_user_cases(self, user_id, page_size=None):
+        """逐页读取用户的全部卷宗（生成器），只在需要时查询下一页"""
+        after = None
+        while True:
+            rows, after = self.get_user_cases_page(user_id, page_size, after)
+            if not rows:
+                return
+            yield from rows
+            if after is None:
+                return
+    
+    def get_case_by_id(self, case_id, user_id):
+        """根据ID获取卷宗信息（优先读取缓存）"""
+        cache_key = ('case', case_id, user_id)
+        case = self.db.cache.get(cache_key)
+        if case is None:
+            # 查询期间卷宗被修改（缓存已失效）时不写入缓存，避免旧数据在整个 TTL 内有效
+            generation = self.db.cache.generation(cache_key)
+            query = """
+                SELECT * FROM cases 
+                WHERE id = %s AND created_by = %s AND status = 'active'
+            """
+            result = self.db.execute_query(query, (case_id, user_id))
+            case = result[0] if result else None
+            self.db.cache.put(cache_key, case, generation=generation)
+        # 返回副本，调用方修改结果不影响缓存
+        return dict(case) if case is not None else None
+    
+    def invalidate_case(self, case_id):
+        """卷宗数据变化后清除相关缓存"""
+        self.db.cache.invalidate_prefix('case', case_id)
 
 class DirectoryManager:
     """目录管理类"""
     
+    # 批量写入时每条语句包含的最大行数，避免单条 SQL 过长
+    BULK_CHUNK_SIZE = 500
+    
     def __init__(self, db_manager):
         self.db = db_manager
     
-    def create_directory(self, case_id, directory_name, parent_id=None):
+    # 增量维护 cases.directory_count；显式保留 updated_at，目录变化不改变卷宗列表的排序
+    ADJUST_COUNT_QUERY = """
+        UPDATE cases SET directory_count = directory_count + %s, updated_at = updated_at
+        WHERE id = %s
+    """
+    
+    def create_directory(self, case_id, sequence_number, file_name, page_number,
+                         sort_order=0, is_custom=False):
         """创建目录"""
         query = """
-            INSERT INTO case_directories (case_id, directory_name, parent_id)
-            VALUES (%s, %s, %s)
+            INSERT INTO case_directories
+                (case_id, sequence_number, file_name, page_number, sort_order, is_custom)
+            VALUES (%s, %s, %s, %s, %s, %s)
         """
-        return self.db.execute_insert(query, (case_id, directory_name, parent_id))
+        try:
+            with self.db.transaction() as tx:
+                directory_id = tx.insert(
+                    query, (case_id, sequence_number, file_name, page_number, sort_order, is_custom)
+                )
+                tx.execute(self.ADJUST_COUNT_QUERY, (1, case_id))
+            self.invalidate_case(case_id)
+            return directory_id
+        except self.db.errors as e:
+            print(f"插入执行错误: {e}")
+            return -1
+    
+    def create_directories_bulk(self, case_id, entries, chunk_size=None, replace=False):
+        """批量创建目录（如导入整份目录）
+        
+        entries 为字典列表，包含 sequence_number、file_name、page_number，
+        可选 sort_order（默认按列表顺序）和 is_custom。
+        所有行在一个事务中按块用多行 INSERT 写入，返回新目录ID列表；
+        replace 为 True 时在同一事务中先删除卷宗原有的目录。
+        任一块失败时整体回滚并返回 None。
+        """
+        chunk_size = chunk_size or self.BULK_CHUNK_SIZE
+        columns = ('case_id', 'sequence_number', 'file_name', 'page_number', 'sort_order', 'is_custom')
+        rows = [
+            (
+                case_id,
+                entry['sequence_number'],
+                entry['file_name'],
+                entry['page_number'],
+                entry.get('sort_order', index),
+                entry.get('is_custom', False)
+            )
+            for index, entry in enumerate(entries)
+        ]
+        
+        ids = []
+        try:
+            with self.db.transaction() as tx:
+                deleted = 0
+                if replace:
+                    deleted = tx.execute("DELETE FROM case_directories WHERE case_id = %s", (case_id,))
+                for start in range(0, len(rows), chunk_size):
+                    ids.extend(tx.insert_many('case_directories', columns, rows[start:start + chunk_size]))
+                if len(ids) != deleted:
+                    tx.execute(self.ADJUST_COUNT_QUERY, (len(ids) - deleted, case_id))
+        except self.db.errors as e:
+            print(f"批量创建目录失败: {e}")
+            return None
+        self.invalidate_case(case_id)
+        return ids
+    
+    def delete_directory(self, case_id, directory_id):
+        """删除目录，返回是否删除成功"""
+        try:
+            with self.db.transaction() as tx:
+                deleted = tx.execute(
+                    "DELETE FROM case_directories WHERE id = %s AND case_id = %s",
+                    (directory_id, case_id)
+                )
+                if deleted:
+                    tx.execute(self.ADJUST_COUNT_QUERY, (-deleted, case_id))
+            self.invalidate_case(case_id)
+            return deleted > 0
+        except self.db.errors as e:
+            print(f"删除目录失败: {e}")
+            return False
+    
+    def update_sort_orders_bulk(self, case_id, sort_orders, chunk_size=None):
+        """批量调整目录排序
+        
+        sort_orders 为 {目录ID: 排序顺序} 字典或 (目录ID, 排序顺序) 列表，
+        每块用一条 UPDATE ... CASE 语句完成，返回影响的行数，失败时返回 -1。
+        """
+        chunk_size = chunk_size or self.BULK_CHUNK_SIZE
+        items = list(sort_orders.items() if isinstance(sort_orders, dict) else sort_orders)
+        
+        affected_rows = 0
+        try:
+            with self.db.transaction() as tx:
+                for start in range(0, len(items), chunk_size):
+                    chunk = items[start:start + chunk_size]
+                    query = (
+                        "UPDATE case_directories SET sort_order = CASE id "
+                        + " ".join(["WHEN %s THEN %s"] * len(chunk))
+                        + " END WHERE case_id = %s AND id IN ("
+                        + ", ".join(["%s"] * len(chunk)) + ")"
+                    )
+                    params = [value for item in chunk for value in item]
+                    params.append(case_id)
+                    params.extend(directory_id for directory_id, _ in chunk)
+                    affected_rows += tx.execute(query, params)
+        except self.db.errors as e:
+            print(f"批量更新目录排序失败: {e}")
+            return -1
+        self.invalidate_case(case_id)
+        return affected_rows
     
     def get_case_directories(self, case_id):
-        """获取卷宗的目录结构"""
-        query = """
-            SELECT * FROM case_directories 
-            WHERE case_id = %s 
-            ORDER BY parent_id, directory_name
+        """获取卷宗的目录结构（优先读取缓存）
+        
+        目录为紧凑行（只读），缓存与调用方共享同一批行对象，需要修改时先 dict(row)。
         """
-        return self.db.execute_query(query, (case_id,))
\ No newline at end of file
+        cache_key = ('directories', case_id)
+        directories = self.db.cache.get(cache_key)
+        if directories is None:
+            generation = self.db.cache.generation(cache_key)
+            query = """
+                SELECT * FROM case_directories 
+                WHERE case_id = %s 
+                ORDER BY sort_order, sequence_number
+            """
+            directories = self.db.execute_query(query, (case_id,), compact=True)
+            self.db.cache.put(cache_key, directories, generation=generation)
+            if directories is None:
+                return None
+        # 行不可修改，只需复制列表，调用方增删条目不影响缓存
+        return list(directories)
+    
+    def invalidate_case(self, case_id):
+        """目录变化后清除该卷宗的目录缓存和卷宗缓存（目录数量已变化）"""
+        self.db.cache.invalidate(('directories', case_id))
+        self.db.cache.invalidate_prefix('case', case_id)
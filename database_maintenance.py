@@ -0,0 +1,316 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+律师办案智能助手 - 数据库维护工具
+
+用法：
+    python database_maintenance.py migrate        升级已有数据库的表结构和索引
+    python database_maintenance.py check-counts   检查 cases.directory_count 是否与目录表一致
+    python database_maintenance.py repair-counts  修复不一致的 directory_count
+    python database_maintenance.py purge-sessions 分批删除过期的会话
+"""
+
+import argparse
+import sys
+import threading
+from database_config import DatabaseConfig, DatabaseManager, UserManager
+
+def migrate_directory_count(db_manager):
+    """为 cases 表增加 directory_count 列及卷宗列表索引，并回填目录数量"""
+    if not db_manager.column_exists('cases', 'directory_count'):
+        print("正在为 cases 表增加 directory_count 列...")
+        result = db_manager.execute_update(
+            "ALTER TABLE cases ADD COLUMN directory_count INT NOT NULL DEFAULT 0"
+        )
+        if result < 0:
+            return False
+
+    if not db_manager.index_exists('cases', 'idx_cases_user_list'):
+        print("正在创建卷宗列表索引 idx_cases_user_list...")
+        result = db_manager.execute_update(
+            "CREATE INDEX idx_cases_user_list ON cases(created_by, status, updated_at, id)"
+        )
+        if result < 0:
+            return False
+
+    if db_manager.backend.name == 'sqlite':
+        # 旧版触发器在任何更新时都会刷新 updated_at，改为只响应业务字段的更新
+        # （directory_count 和 file_size 是派生值，不在其中）
+        db_manager.execute_update("DROP TRIGGER IF EXISTS trg_cases_updated_at")
+        result = db_manager.execute_update("""
+            CREATE TRIGGER trg_cases_updated_at
+            AFTER UPDATE OF case_name, case_number, file_path, file_type, description, created_by, status ON cases
+            WHEN NEW.updated_at IS OLD.updated_at
+            BEGIN
+                UPDATE cases SET updated_at = CURRENT_TIMESTAMP WHERE id = NEW.id;
+            END
+        """)
+        if result < 0:
+            return False
+
+    print("正在回填目录数量...")
+    result = db_manager.execute_update("""
+        UPDATE cases SET
+            directory_count = (SELECT COUNT(*) FROM case_directories cd WHERE cd.case_id = cases.id),
+            updated_at = updated_at
+    """)
+    return result >= 0
+
+# 全文检索表（与 database_schema.sql / database_schema_sqlite.sql 保持一致）
+CASE_PAGE_TEXT_MYSQL = [
+    """
+    CREATE TABLE case_page_text (
+        id INT AUTO_INCREMENT PRIMARY KEY,
+        case_id INT NOT NULL COMMENT '所属卷宗ID',
+        file_path VARCHAR(500) NOT NULL COMMENT 'PDF文件路径',
+        page_number INT NOT NULL COMMENT '页码（从1开始）',
+        page_hash CHAR(40) COMMENT '页面内容哈希（增量索引用）',
+        content MEDIUMTEXT COMMENT '页面文本',
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP COMMENT '创建时间',
+        FOREIGN KEY (case_id) REFERENCES cases(id) ON DELETE CASCADE,
+        UNIQUE KEY uk_case_file_page (case_id, file_path, page_number),
+        FULLTEXT INDEX ft_content (content) WITH PARSER ngram
+    ) COMMENT='卷宗页面文本表'
+    """
+]
+
+CASE_PAGE_TEXT_SQLITE = [
+    """
+    CREATE TABLE IF NOT EXISTS case_page_text (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        case_id INTEGER NOT NULL REFERENCES cases(id) ON DELETE CASCADE,
+        file_path VARCHAR(500) NOT NULL,
+        page_number INTEGER NOT NULL,
+        page_hash CHAR(40),
+        content TEXT,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        UNIQUE (case_id, file_path, page_number)
+    )
+    """,
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS case_page_text_fts USING fts5(
+        content, content='case_page_text', content_rowid='id', tokenize='trigram'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS trg_case_page_text_ai AFTER INSERT ON case_page_text
+    BEGIN
+        INSERT INTO case_page_text_fts(rowid, content) VALUES (NEW.id, NEW.content);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS trg_case_page_text_ad AFTER DELETE ON case_page_text
+    BEGIN
+        INSERT INTO case_page_text_fts(case_page_text_fts, rowid, content) VALUES ('delete', OLD.id, OLD.content);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS trg_case_page_text_au AFTER UPDATE OF content ON case_page_text
+    BEGIN
+        INSERT INTO case_page_text_fts(case_page_text_fts, rowid, content) VALUES ('delete', OLD.id, OLD.content);
+        INSERT INTO case_page_text_fts(rowid, content) VALUES (NEW.id, NEW.content);
+    END
+    """
+]
+
+def migrate_case_page_text(db_manager):
+    """创建全文检索使用的 case_page_text 表及索引"""
+    if db_manager.backend.name == 'sqlite':
+        statements = CASE_PAGE_TEXT_SQLITE
+    elif db_manager.column_exists('case_page_text', 'content'):
+        return True
+    else:
+        statements = CASE_PAGE_TEXT_MYSQL
+
+    print("正在创建全文检索表 case_page_text...")
+    for statement in statements:
+        if db_manager.execute_update(statement) < 0:
+            return False
+    return True
+
+# 文件指纹表（与 database_schema.sql / database_schema_sqlite.sql 保持一致）
+CASE_FILE_FINGERPRINTS_MYSQL = """
+    CREATE TABLE IF NOT EXISTS case_file_fingerprints (
+        id INT AUTO_INCREMENT PRIMARY KEY,
+        case_id INT NOT NULL COMMENT '所属卷宗ID',
+        file_path VARCHAR(500) NOT NULL COMMENT 'PDF文件路径',
+        file_size BIGINT NOT NULL COMMENT '文件大小（字节）',
+        file_mtime DOUBLE NOT NULL COMMENT '文件修改时间（Unix 时间戳）',
+        content_hash CHAR(64) NOT NULL COMMENT '文件内容 SHA-256',
+        page_count INT NOT NULL DEFAULT 0 COMMENT '页数',
+        indexed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP COMMENT '索引时间',
+        FOREIGN KEY (case_id) REFERENCES cases(id) ON DELETE CASCADE,
+        UNIQUE KEY uk_case_file (case_id, file_path)
+    ) COMMENT='卷宗文件指纹表'
+"""
+
+CASE_FILE_FINGERPRINTS_SQLITE = """
+    CREATE TABLE IF NOT EXISTS case_file_fingerprints (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        case_id INTEGER NOT NULL REFERENCES cases(id) ON DELETE CASCADE,
+        file_path VARCHAR(500) NOT NULL,
+        file_size BIGINT NOT NULL,
+        file_mtime DOUBLE NOT NULL,
+        content_hash CHAR(64) NOT NULL,
+        page_count INTEGER NOT NULL DEFAULT 0,
+        indexed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        UNIQUE (case_id, file_path)
+    )
+"""
+
+def migrate_file_fingerprints(db_manager):
+    """增量索引：为 case_page_text 添加 page_hash 列，并创建 case_file_fingerprints 表"""
+    if not db_manager.column_exists('case_page_text', 'page_hash'):
+        print("正在为 case_page_text 添加 page_hash 列...")
+        if db_manager.execute_update("ALTER TABLE case_page_text ADD COLUMN page_hash CHAR(40)") < 0:
+            return False
+
+    if db_manager.backend.name == 'sqlite':
+        statement = CASE_FILE_FINGERPRINTS_SQLITE
+    else:
+        statement = CASE_FILE_FINGERPRINTS_MYSQL
+    return db_manager.execute_update(statement) >= 0
+
+# 热点查询使用的复合索引：(表, 索引, 列)
+QUERY_INDEXES = [
+    ('cases', 'idx_cases_user_list', 'created_by, status, updated_at, id'),
+    ('case_directories', 'idx_directories_case_order', 'case_id, sort_order, sequence_number'),
+]
+# 被上面的复合索引或唯一约束覆盖、不再使用的旧索引：(表, 索引)
+REDUNDANT_INDEXES = [
+    ('cases', 'idx_cases_created_by'),         # idx_cases_user_list 的前缀
+    ('cases', 'idx_cases_status'),             # 区分度低，查询均先按 created_by 过滤
+    ('case_directories', 'idx_case_id'),       # idx_directories_case_order 的前缀
+    ('case_directories', 'idx_sort_order'),    # 没有跨卷宗按排序顺序的查询
+    ('case_directories', 'idx_directories_case_page'),  # 没有按页码查找目录的查询
+    ('user_sessions', 'idx_session_token'),    # 与 session_token 的唯一约束重复
+]
+
+def migrate_indexes(db_manager):
+    """创建热点查询的复合索引，删除被覆盖的旧索引（先建后删，外键始终有可用的索引）"""
+    for table, index, columns in QUERY_INDEXES:
+        if not db_manager.index_exists(table, index):
+            print(f"正在创建索引 {index}...")
+            if db_manager.execute_update(f"CREATE INDEX {index} ON {table}({columns})") < 0:
+                return False
+
+    for table, index in REDUNDANT_INDEXES:
+        if db_manager.index_exists(table, index):
+            print(f"正在删除重复索引 {index}...")
+            if db_manager.backend.name == 'sqlite':
+                statement = f"DROP INDEX {index}"
+            else:
+                statement = f"DROP INDEX {index} ON {table}"
+            if db_manager.execute_update(statement) < 0:
+                return False
+    return True
+
+def find_directory_count_mismatches(db_manager):
+    """找出 directory_count 与实际目录数量不一致的卷宗"""
+    return db_manager.execute_query("""
+        SELECT c.id, c.directory_count, COUNT(cd.id) as actual_count
+        FROM cases c
+        LEFT JOIN case_directories cd ON c.id = cd.case_id
+        GROUP BY c.id, c.directory_count
+        HAVING c.directory_count <> COUNT(cd.id)
+    """)
+
+def repair_directory_counts(db_manager):
+    """修复不一致的 directory_count，返回修复的卷宗数量，失败时返回 -1"""
+    mismatches = find_directory_count_mismatches(db_manager)
+    if mismatches is None:
+        return -1
+
+    repaired = 0
+    for row in mismatches:
+        # 按实际目录表重新统计，避免检查与修复之间的并发写入造成偏差
+        result = db_manager.execute_update("""
+            UPDATE cases SET
+                directory_count = (SELECT COUNT(*) FROM case_directories cd WHERE cd.case_id = cases.id),
+                updated_at = updated_at
+            WHERE id = %s
+        """, (row['id'],))
+        if result < 0:
+            return -1
+        repaired += result
+    return repaired
+
+class SessionPurgeJob:
+    """后台定期清理过期会话的任务"""
+    
+    def __init__(self, db_manager, interval=3600, batch_size=None):
+        self.user_manager = UserManager(db_manager)
+        self.interval = interval  # 两次清理之间的间隔（秒）
+        self.batch_size = batch_size
+        self._stop_event = threading.Event()
+        self._thread = None
+    
+    def start(self):
+        """启动后台线程（守护线程，不阻止程序退出）"""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="SessionPurgeJob", daemon=True)
+            self._thread.start()
+    
+    def stop(self, timeout=5):
+        """停止后台线程，正在进行的一批删除会执行完"""
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+    
+    def _run(self):
+        """启动后立即清理一次，之后按间隔重复"""
+        while not self._stop_event.is_set():
+            deleted = self.user_manager.purge_expired_sessions(self.batch_size)
+            if deleted:
+                print(f"已清理 {deleted} 个过期会话")
+            self._stop_event.wait(self.interval)
+
+def main(argv=None):
+    """命令行入口"""
+    parser = argparse.ArgumentParser(description="律师办案智能助手数据库维护工具")
+    parser.add_argument('command', choices=['migrate', 'check-counts', 'repair-counts', 'purge-sessions'],
+                        help="migrate: 升级表结构；check-counts: 检查目录计数；"
+                             "repair-counts: 修复目录计数；purge-sessions: 清理过期会话")
+    args = parser.parse_args(argv)
+
+    db_manager = DatabaseManager()
+    if not db_manager.connect():
+        print("数据库连接失败！")
+        return 1
+
+    try:
+        if args.command == 'migrate':
+            if not (migrate_directory_count(db_manager) and migrate_case_page_text(db_manager)
+                    and migrate_file_fingerprints(db_manager) and migrate_indexes(db_manager)):
+                print("数据库升级失败")
+                return 1
+            print("数据库升级完成")
+
+        elif args.command == 'check-counts':
+            mismatches = find_directory_count_mismatches(db_manager)
+            if mismatches is None:
+                return 1
+            for row in mismatches:
+                print(f"  卷宗 {row['id']}: 记录 {row['directory_count']}，实际 {row['actual_count']}")
+            print(f"共有 {len(mismatches)} 个卷宗的目录计数不一致")
+            return 1 if mismatches else 0
+
+        elif args.command == 'repair-counts':
+            repaired = repair_directory_counts(db_manager)
+            if repaired < 0:
+                print("修复目录计数失败")
+                return 1
+            print(f"已修复 {repaired} 个卷宗的目录计数")
+
+        elif args.command == 'purge-sessions':
+            deleted = UserManager(db_manager).purge_expired_sessions()
+            print(f"已清理 {deleted} 个过期会话")
+
+        return 0
+
+    finally:
+        DatabaseConfig.close_pool()
+
+if __name__ == "__main__":
+    sys.exit(main())
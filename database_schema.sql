@@ -27,6 +27,7 @@ CREATE TABLE cases (
     file_size BIGINT COMMENT '文件大小（字节）',
     file_type VARCHAR(20) DEFAULT 'PDF' COMMENT '文件类型',
     description TEXT COMMENT '卷宗描述',
+    directory_count INT NOT NULL DEFAULT 0 COMMENT '目录条数（由 DirectoryManager 增量维护）',
     created_by INT NOT NULL COMMENT '创建用户ID',
     status ENUM('active', 'archived', 'deleted') DEFAULT 'active' COMMENT '卷宗状态',
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP COMMENT '创建时间',
@@ -46,8 +47,7 @@ CREATE TABLE case_directories (
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP COMMENT '创建时间',
     updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP COMMENT '更新时间',
     FOREIGN KEY (case_id) REFERENCES cases(id) ON DELETE CASCADE,
-    INDEX idx_case_id (case_id),
-    INDEX idx_sort_order (sort_order)
+    INDEX idx_directories_case_order (case_id, sort_order, sequence_number)  -- 按卷宗读取目录时无需额外排序
 ) COMMENT='卷宗目录表';
 
 -- 用户会话表（可选，用于管理登录状态）
@@ -58,7 +58,6 @@ CREATE TABLE user_sessions (
     expires_at TIMESTAMP NOT NULL COMMENT '过期时间',
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP COMMENT '创建时间',
     FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE,
-    INDEX idx_session_token (session_token),
     INDEX idx_expires_at (expires_at)
 ) COMMENT='用户会话表';
 
@@ -78,14 +77,41 @@ CREATE TABLE operation_logs (
     INDEX idx_created_at (created_at)
 ) COMMENT='操作日志表';
 
+-- 卷宗页面文本表（全文检索用，由 search_index.CaseSearchIndex 维护）
+CREATE TABLE case_page_text (
+    id INT AUTO_INCREMENT PRIMARY KEY,
+    case_id INT NOT NULL COMMENT '所属卷宗ID',
+    file_path VARCHAR(500) NOT NULL COMMENT 'PDF文件路径',
+    page_number INT NOT NULL COMMENT '页码（从1开始）',
+    page_hash CHAR(40) COMMENT '页面内容哈希（增量索引用）',
+    content MEDIUMTEXT COMMENT '页面文本',
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP COMMENT '创建时间',
+    FOREIGN KEY (case_id) REFERENCES cases(id) ON DELETE CASCADE,
+    UNIQUE KEY uk_case_file_page (case_id, file_path, page_number),
+    FULLTEXT INDEX ft_content (content) WITH PARSER ngram
+) COMMENT='卷宗页面文本表';
+
+-- 卷宗文件指纹表（增量索引用）
+CREATE TABLE case_file_fingerprints (
+    id INT AUTO_INCREMENT PRIMARY KEY,
+    case_id INT NOT NULL COMMENT '所属卷宗ID',
+    file_path VARCHAR(500) NOT NULL COMMENT 'PDF文件路径',
+    file_size BIGINT NOT NULL COMMENT '文件大小（字节）',
+    file_mtime DOUBLE NOT NULL COMMENT '文件修改时间（Unix 时间戳）',
+    content_hash CHAR(64) NOT NULL COMMENT '文件内容 SHA-256',
+    page_count INT NOT NULL DEFAULT 0 COMMENT '页数',
+    indexed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP COMMENT '索引时间',
+    FOREIGN KEY (case_id) REFERENCES cases(id) ON DELETE CASCADE,
+    UNIQUE KEY uk_case_file (case_id, file_path)
+) COMMENT='卷宗文件指纹表';
+
 -- 插入默认管理员用户（密码需要在应用中加密）
 INSERT INTO users (username, password, email, full_name, role) VALUES 
 ('admin', 'admin123', 'admin@example.com', '系统管理员', 'admin');
 
 -- 创建索引以提高查询性能
-CREATE INDEX idx_cases_created_by ON cases(created_by);
-CREATE INDEX idx_cases_status ON cases(status);
-CREATE INDEX idx_directories_case_page ON case_directories(case_id, page_number);
+-- 卷宗列表按 (created_by, status) 过滤、按 (updated_at, id) 排序，同时用于 created_by 外键
+CREATE INDEX idx_cases_user_list ON cases(created_by, status, updated_at, id);
 
 -- 创建视图：卷宗目录详情视图
 CREATE VIEW case_directory_view AS
@@ -0,0 +1,170 @@
+-- 卷宗管理系统数据库结构（SQLite 版本）
+-- 与 database_schema.sql 保持一致，用于单机安装和基准测试。
+-- ENUM 用 CHECK 约束代替，ON UPDATE CURRENT_TIMESTAMP 用触发器代替。
+
+PRAGMA foreign_keys = ON;
+
+-- 用户表
+CREATE TABLE IF NOT EXISTS users (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    username VARCHAR(50) NOT NULL UNIQUE,                                        -- 用户名
+    password VARCHAR(255) NOT NULL,                                              -- 密码（加密存储）
+    email VARCHAR(100),                                                          -- 邮箱
+    full_name VARCHAR(100),                                                      -- 真实姓名
+    role TEXT DEFAULT 'user' CHECK (role IN ('admin', 'user')),                  -- 用户角色
+    status TEXT DEFAULT 'active' CHECK (status IN ('active', 'inactive')),       -- 用户状态
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,                              -- 创建时间
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,                              -- 更新时间
+    last_login TIMESTAMP NULL                                                    -- 最后登录时间
+);
+
+-- 卷宗表
+CREATE TABLE IF NOT EXISTS cases (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    case_name VARCHAR(200) NOT NULL,                                             -- 卷宗名称
+    case_number VARCHAR(100) UNIQUE,                                             -- 卷宗案号
+    file_path VARCHAR(500) NOT NULL,                                             -- 卷宗文件在本地硬盘的完整路径
+    file_size BIGINT,                                                            -- 文件大小（字节）
+    file_type VARCHAR(20) DEFAULT 'PDF',                                         -- 文件类型
+    description TEXT,                                                            -- 卷宗描述
+    directory_count INT NOT NULL DEFAULT 0,                                      -- 目录条数（由 DirectoryManager 增量维护）
+    created_by INTEGER NOT NULL REFERENCES users(id) ON DELETE RESTRICT,         -- 创建用户ID
+    status TEXT DEFAULT 'active' CHECK (status IN ('active', 'archived', 'deleted')), -- 卷宗状态
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,                              -- 创建时间
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP                               -- 更新时间
+);
+
+-- 卷宗目录表（对应目录框中的内容）
+CREATE TABLE IF NOT EXISTS case_directories (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    case_id INTEGER NOT NULL REFERENCES cases(id) ON DELETE CASCADE,             -- 所属卷宗ID
+    sequence_number VARCHAR(20) NOT NULL,                                        -- 目录序号
+    file_name VARCHAR(300) NOT NULL,                                             -- 文件名称
+    page_number INTEGER NOT NULL,                                                -- 页码
+    sort_order INTEGER DEFAULT 0,                                                -- 排序顺序
+    is_custom BOOLEAN DEFAULT 0,                                                 -- 是否为用户自定义添加
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,                              -- 创建时间
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP                               -- 更新时间
+);
+-- 按卷宗读取目录时无需额外排序
+CREATE INDEX IF NOT EXISTS idx_directories_case_order ON case_directories(case_id, sort_order, sequence_number);
+
+-- 用户会话表（可选，用于管理登录状态）
+CREATE TABLE IF NOT EXISTS user_sessions (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    user_id INTEGER NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+    session_token VARCHAR(255) NOT NULL UNIQUE,                                  -- 会话令牌
+    expires_at TIMESTAMP NOT NULL,                                               -- 过期时间
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP                               -- 创建时间
+);
+CREATE INDEX IF NOT EXISTS idx_expires_at ON user_sessions(expires_at);
+
+-- 操作日志表（可选，记录用户操作）
+CREATE TABLE IF NOT EXISTS operation_logs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    user_id INTEGER NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+    case_id INTEGER NULL REFERENCES cases(id) ON DELETE SET NULL,                -- 相关卷宗ID
+    operation_type TEXT NOT NULL CHECK (operation_type IN (
+        'login', 'logout', 'create_case', 'update_case', 'delete_case',
+        'add_directory', 'update_directory', 'delete_directory')),              -- 操作类型
+    operation_detail TEXT,                                                       -- 操作详情
+    ip_address VARCHAR(45),                                                      -- IP地址
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP                               -- 操作时间
+);
+CREATE INDEX IF NOT EXISTS idx_user_id ON operation_logs(user_id);
+CREATE INDEX IF NOT EXISTS idx_operation_type ON operation_logs(operation_type);
+CREATE INDEX IF NOT EXISTS idx_created_at ON operation_logs(created_at);
+
+-- 卷宗页面文本表（全文检索用，由 search_index.CaseSearchIndex 维护）
+CREATE TABLE IF NOT EXISTS case_page_text (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    case_id INTEGER NOT NULL REFERENCES cases(id) ON DELETE CASCADE,             -- 所属卷宗ID
+    file_path VARCHAR(500) NOT NULL,                                             -- PDF文件路径
+    page_number INTEGER NOT NULL,                                                -- 页码（从1开始）
+    page_hash CHAR(40),                                                          -- 页面内容哈希（增量索引用）
+    content TEXT,                                                                -- 页面文本
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,                              -- 创建时间
+    UNIQUE (case_id, file_path, page_number)
+);
+
+-- 页面文本的倒排索引（trigram 分词，支持中文子串检索），由触发器与 case_page_text 同步
+CREATE VIRTUAL TABLE IF NOT EXISTS case_page_text_fts USING fts5(
+    content, content='case_page_text', content_rowid='id', tokenize='trigram'
+);
+
+CREATE TRIGGER IF NOT EXISTS trg_case_page_text_ai AFTER INSERT ON case_page_text
+BEGIN
+    INSERT INTO case_page_text_fts(rowid, content) VALUES (NEW.id, NEW.content);
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_case_page_text_ad AFTER DELETE ON case_page_text
+BEGIN
+    INSERT INTO case_page_text_fts(case_page_text_fts, rowid, content) VALUES ('delete', OLD.id, OLD.content);
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_case_page_text_au AFTER UPDATE OF content ON case_page_text
+BEGIN
+    INSERT INTO case_page_text_fts(case_page_text_fts, rowid, content) VALUES ('delete', OLD.id, OLD.content);
+    INSERT INTO case_page_text_fts(rowid, content) VALUES (NEW.id, NEW.content);
+END;
+
+-- 默认管理员账户由 app.create_sample_data() 创建（密码加密存储）
+
+-- 创建索引以提高查询性能
+-- 卷宗列表按 (created_by, status) 过滤、按 (updated_at, id) 排序，同时用于 created_by 外键
+CREATE INDEX IF NOT EXISTS idx_cases_user_list ON cases(created_by, status, updated_at, id);
+
+-- 代替 MySQL 的 ON UPDATE CURRENT_TIMESTAMP
+CREATE TRIGGER IF NOT EXISTS trg_users_updated_at AFTER UPDATE ON users
+WHEN NEW.updated_at IS OLD.updated_at
+BEGIN
+    UPDATE users SET updated_at = CURRENT_TIMESTAMP WHERE id = NEW.id;
+END;
+
+-- directory_count 和 file_size 是派生值（目录数量、卷宗文件总大小），更新它们不改变卷宗的更新时间
+CREATE TRIGGER IF NOT EXISTS trg_cases_updated_at
+AFTER UPDATE OF case_name, case_number, file_path, file_type, description, created_by, status ON cases
+WHEN NEW.updated_at IS OLD.updated_at
+BEGIN
+    UPDATE cases SET updated_at = CURRENT_TIMESTAMP WHERE id = NEW.id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_case_directories_updated_at AFTER UPDATE ON case_directories
+WHEN NEW.updated_at IS OLD.updated_at
+BEGIN
+    UPDATE case_directories SET updated_at = CURRENT_TIMESTAMP WHERE id = NEW.id;
+END;
+
+-- 创建视图：卷宗目录详情视图
+CREATE VIEW IF NOT EXISTS case_directory_view AS
+SELECT
+    cd.id,
+    cd.case_id,
+    c.case_name,
+    c.case_number,
+    cd.sequence_number,
+    cd.file_name,
+    cd.page_number,
+    cd.sort_order,
+    cd.is_custom,
+    cd.created_at,
+    cd.updated_at,
+    u.username as created_by_username
+FROM case_directories cd
+JOIN cases c ON cd.case_id = c.id
+JOIN users u ON c.created_by = u.id
+WHERE c.status = 'active'
+ORDER BY cd.case_id, cd.sort_order, cd.sequence_number;
+
+-- 卷宗文件指纹表（增量索引用）
+CREATE TABLE IF NOT EXISTS case_file_fingerprints (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    case_id INTEGER NOT NULL REFERENCES cases(id) ON DELETE CASCADE,             -- 所属卷宗ID
+    file_path VARCHAR(500) NOT NULL,                                             -- PDF文件路径
+    file_size BIGINT NOT NULL,                                                   -- 文件大小（字节）
+    file_mtime DOUBLE NOT NULL,                                                  -- 文件修改时间（Unix 时间戳）
+    content_hash CHAR(64) NOT NULL,                                              -- 文件内容 SHA-256
+    page_count INTEGER NOT NULL DEFAULT 0,                                       -- 页数
+    indexed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,                              -- 索引时间
+    UNIQUE (case_id, file_path)
+);
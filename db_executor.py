@@ -0,0 +1,111 @@
+# 数据库异步执行模块
+# 数据库调用在工作线程中执行，Tk 主线程不会因为数据库缓慢或网络延迟而卡住；
+# 执行结果通过 root.after 轮询交回 Tk 主线程，回调中可以直接操作界面。
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from database_config import DatabaseConfig
+
+class DatabaseExecutor:
+    """在线程池中执行数据库调用，返回 concurrent.futures.Future
+
+    - submit(func, *args, callback=..., errback=...)：callback(result) / errback(exception)
+      在 Tk 主线程中调用
+    - bind(manager) 返回管理器的异步代理，如
+      executor.bind(case_manager).get_user_cases(user_id, callback=show_cases)
+    工作线程数默认等于连接池的最大连接数，多余的调用排队等待。
+    带回调的调用只能在 Tk 主线程中提交。
+    """
+
+    # 结果轮询间隔（毫秒）
+    POLL_INTERVAL = 20
+
+    def __init__(self, root, max_workers=None):
+        self.root = root
+        self.max_workers = max_workers or DatabaseConfig.POOL_CONFIG['max_size']
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="DatabaseWorker")
+        self._lock = threading.Lock()
+        self._pending = []  # [(future, callback, errback)]
+        self._polling = False
+        self._closed = False
+
+    def submit(self, func, *args, callback=None, errback=None, **kwargs):
+        """在工作线程中执行 func(*args, **kwargs)，返回 Future"""
+        future = self._executor.submit(func, *args, **kwargs)
+        if callback is not None or errback is not None:
+            with self._lock:
+                self._pending.append((future, callback, errback))
+            self._ensure_polling()
+        return future
+
+    def bind(self, manager):
+        """返回管理器的异步代理：方法调用在工作线程中执行并返回 Future"""
+        return AsyncManager(manager, self)
+
+    def shutdown(self, wait=True):
+        """停止接受新的调用；wait 为 True 时等待进行中的调用完成（回调不再执行）"""
+        with self._lock:
+            self._closed = True
+            self._pending = []
+        self._executor.shutdown(wait=wait)
+
+    def _ensure_polling(self):
+        if not self._polling and not self._closed:
+            self._polling = True
+            self.root.after(self.POLL_INTERVAL, self._poll)
+
+    def _poll(self):
+        """在 Tk 主线程中执行已完成调用的回调"""
+        # 一次遍历完成划分：每个调用只检查一次 done()，
+        # 两次检查之间完成的调用不会同时被两个列表漏掉
+        done, pending = [], []
+        with self._lock:
+            for item in self._pending:
+                (done if item[0].done() else pending).append(item)
+            self._pending = pending
+
+        for future, callback, errback in done:
+            error = future.exception()
+            try:
+                if error is None:
+                    if callback is not None:
+                        callback(future.result())
+                elif errback is not None:
+                    errback(error)
+                else:
+                    print(f"数据库调用失败: {error}")
+            except Exception as e:
+                # 回调出错不能影响其他回调和轮询
+                print(f"数据库回调执行失败: {e}")
+
+        # 回调中可能又提交了新的调用，所以在回调之后再检查
+        with self._lock:
+            remaining = bool(self._pending) and not self._closed
+        if remaining:
+            self.root.after(self.POLL_INTERVAL, self._poll)
+        else:
+            self._polling = False
+
+class AsyncManager:
+    """管理器的异步代理
+
+    代理的方法与原管理器同名、参数相同，另外接受 callback / errback 关键字参数，
+    立即返回 Future，例如：
+        cases = executor.bind(case_manager)
+        cases.get_user_cases_page(user_id, callback=on_page)
+    """
+
+    def __init__(self, manager, executor):
+        self._manager = manager
+        self._executor = executor
+
+    def __getattr__(self, name):
+        method = getattr(self._manager, name)
+        if not callable(method):
+            return method
+
+        def call(*args, callback=None, errback=None, **kwargs):
+            return self._executor.submit(method, *args, callback=callback, errback=errback, **kwargs)
+
+        call.__name__ = name
+        call.__doc__ = method.__doc__
+        return call
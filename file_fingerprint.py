@@ -0,0 +1,57 @@
+# 文件指纹模块
+# 通过 (路径, 大小, 修改时间, 内容哈希) 判断卷宗文件是否变化，
+# 通过页面哈希判断文件内哪些页面变化，供增量索引和渲染缓存使用。
+import hashlib
+import os
+from collections import namedtuple
+
+FileFingerprint = namedtuple('FileFingerprint', ['file_path', 'file_size', 'file_mtime', 'content_hash'])
+
+# 计算内容哈希时每次读取的字节数
+HASH_CHUNK_SIZE = 1024 * 1024
+
+def hash_file(file_path):
+    """流式计算文件内容的 SHA-256，内存占用与文件大小无关"""
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def stat_file(file_path):
+    """只读取文件大小和修改时间（不读内容），返回 (大小, 修改时间)"""
+    stat = os.stat(file_path)
+    return stat.st_size, stat.st_mtime
+
+def file_fingerprint(file_path, content_hash=None):
+    """生成文件指纹，content_hash 为空时计算内容哈希"""
+    file_size, file_mtime = stat_file(file_path)
+    return FileFingerprint(file_path, file_size, file_mtime, content_hash or hash_file(file_path))
+
+def is_unchanged(file_path, stored):
+    """大小和修改时间都与已保存的指纹一致时，视为文件未变化（无需读取内容）
+
+    stored 为包含 file_size、file_mtime 的字典或 FileFingerprint。
+    """
+    if stored is None:
+        return False
+    if isinstance(stored, dict):
+        stored = FileFingerprint(file_path, stored['file_size'], stored['file_mtime'], stored.get('content_hash'))
+    file_size, file_mtime = stat_file(file_path)
+    # 修改时间在不同数据库中的精度不同，按毫秒比较
+    return file_size == stored.file_size and abs(file_mtime - float(stored.file_mtime)) < 0.001
+
+def page_hash(page):
+    """计算 PyMuPDF 页面的哈希：页面内容流 + 页面尺寸 + 引用图像的原始数据流
+
+    图像按数据流内容计算（不解码），替换了扫描图像但 xref 和尺寸不变时也能发现变化。
+    不提取文本、不渲染，开销远小于重新处理页面。
+    """
+    digest = hashlib.sha1()
+    digest.update(page.read_contents())
+    digest.update(repr(tuple(page.rect)).encode())
+    doc = page.parent
+    for image in page.get_images(full=False):
+        digest.update(repr(image).encode())
+        digest.update(doc.xref_stream_raw(image[0]) or b'')
+    return digest.hexdigest()
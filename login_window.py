@@ -2,6 +2,7 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
 from database_config import DatabaseManager, UserManager
+from db_executor import DatabaseExecutor
 import hashlib
 
 class LoginWindow:
@@ -17,9 +18,12 @@ class LoginWindow:
         # 居中显示窗口
         self.center_window()
         
-        # 数据库管理器
+        # 数据库管理器（数据库调用在后台线程中执行，界面不会卡住）
         self.db_manager = DatabaseManager()
+        self.db_executor = DatabaseExecutor(self.root)
         self.user_manager = None
+        self.connecting = False  # 是否正在连接数据库（连接完成前不能登录和注册）
+        self.logging_in = False  # 是否正在登录（防止重复提交）
         
         # 用户信息
         self.current_user = None
@@ -41,8 +45,26 @@ class LoginWindow:
         self.root.geometry(f"{width}x{height}+{x}+{y}")
     
     def connect_database(self):
-        """连接数据库"""
-        if self.db_manager.connect():
+        """在后台连接数据库"""
+        self.connecting = True
+        self.status_label.config(text="正在连接数据库...", fg="#666666")
+        self.login_btn.config(state=tk.DISABLED, text="正在连接数据库...")
+        self.db_executor.submit(
+            self.db_manager.connect,
+            callback=self.on_database_connected,
+            errback=self.on_database_connect_failed
+        )
+    
+    def on_database_connect_failed(self, error):
+        """连接数据库时出错（Tk 主线程）"""
+        print(f"数据库连接出错: {error}")
+        self.on_database_connected(False)
+    
+    def on_database_connected(self, connected):
+        """数据库连接完成（Tk 主线程）"""
+        self.connecting = False
+        self.login_btn.config(state=tk.NORMAL, text="登录")
+        if connected:
             self.user_manager = UserManager(self.db_manager)
             self.status_label.config(text="数据库连接成功", fg="green")
         else:
@@ -133,7 +155,7 @@ class LoginWindow:
         forgot_label.bind('<Button-1>', self.forgot_password)
         
         # 登录按钮
-        login_btn = tk.Button(form_content, text="登录",
+        self.login_btn = login_btn = tk.Button(form_content, text="登录",
                              font=('Microsoft YaHei', 12, 'bold'),
                              bg='#4a90e2', fg='white',
                              relief=tk.FLAT, bd=0,
@@ -173,7 +195,10 @@ class LoginWindow:
         self.username_entry.focus()
     
     def login(self):
-        """用户登录"""
+        """用户登录（验证和创建会话在后台线程中执行）"""
+        if self.logging_in or self.connecting:
+            return
+        
         username = self.username_entry.get().strip()
         password = self.password_entry.get().strip()
         
@@ -185,13 +210,25 @@ class LoginWindow:
             messagebox.showerror("错误", "数据库连接失败")
             return
         
-        # 验证用户
+        self.set_logging_in(True)
+        self.db_executor.submit(
+            self.authenticate, username, password,
+            callback=self.on_login_finished, errback=self.on_login_failed
+        )
+    
+    def authenticate(self, username, password):
+        """验证用户并创建会话（工作线程），返回 (用户, 会话令牌)"""
         user = self.user_manager.authenticate_user(username, password)
+        if not user:
+            return None, None
+        return user, self.user_manager.create_session(user['id'])
+    
+    def on_login_finished(self, result):
+        """登录结果（Tk 主线程）"""
+        self.set_logging_in(False)
+        user, token = result
         
         if user:
-            # 创建会话
-            token = self.user_manager.create_session(user['id'])
-            
             if token:
                 self.current_user = user
                 self.session_token = token
@@ -205,8 +242,23 @@ class LoginWindow:
         else:
             messagebox.showerror("错误", "用户名或密码错误")
     
+    def on_login_failed(self, error):
+        """登录过程出错（Tk 主线程）"""
+        self.set_logging_in(False)
+        messagebox.showerror("错误", f"登录失败: {error}")
+    
+    def set_logging_in(self, logging_in):
+        """切换登录中的界面状态"""
+        self.logging_in = logging_in
+        if logging_in:
+            self.login_btn.config(state=tk.DISABLED, text="正在登录...")
+        else:
+            self.login_btn.config(state=tk.NORMAL, text="登录")
+    
     def open_main_application(self):
         """打开主应用程序"""
+        # 登录窗口关闭后不再需要其后台线程（进行中的调用执行完毕）
+        self.db_executor.shutdown(wait=True)
         self.root.destroy()
         
         # 导入并启动主程序
@@ -218,7 +270,13 @@ class LoginWindow:
     
     def show_register(self, event=None):
         """显示注册窗口"""
-        register_window = RegisterWindow(self.db_manager)
+        if self.connecting:
+            self.status_label.config(text="正在连接数据库，请稍候...", fg="#666666")
+            return
+        if not self.user_manager:
+            messagebox.showerror("错误", "数据库连接失败")
+            return
+        register_window = RegisterWindow(self.db_manager, self.db_executor)
         register_window.show()
     
     def forgot_password(self, event=None):
@@ -237,9 +295,11 @@ class LoginWindow:
 class RegisterWindow:
     """注册窗口类"""
     
-    def __init__(self, db_manager):
+    def __init__(self, db_manager, db_executor=None):
         self.db_manager = db_manager
         self.user_manager = UserManager(db_manager)
+        self.db_executor = db_executor
+        self.registering = False  # 是否正在注册（防止重复提交）
         
     def show(self):
         """显示注册窗口"""
@@ -252,6 +312,9 @@ class RegisterWindow:
         # 居中显示
         self.center_window()
         
+        if self.db_executor is None:
+            self.db_executor = DatabaseExecutor(self.window)
+        
         # 创建注册界面
         self.create_register_interface()
     
@@ -312,7 +375,7 @@ class RegisterWindow:
             self.entries[field_name] = entry
         
         # 注册按钮
-        register_btn = tk.Button(form_content, text="注册",
+        self.register_btn = register_btn = tk.Button(form_content, text="注册",
                                font=('Microsoft YaHei', 12, 'bold'),
                                bg='#5cb85c', fg='white',
                                relief=tk.FLAT, bd=0,
@@ -349,13 +412,23 @@ class RegisterWindow:
             messagebox.showerror("错误", "密码长度至少6位")
             return
         
+        if self.registering:
+            return
+        self.registering = True
+        self.register_btn.config(state=tk.DISABLED, text="正在注册...")
+        self.db_executor.submit(
+            self.create_user, data,
+            callback=self.on_register_finished, errback=self.on_register_failed
+        )
+    
+    def create_user(self, data):
+        """检查用户名并创建用户（工作线程），返回新用户ID；用户名已存在时返回 None"""
         # 检查用户名是否已存在
         check_query = "SELECT id FROM users WHERE username = %s"
         existing = self.db_manager.execute_query(check_query, (data['username'],))
         
         if existing:
-            messagebox.showerror("错误", "用户名已存在")
-            return
+            return None
         
         # 创建用户
         hashed_password = UserManager.hash_password(data['password'])
@@ -365,18 +438,34 @@ class RegisterWindow:
             VALUES (%s, %s, %s, %s)
         """
         
-        user_id = self.db_manager.execute_insert(insert_query, (
+        return self.db_manager.execute_insert(insert_query, (
             data['username'],
             hashed_password,
             data['full_name'] or None,
             data['email'] or None
         ))
+    
+    def on_register_finished(self, user_id):
+        """注册结果（Tk 主线程）"""
+        self.registering = False
+        if not self.window.winfo_exists():
+            return
+        self.register_btn.config(state=tk.NORMAL, text="注册")
         
-        if user_id > 0:
+        if user_id is None:
+            messagebox.showerror("错误", "用户名已存在")
+        elif user_id > 0:
             messagebox.showinfo("成功", "注册成功！请使用新账户登录。")
             self.window.destroy()
         else:
             messagebox.showerror("错误", "注册失败，请重试")
+    
+    def on_register_failed(self, error):
+        """注册过程出错（Tk 主线程）"""
+        self.registering = False
+        if self.window.winfo_exists():
+            self.register_btn.config(state=tk.NORMAL, text="注册")
+        messagebox.showerror("错误", f"注册失败: {error}")
 
 if __name__ == "__main__":
     # 启动登录窗口
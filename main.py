@@ -2,13 +2,23 @@ import tkinter as tk
 from tkinter import ttk, filedialog, messagebox, scrolledtext
 import os
 from datetime import datetime
-import PyPDF2
-import pdfplumber
-import fitz  # PyMuPDF
 from PIL import Image, ImageTk
 import io
+import threading
 from database_config import DatabaseManager, CaseManager, DirectoryManager
-from database_config_enhanced import EnhancedCaseManager, PDFFileManager, EnhancedDirectoryManager
+from db_executor import DatabaseExecutor
+from pdf_cache import PDFCache, PageImageWindow
+from pdf_engine import PDFEngine
+from pdf_handles import DOCUMENT_POOL
+from render_cache import RenderCache
+from tile_renderer import TileRenderer
+from toc_builder import TocBuilder
+from preload_scheduler import PreloadScheduler
+from search_index import CaseSearchIndex
+try:
+    from database_config_enhanced import EnhancedCaseManager, PDFFileManager, EnhancedDirectoryManager
+except ImportError:  # 增强版管理器未随本版本发布时，相关功能不可用
+    EnhancedCaseManager = PDFFileManager = EnhancedDirectoryManager = None
 
 # 法律卷宗管理系统主程序
 # 这是一个用于管理法律案件卷宗和PDF文件的桌面应用程序
@@ -24,6 +34,20 @@ from database_config_enhanced import EnhancedCaseManager, PDFFileManager, Enhanc
 
 class PDFChatApp:
     """主应用程序类"""
+    
+    # PDF 预加载缓存的容量上限（字节）
+    PDF_CACHE_MAX_BYTES = 512 * 1024 * 1024
+    # 保留渲染图像的最多页数（当前页附近）
+    PDF_IMAGE_WINDOW = 12
+    # 预加载页面的渲染缩放比例
+    PRELOAD_ZOOM = 1.5
+    # 当前页前后固定（不被淘汰）的页数
+    PINNED_PAGES = 3
+    # 单个文件的预加载页面最多占用缓存容量的比例，超过后不再预加载该文件的其余页面
+    PRELOAD_FILE_SHARE = 0.5
+    # 缩略图的渲染分辨率（DPI）
+    THUMBNAIL_DPI = 24
+    
     def __init__(self, root, current_user=None, session_token=None, db_manager=None):
         self.root = root
         self.root.title("律师办案智能助手")
@@ -43,21 +67,73 @@ class PDFChatApp:
         
         self.case_manager = CaseManager(self.db_manager)
         self.directory_manager = DirectoryManager(self.db_manager)
-        # 初始化增强版管理器
-        self.enhanced_case_manager = EnhancedCaseManager(self.db_manager)
-        self.pdf_file_manager = PDFFileManager(self.db_manager)
-        self.enhanced_directory_manager = EnhancedDirectoryManager(self.db_manager)
+        # 界面触发的数据库调用在后台线程中执行，结果通过 root.after 交回主线程
+        self.db_executor = DatabaseExecutor(self.root)
+        self.case_manager_async = self.db_executor.bind(self.case_manager)
+        self.directory_manager_async = self.db_executor.bind(self.directory_manager)
+        # 初始化增强版管理器（未安装时为 None）
+        self.enhanced_case_manager = EnhancedCaseManager(self.db_manager) if EnhancedCaseManager else None
+        self.pdf_file_manager = PDFFileManager(self.db_manager) if PDFFileManager else None
+        self.enhanced_directory_manager = (
+            EnhancedDirectoryManager(self.db_manager) if EnhancedDirectoryManager else None
+        )
+        self.search_index = CaseSearchIndex(self.db_manager)  # 卷宗全文检索
+        self.toc_builder = TocBuilder(self.directory_manager)  # 根据书签或页面标题自动生成目录
         self.current_case_id = None  # 当前选中的卷宗ID
+        self.syncing_cases = {}  # 正在同步全文索引的卷宗ID -> 完成后是否需要再同步一次
+        self.current_case = None  # 当前选中的卷宗信息
+        self.current_directories = []  # 当前卷宗的目录
         self.current_batch_case_id = None  # 当前批量上传的卷宗ID
         self.current_pdf_file_id = None  # 当前加载的PDF文件ID
         self.is_loading = False  # 加载状态标志
-        self.pdf_cache = {}  # PDF预加载缓存
+        self.pdf_cache = PDFCache(self.PDF_CACHE_MAX_BYTES)  # PDF预加载缓存（按字节数限制，LRU 淘汰）
         self.all_files_loaded = False  # 所有文件是否已预加载完成
+        # 每个PDF文件只打开一次，渲染、文本提取和页数读取共用同一个 PDFEngine
+        self.pdf_engines = {}
+        self.pdf_engines_lock = threading.Lock()
+        self.hashing_files = set()  # 正在后台计算内容哈希的文件
+        self.hashing_files_lock = threading.Lock()
+        # 渲染结果的磁盘缓存，重新打开卷宗时无需再次渲染；
+        # 创建时要扫描缓存目录，放到后台线程中执行，扫描完成前直接渲染
+        self._render_cache_future = self.db_executor.submit(
+            RenderCache, errback=lambda error: print(f"渲染缓存不可用: {error}")
+        )
+        # 后台预加载调度器：当前页优先，跳转时取消不再需要的任务
+        self.preload_scheduler = PreloadScheduler(
+            self.root,
+            load_page=self._preload_page,
+            on_loaded=self._on_page_preloaded,
+            get_page_count=self._get_pdf_page_count,
+            is_loaded=lambda file_path, page: (file_path, page) in self.pdf_cache,
+            has_capacity=lambda file_path: (
+                self.pdf_cache.bytes_for(file_path) < self.pdf_cache.max_bytes * self.PRELOAD_FILE_SHARE
+            )
+        )
+        
+        # 高倍缩放时的分块渲染：先显示低分辨率预览，再只渲染可见的图块
+        self.tile_renderer = TileRenderer(
+            self.root,
+            render_clip=self._render_tile,
+            on_tile=self._on_tile_rendered,
+            on_preview=self._on_preview_rendered,
+            get_page_size=lambda file_path, page: self.get_pdf_engine(file_path).page_size(page)
+        )
+        self.pdf_canvas = None  # PDF显示画布（在 create_pdf_panel 中创建）
+        self.pdf_tile_images = {}  # 画布上的图块 (x, y) -> (画布对象ID, PhotoImage)
+        self.pdf_zoom = 1.0  # 当前缩放比例
+        self.pdf_viewport = None  # 当前可见区域
         
         # 页面管理
         self.current_page = "case_list"  # 当前页面
         self.main_content_frame = None  # 主内容区域框架
         
+        # 卷宗列表分页加载状态
+        self.case_list_tree = None  # 卷宗列表控件
+        self.case_list_cursor = None  # 下一页游标
+        self.case_list_exhausted = False  # 是否已加载全部卷宗
+        self.case_list_loading = False  # 是否正在加载下一页
+        self.case_list_generation = 0  # 重新加载列表时递增，丢弃旧请求的结果
+        
         # 设置窗口关闭协议
         self.root.protocol("WM_DELETE_WINDOW", self.on_closing)
         
@@ -70,8 +146,9 @@ class PDFChatApp:
         # 初始化聊天记录和PDF文件列表
         self.chat_history = []
         self.pdf_files = []
-        # 初始化PDF图像引用列表
-        self.pdf_images = []
+        # 初始化PDF图像引用（只保留当前页附近的若干页）
+        self.pdf_images = PageImageWindow(self.PDF_IMAGE_WINDOW)
+        self.pdf_images_file = None  # pdf_images 中的图像所属的文件
     
     # 注意：这里省略了大量的方法实现
     # 完整版本包含以下主要功能方法：
@@ -85,9 +162,351 @@ class PDFChatApp:
     # - preload_all_files(): 预加载所有文件
     # - 以及其他数十个方法...
     
+    def bind_case_list(self, tree, scrollbar):
+        """绑定卷宗列表控件，滚动到底部附近时自动加载下一页"""
+        self.case_list_tree = tree
+        
+        def on_scroll(first, last):
+            scrollbar.set(first, last)
+            if float(last) >= 0.9:
+                self.load_more_cases()
+        
+        tree.configure(yscrollcommand=on_scroll)
+        self.reload_case_list()
+    
+    def reload_case_list(self):
+        """清空卷宗列表并重新加载第一页"""
+        if self.case_list_tree is None:
+            return
+        self.case_list_tree.delete(*self.case_list_tree.get_children())
+        self.case_list_cursor = None
+        self.case_list_exhausted = False
+        self.case_list_loading = False
+        self.case_list_generation += 1
+        self.load_more_cases()
+    
+    def load_more_cases(self):
+        """在后台加载卷宗列表的下一页"""
+        if (self.case_list_tree is None or self.case_list_exhausted
+                or self.case_list_loading or not self.current_user):
+            return
+        self.case_list_loading = True
+        generation = self.case_list_generation
+        self.case_manager_async.get_user_cases_page(
+            self.current_user['id'], after=self.case_list_cursor,
+            callback=lambda result: self._on_cases_loaded(generation, result)
+        )
+    
+    def _on_cases_loaded(self, generation, result):
+        """卷宗列表的一页加载完成（Tk 主线程）"""
+        if generation != self.case_list_generation:
+            return  # 列表已重新加载
+        self.case_list_loading = False
+        rows, cursor = result
+        if rows is None:
+            return
+        for case in rows:
+            self.case_list_tree.insert('', tk.END, iid=str(case['id']), values=(
+                case['case_number'] or '',
+                case['case_name'],
+                case['directory_count'],
+                case['updated_at'].strftime('%Y-%m-%d %H:%M') if case['updated_at'] else ''
+            ))
+        self.case_list_cursor = cursor
+        self.case_list_exhausted = cursor is None
+    
+    def select_case(self, case_id):
+        """切换当前卷宗（卷宗和目录数据未变化时直接从缓存读取）"""
+        if not self.current_user:
+            return None
+        case = self.case_manager.get_case_by_id(case_id, self.current_user['id'])
+        if case is None:
+            return None
+        if case_id != self.current_case_id:
+            # 切换卷宗后不再需要上一卷宗的预加载任务和已打开的文件
+            self.preload_scheduler.cancel_all()
+            self.close_pdf_engines()
+            self.sync_search_index(case_id)
+        self.current_case_id = case_id
+        self.current_case = case
+        self.current_directories = self.directory_manager.get_case_directories(case_id) or []
+        return case
+    
+    def select_case_async(self, case_id, callback=None):
+        """在后台读取卷宗和目录后切换当前卷宗，callback(case) 在 Tk 主线程中调用"""
+        if not self.current_user:
+            return None
+        user_id = self.current_user['id']
+        
+        def load():
+            case = self.case_manager.get_case_by_id(case_id, user_id)
+            if case is None:
+                return None, []
+            return case, self.directory_manager.get_case_directories(case_id) or []
+        
+        def on_loaded(result):
+            case, directories = result
+            if case is not None:
+                if case_id != self.current_case_id:
+                    self.preload_scheduler.cancel_all()
+                    self.close_pdf_engines()
+                    self.sync_search_index(case_id)
+                self.current_case_id = case_id
+                self.current_case = case
+                self.current_directories = directories
+            if callback is not None:
+                callback(case)
+        
+        return self.db_executor.submit(load, callback=on_loaded)
+    
+    def auto_build_case_directories(self, case_id, file_paths, replace=False):
+        """上传卷宗后在后台自动生成目录（完成后刷新当前卷宗的目录），并同步全文索引"""
+        self.sync_search_index(case_id)
+        
+        def build():
+            count = self.toc_builder.build_case_directories(case_id, file_paths, replace)
+            if count > 0:
+                return self.directory_manager.get_case_directories(case_id) or []
+            return None
+        
+        def on_built(directories):
+            if directories is not None and case_id == self.current_case_id:
+                self.current_directories = directories
+        
+        def on_failed(error):
+            print(f"自动生成目录失败: {error}")
+        
+        self.db_executor.submit(build, callback=on_built, errback=on_failed)
+    
+    def sync_search_index(self, case_id):
+        """在后台增量同步卷宗的全文索引（打开或上传卷宗时调用，未变化的文件直接跳过）
+        
+        同一卷宗正在同步时不重复提交，完成后再同步一次，以包含期间新增的文件。
+        """
+        if case_id in self.syncing_cases:
+            self.syncing_cases[case_id] = True
+            return
+        self.syncing_cases[case_id] = False
+        
+        def on_finished(summary):
+            if summary is None:
+                print(f"同步卷宗全文索引失败: 卷宗 {case_id}")
+            if self.syncing_cases.pop(case_id, False):
+                self.sync_search_index(case_id)
+        
+        def on_failed(error):
+            print(f"同步卷宗全文索引失败: {error}")
+            self.syncing_cases.pop(case_id, None)
+        
+        self.db_executor.submit(
+            self.search_index.sync_case, case_id,
+            callback=on_finished, errback=on_failed
+        )
+    
+    def set_current_pdf_file(self, file_key, page=0):
+        """切换当前查看的位置：只固定当前页附近的预加载页面，清空上一文件的渲染图像
+        
+        固定整个文件会使大文件的全部页面都无法淘汰，缓存失去容量限制。
+        """
+        self.pdf_cache.pin_only({
+            (file_key, p) for p in range(max(page - self.PINNED_PAGES, 0), page + self.PINNED_PAGES + 1)
+        })
+        # 同一文件内跳转时保留图像（包括屏幕上正在显示的页面），只按新位置淘汰较远的页面
+        if file_key != self.pdf_images_file:
+            self.pdf_images.clear()
+            self.pdf_images_file = file_key
+        self.pdf_images.set_current(page)
+    
+    def show_pdf_page_image(self, page_number, photo):
+        """保存当前页的渲染图像引用，超出窗口的旧页面图像会被释放"""
+        self.pdf_images.put(page_number, photo)
+        self.pdf_images.set_current(page_number)
+    
+    def schedule_preload(self, file_path, page, page_count=None, direction=1):
+        """按当前查看位置重新安排预加载（当前页、相邻页、本文件、卷宗其他文件）"""
+        other_files = [
+            f if isinstance(f, str) else f.get('file_path')
+            for f in self.pdf_files
+        ]
+        self.is_loading = True
+        self.all_files_loaded = False
+        self.set_current_pdf_file(file_path, page)
+        self.preload_scheduler.focus(
+            file_path, page, page_count, direction,
+            other_files=[f for f in other_files if f]
+        )
+    
+    def get_pdf_engine(self, file_path):
+        """获取文件的 PDFEngine，第一次使用时打开（可在预加载线程中调用）"""
+        with self.pdf_engines_lock:
+            engine = self.pdf_engines.get(file_path)
+            if engine is None:
+                engine = self.pdf_engines[file_path] = PDFEngine(file_path)
+            return engine
+    
+    def close_pdf_engines(self):
+        """关闭所有已打开的PDF文件"""
+        with self.pdf_engines_lock:
+            engines, self.pdf_engines = list(self.pdf_engines.values()), {}
+        for engine in engines:
+            engine.close()
+    
+    def _get_pdf_page_count(self, file_path):
+        """获取PDF页数（在预加载线程中执行）"""
+        return self.get_pdf_engine(file_path).page_count
+    
+    def render_page(self, file_path, page, zoom):
+        """渲染一页为 PIL 图像，优先读取磁盘缓存
+        
+        第一次打开的文件还没有内容哈希（需要读取整个文件），先直接渲染，
+        哈希在后台线程中计算，之后的渲染再使用磁盘缓存；这里可能在 Tk 主线程中调用。
+        """
+        render = lambda: self.get_pdf_engine(file_path).render(page, zoom)
+        render_cache = self.render_cache
+        if render_cache is None:
+            return render()
+        content_hash = render_cache.known_file_key(file_path)
+        if content_hash is None:
+            self._hash_file_in_background(render_cache, file_path)
+            return render()
+        return render_cache.get_or_render(file_path, page, 72 * zoom, render, content_hash)
+    
+    def _hash_file_in_background(self, render_cache, file_path):
+        """在后台线程中计算文件内容哈希（同一文件只计算一次；可在任意线程中调用）"""
+        with self.hashing_files_lock:
+            if file_path in self.hashing_files:
+                return
+            self.hashing_files.add(file_path)
+        
+        def done(future):
+            with self.hashing_files_lock:
+                self.hashing_files.discard(file_path)
+            if future.exception() is not None:
+                print(f"计算文件哈希失败 {file_path}: {future.exception()}")
+        
+        self.db_executor.submit(render_cache.file_key, file_path).add_done_callback(done)
+    
+    @property
+    def render_cache(self):
+        """磁盘渲染缓存；缓存目录还在扫描或无法使用时返回 None"""
+        future = self._render_cache_future
+        if not future.done() or future.exception() is not None:
+            return None
+        return future.result()
+    
+    def get_page_thumbnail(self, file_path, page):
+        """获取页面缩略图（PIL 图像），之前打开过的卷宗直接从磁盘缓存读取"""
+        return self.render_page(file_path, page, self.THUMBNAIL_DPI / 72)
+    
+    def _preload_page(self, file_path, page):
+        """渲染一页为 PIL 图像并写入预加载缓存（在预加载线程中执行，不能创建 Tk 对象）
+        
+        在工作线程中直接写入缓存（PDFCache 是线程安全的），
+        调度器判断文件是否超出缓存预算时不会漏算尚未交回主线程的页面。
+        """
+        image = self.render_page(file_path, page, self.PRELOAD_ZOOM)
+        self.pdf_cache[(file_path, page)] = image
+        return image
+    
+    def show_zoomed_page(self, file_path, page, zoom, viewport=None):
+        """按缩放比例显示页面的可见区域（viewport 为画布上的可见像素范围 (x0, y0, x1, y1)）
+        
+        页面尺寸由分块渲染线程读取（需要文档锁，可能要等其他线程渲染完成），不在 Tk 主线程中读取。
+        """
+        page_size = self.tile_renderer.page_size(file_path, page)
+        if viewport is None and page_size is not None:
+            viewport = (0, 0, page_size[0] * zoom, page_size[1] * zoom)
+        if zoom != self.pdf_zoom:
+            self.pdf_zoom = zoom
+            self._drop_tile_images(lambda position: True)
+        elif viewport is not None:
+            # 只保留可见区域内图块的图像引用，滚动时内存不随页面尺寸增长
+            size = self.tile_renderer.tile_size
+            self._drop_tile_images(lambda position: position != 'preview' and not (
+                position[0] < viewport[2] and position[0] + size > viewport[0]
+                and position[1] < viewport[3] and position[1] + size > viewport[1]
+            ))
+        self.pdf_viewport = viewport
+        self.tile_renderer.show(file_path, page, page_size, zoom, viewport)
+    
+    def _drop_tile_images(self, predicate):
+        for position in [p for p in self.pdf_tile_images if predicate(p)]:
+            item, _ = self.pdf_tile_images.pop(position)
+            if self.pdf_canvas is not None:
+                self.pdf_canvas.delete(item)
+    
+    def _render_tile(self, file_path, page, zoom, clip):
+        """渲染图块（在分块渲染线程中执行）；整页预览优先读取磁盘缓存"""
+        if clip is None:
+            return self.render_page(file_path, page, zoom)
+        return self.get_pdf_engine(file_path).render(page, zoom, clip)
+    
+    def _on_preview_rendered(self, file_path, page, preview_zoom, image):
+        """把低分辨率预览中的可见部分放大显示，等待清晰图块覆盖"""
+        if self.pdf_canvas is None or self.pdf_viewport is None:
+            return
+        x0, y0, x1, y1 = self.pdf_viewport
+        scale = preview_zoom / self.pdf_zoom
+        region = image.crop((int(x0 * scale), int(y0 * scale), int(x1 * scale) + 1, int(y1 * scale) + 1))
+        region = region.resize((max(int(x1 - x0), 1), max(int(y1 - y0), 1)), Image.BILINEAR)
+        self._drop_tile_images(lambda position: position == 'preview')
+        photo = ImageTk.PhotoImage(region)
+        item = self.pdf_canvas.create_image(x0, y0, image=photo, anchor='nw')
+        self.pdf_canvas.tag_lower(item)
+        self.pdf_tile_images['preview'] = (item, photo)
+    
+    def _on_tile_rendered(self, file_path, page, zoom, position, image):
+        """在画布上绘制渲染好的图块"""
+        if self.pdf_canvas is None:
+            return
+        photo = ImageTk.PhotoImage(image)
+        item = self.pdf_canvas.create_image(position[0], position[1], image=photo, anchor='nw')
+        previous = self.pdf_tile_images.pop(position, None)
+        if previous is not None:
+            self.pdf_canvas.delete(previous[0])
+        self.pdf_tile_images[position] = (item, photo)
+    
+    def _on_page_preloaded(self, file_path, page, image):
+        """预加载结果回到主线程（图像已在工作线程中写入缓存）"""
+        if self.preload_scheduler.is_idle:
+            self.is_loading = False
+            self.all_files_loaded = True
+    
+    def search_current_case(self, query, callback):
+        """在当前卷宗的全部 PDF 中检索文本（检索和摘要生成在后台线程中执行）
+        
+        完成后在 Tk 主线程中调用 callback(命中的 (文件, 页码, 摘要) 列表)；
+        检索期间切换了卷宗时丢弃结果。
+        """
+        case_id = self.current_case_id
+        if case_id is None:
+            callback([])
+            return
+        
+        def on_found(results):
+            if case_id == self.current_case_id:
+                callback(results or [])
+        
+        def on_failed(error):
+            print(f"检索卷宗失败: {error}")
+            on_found([])
+        
+        self.db_executor.submit(
+            self.search_index.search_case, case_id, query,
+            callback=on_found, errback=on_failed
+        )
+    
     def on_closing(self):
         """窗口关闭处理"""
+        self.preload_scheduler.shutdown()
+        self.tile_renderer.shutdown()
+        self.db_executor.shutdown(wait=True)
+        self.close_pdf_engines()
+        DOCUMENT_POOL.close_idle()
         if self.db_manager:
+            if self.db_manager.metrics is not None:
+                print(self.db_manager.metrics.report())
+            # close() 会先写入缓冲中的操作日志和登录时间
             self.db_manager.close()
         self.root.destroy()
 
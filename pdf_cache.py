@@ -0,0 +1,239 @@
+# PDF 缓存模块
+# PDFCache：按字节数限制的预加载缓存（LRU 淘汰，当前页附近的页面可固定不淘汰）
+# PageImageWindow：只保留当前页附近若干页的渲染图像，避免图像引用无限增长
+import sys
+import threading
+from collections import OrderedDict
+
+def estimate_size(value):
+    """估算缓存对象占用的字节数"""
+    if value is None:
+        return 0
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return len(value)
+    if isinstance(value, str):
+        return sys.getsizeof(value)
+    # fitz.Pixmap
+    if hasattr(value, 'samples') and hasattr(value, 'size') and isinstance(value.size, int):
+        return value.size
+    # PIL.Image.Image
+    if hasattr(value, 'getbands') and hasattr(value, 'size'):
+        width, height = value.size
+        return width * height * len(value.getbands())
+    # ImageTk.PhotoImage
+    if hasattr(value, 'width') and hasattr(value, 'height') and callable(value.width):
+        return value.width() * value.height() * 4
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(estimate_size(k) + estimate_size(v) for k, v in value.items())
+    if isinstance(value, (list, tuple, set, frozenset)):
+        return sys.getsizeof(value) + sum(estimate_size(item) for item in value)
+    return sys.getsizeof(value)
+
+class PDFCache:
+    """按字节数限制的 LRU 缓存，用于 PDF 预加载数据
+
+    - 总大小超过 max_bytes 时淘汰最久未使用的记录
+    - 固定（pin）的记录不会被淘汰，用于当前页附近的页面；只固定有限的几页，
+      否则大文件的全部页面都无法淘汰，缓存失去容量限制
+    - 单条记录超过 max_bytes 时不缓存；固定的记录占满容量时新记录也不缓存（put 返回 False），
+      因此每次 put 之后 total_bytes 都不超过 max_bytes
+    - 支持 cache[key]、key in cache、cache.get(key) 等字典式用法
+    """
+
+    def __init__(self, max_bytes=512 * 1024 * 1024, size_func=estimate_size):
+        self.max_bytes = max_bytes
+        self._size_func = size_func
+        self._entries = OrderedDict()  # 键 -> (值, 字节数)
+        self._pinned = set()
+        self._lock = threading.RLock()
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.rejected = 0  # 因超过容量而未缓存的记录数
+
+    def get(self, key, default=None):
+        """读取缓存并标记为最近使用"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return default
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key, value, size=None):
+        """写入缓存，size 为空时自动估算；返回是否已缓存"""
+        size = self._size_func(value) if size is None else size
+        with self._lock:
+            self._remove(key)
+            if size > self.max_bytes:
+                self.rejected += 1
+                return False
+            self._entries[key] = (value, size)
+            self.total_bytes += size
+            self._evict(keep=key)
+            if self.total_bytes > self.max_bytes:
+                # 其余记录都已固定、腾不出空间：不缓存新记录，总大小始终不超过 max_bytes
+                self._remove(key)
+                self.rejected += 1
+                return False
+            return True
+
+    def pop(self, key, default=None):
+        """删除并返回指定记录"""
+        with self._lock:
+            entry = self._entries.get(key)
+            self._remove(key)
+            self._pinned.discard(key)
+            return entry[0] if entry is not None else default
+
+    def pin(self, key):
+        """固定记录，使其不被淘汰（可在写入前调用）"""
+        with self._lock:
+            self._pinned.add(key)
+
+    def unpin(self, key):
+        """取消固定，并按容量重新淘汰"""
+        with self._lock:
+            self._pinned.discard(key)
+            self._evict()
+
+    def pin_only(self, keys):
+        """只固定指定的记录（一个键或键的集合，如当前页附近的 {(path, 页码), ...}），其余记录取消固定"""
+        with self._lock:
+            if keys is None:
+                self._pinned = set()
+            elif isinstance(keys, (set, frozenset, list)):
+                self._pinned = set(keys)
+            else:
+                self._pinned = {keys}
+            self._evict()
+
+    def bytes_for(self, prefix):
+        """键的第一个元素为 prefix 的记录（如某个文件的全部页面）占用的字节数"""
+        with self._lock:
+            return sum(
+                size for key, (_, size) in self._entries.items()
+                if isinstance(key, tuple) and key and key[0] == prefix
+            )
+
+    def clear(self):
+        """清空缓存（固定状态也一并清除）"""
+        with self._lock:
+            self._entries.clear()
+            self._pinned.clear()
+            self.total_bytes = 0
+
+    def stats(self):
+        """缓存统计信息"""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'total_bytes': self.total_bytes,
+                'max_bytes': self.max_bytes,
+                'pinned': sum(1 for key in self._entries if key in self._pinned),
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'rejected': self.rejected,
+                'hit_rate': self.hits / total if total else 0.0
+            }
+
+    def _remove(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self.total_bytes -= entry[1]
+
+    def _evict(self, keep=None):
+        """从最久未使用的记录开始淘汰，跳过固定的记录和 keep（正在写入的记录）"""
+        if self.total_bytes <= self.max_bytes:
+            return
+        for key in list(self._entries):
+            if self.total_bytes <= self.max_bytes:
+                break
+            if key in self._pinned or key == keep:
+                continue
+            self._remove(key)
+            self.evictions += 1
+
+    def __getitem__(self, key):
+        with self._lock:
+            if key not in self._entries:
+                self.misses += 1
+                raise KeyError(key)
+            return self.get(key)
+
+    def __setitem__(self, key, value):
+        self.put(key, value)
+
+    def __delitem__(self, key):
+        if self.pop(key, _MISSING) is _MISSING:
+            raise KeyError(key)
+
+    def __contains__(self, key):
+        with self._lock:
+            return key in self._entries
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
+
+_MISSING = object()
+
+class PageImageWindow:
+    """只保留当前页附近页面渲染图像的容器
+
+    Tk 显示的图像必须保留引用，但每页都保留会让内存随翻页无限增长。
+    超过 max_images 张时，优先淘汰离当前页最远的图像。
+    """
+
+    def __init__(self, max_images=12):
+        self.max_images = max_images
+        self.current_page = None
+        self._images = OrderedDict()  # 页码 -> 图像
+
+    def set_current(self, page):
+        """设置当前页并淘汰多余的图像"""
+        self.current_page = page
+        self._evict()
+
+    def put(self, page, image):
+        """保存某一页的渲染图像"""
+        self._images[page] = image
+        self._images.move_to_end(page)
+        self._evict()
+
+    def get(self, page):
+        """读取某一页的渲染图像，不存在时返回 None"""
+        return self._images.get(page)
+
+    def append(self, image):
+        """兼容列表用法：按加入顺序保存，最早加入的图像最先淘汰"""
+        self.put(('appended', id(image)), image)
+
+    def clear(self):
+        """清空全部图像"""
+        self._images.clear()
+
+    def _distance(self, page):
+        if self.current_page is None or not isinstance(page, int):
+            return float('inf')
+        return abs(page - self.current_page)
+
+    def _evict(self):
+        while len(self._images) > self.max_images:
+            # max 在距离相同时返回最早加入的页
+            farthest = max(self._images, key=self._distance)
+            del self._images[farthest]
+
+    def __contains__(self, page):
+        return page in self._images
+
+    def __len__(self):
+        return len(self._images)
+
+    def __iter__(self):
+        return iter(self._images.values())
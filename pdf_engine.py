@@ -0,0 +1,301 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+PDF 引擎模块
+
+PDFEngine 统一封装 PyMuPDF、pdfplumber、PyPDF2 三个库：每个文件只打开一次（见 pdf_handles），
+文本提取、表格提取、渲染和元数据读取共用同一个文档句柄，
+每种操作交给基准测试中最快的库执行（ROUTES），未安装的库自动跳过。
+
+基准测试：
+    python pdf_engine.py 文件.pdf [--pages 5] [--repeat 3] [--json 结果.json]
+"""
+
+import argparse
+import importlib.util
+import json
+import sys
+import threading
+import time
+
+from pdf_handles import DOCUMENT_POOL, DocumentPool, MappedFile
+from pdf_stream import render_page
+
+# 引擎支持的操作
+OPERATIONS = ('metadata', 'page_size', 'text', 'words', 'tables', 'render')
+
+class PyMuPDFBackend:
+    """PyMuPDF 后端（支持全部操作），使用句柄池中共享的文档"""
+
+    name = 'pymupdf'
+    operations = OPERATIONS
+
+    def __init__(self, file_path, pool=None):
+        self.pool = pool or DOCUMENT_POOL
+        self.handle = self.pool.acquire(file_path)
+
+    @property
+    def page_count(self):
+        with self.handle.lock:
+            return self.handle.doc.page_count
+
+    def metadata(self):
+        with self.handle.lock:
+            return {key: value for key, value in (self.handle.doc.metadata or {}).items() if value}
+
+    def page_size(self, index):
+        with self.handle.lock:
+            rect = self.handle.doc.load_page(index).rect
+            return rect.width, rect.height
+
+    def text(self, index):
+        with self.handle.lock:
+            return self.handle.doc.load_page(index).get_text("text").replace('\x00', '')
+
+    def words(self, index):
+        with self.handle.lock:
+            return [tuple(word[:5]) for word in self.handle.doc.load_page(index).get_text("words")]
+
+    def tables(self, index):
+        with self.handle.lock:
+            return [table.extract() for table in self.handle.doc.load_page(index).find_tables()]
+
+    def render(self, index, zoom=1.0, clip=None):
+        with self.handle.lock:
+            return render_page(self.handle.doc.load_page(index), zoom, clip)
+
+    def close(self):
+        self.pool.release(self.handle)
+
+class PdfplumberBackend:
+    """pdfplumber 后端（表格识别较准确，但解析速度慢）"""
+
+    name = 'pdfplumber'
+    operations = OPERATIONS
+
+    def __init__(self, file_path, pool=None):
+        import pdfplumber  # 导入较慢，第一次使用时才导入
+        self._mapped = MappedFile(file_path)
+        self.pdf = pdfplumber.open(self._mapped)
+
+    @property
+    def page_count(self):
+        return len(self.pdf.pages)
+
+    def metadata(self):
+        return {key.lstrip('/'): value for key, value in (self.pdf.metadata or {}).items() if value}
+
+    def text(self, index):
+        return self._with_page(index, lambda page: page.extract_text() or '')
+
+    def words(self, index):
+        return self._with_page(index, lambda page: [
+            (word['x0'], word['top'], word['x1'], word['bottom'], word['text'])
+            for word in page.extract_words()
+        ])
+
+    def tables(self, index):
+        return self._with_page(index, lambda page: page.extract_tables())
+
+    def page_size(self, index):
+        return self._with_page(index, lambda page: (page.width, page.height))
+
+    def render(self, index, zoom=1.0, clip=None):
+        return self._with_page(index, lambda page: (
+            page.crop(clip) if clip else page
+        ).to_image(resolution=72 * zoom).original.convert("RGB"))
+
+    def _with_page(self, index, func):
+        page = self.pdf.pages[index]
+        try:
+            return func(page)
+        finally:
+            # pdfplumber 会缓存已解析的页面对象，用完即释放，避免内存随页数增长
+            page.flush_cache()
+
+    def close(self):
+        self.pdf.close()
+        self._mapped.close()
+
+class PyPDF2Backend:
+    """PyPDF2 后端（纯 Python，只支持元数据和文本）"""
+
+    name = 'pypdf2'
+    operations = ('metadata', 'text')
+
+    def __init__(self, file_path, pool=None):
+        import PyPDF2
+        self._mapped = MappedFile(file_path)
+        self.reader = PyPDF2.PdfReader(self._mapped)
+
+    @property
+    def page_count(self):
+        return len(self.reader.pages)
+
+    def metadata(self):
+        return {key.lstrip('/'): str(value) for key, value in (self.reader.metadata or {}).items() if value}
+
+    def text(self, index):
+        return self.reader.pages[index].extract_text() or ''
+
+    def close(self):
+        self._mapped.close()
+
+# 已安装的后端，按优先级排列（pdfplumber、PyPDF2 为可选依赖，只检查是否安装，不在此处导入）
+BACKENDS = {'pymupdf': PyMuPDFBackend}
+if importlib.util.find_spec('pdfplumber') is not None:
+    BACKENDS['pdfplumber'] = PdfplumberBackend
+if importlib.util.find_spec('PyPDF2') is not None:
+    BACKENDS['pypdf2'] = PyPDF2Backend
+
+# 各操作使用的后端（依据 benchmark() 的结果）：
+# PyMuPDF 打开文件、渲染和单词提取都快数倍，表格提取与 pdfplumber 相当；
+# PyPDF2 在纯文本页面上提取略快，但再打开一个库的开销（解析 + 内存）远大于节省的时间，
+# 因此全部操作默认共用 PyMuPDF 的文档句柄。可以通过 PDFEngine(routes=...) 覆盖。
+ROUTES = {
+    'page_count': 'pymupdf',
+    'page_size': 'pymupdf',
+    'metadata': 'pymupdf',
+    'text': 'pymupdf',
+    'words': 'pymupdf',
+    'tables': 'pymupdf',
+    'render': 'pymupdf',
+}
+
+class PDFEngine:
+    """单个 PDF 文件的统一访问入口
+
+    后端在第一次使用时打开并一直复用，直到 close()；
+    PyMuPDF 文档来自句柄池（pool），同一文件的多个 PDFEngine 共用一个句柄；
+    pdfplumber / PyPDF2 通过内存映射读取文件。
+    所有操作通过同一把锁串行执行，可以在预加载线程和界面线程之间共享。
+    页码从 0 开始。
+    """
+
+    def __init__(self, file_path, routes=None, pool=None):
+        self.file_path = file_path
+        self.routes = dict(ROUTES, **(routes or {}))
+        self.pool = pool or DOCUMENT_POOL
+        self._backends = {}
+        self._lock = threading.RLock()
+        self._closed = False
+
+    @property
+    def page_count(self):
+        with self._lock:
+            return self._backend_for('page_count').page_count
+
+    def metadata(self):
+        """文档元数据（标题、作者、创建时间等），只返回非空项"""
+        return self._call('metadata')
+
+    def extract_text(self, index):
+        """提取一页的文本"""
+        return self._call('text', index)
+
+    def extract_words(self, index):
+        """提取一页的单词及坐标 [(x0, y0, x1, y1, 单词), ...]"""
+        return self._call('words', index)
+
+    def extract_tables(self, index):
+        """提取一页中的表格，每个表格为行的列表"""
+        return self._call('tables', index)
+
+    def page_size(self, index):
+        """页面尺寸 (宽, 高)，单位为 PDF 点"""
+        return self._call('page_size', index)
+
+    def render(self, index, zoom=1.0, clip=None):
+        """把一页渲染为 PIL 图像，clip 为 (x0, y0, x1, y1) 时只渲染该区域"""
+        return self._call('render', index, zoom, clip)
+
+    def close(self):
+        """关闭所有已打开的后端"""
+        with self._lock:
+            self._closed = True
+            for backend in self._backends.values():
+                backend.close()
+            self._backends.clear()
+
+    def _call(self, operation, *args):
+        with self._lock:
+            return getattr(self._backend_for(operation), operation)(*args)
+
+    def _backend_for(self, operation):
+        """按路由表选择后端；路由指定的库未安装或不支持该操作时使用 PyMuPDF"""
+        if self._closed:
+            raise ValueError(f"PDF 已关闭: {self.file_path}")
+        name = self.routes.get(operation, 'pymupdf')
+        backend_class = BACKENDS.get(name)
+        if backend_class is None or (operation != 'page_count' and operation not in backend_class.operations):
+            name, backend_class = 'pymupdf', PyMuPDFBackend
+        backend = self._backends.get(name)
+        if backend is None:
+            backend = self._backends[name] = backend_class(self.file_path, self.pool)
+        return backend
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+        return False
+
+def benchmark(file_path, pages=5, repeat=3):
+    """对每个已安装的后端测量各项操作的平均耗时（秒/页）
+
+    返回 {操作: {后端: 耗时}}；打开文件的耗时记为 'open'。
+    """
+    results = {'open': {}}
+    # 不保留空闲句柄的独立句柄池，每次打开都真实解析文件
+    pool = DocumentPool(max_idle=0)
+    for name, backend_class in BACKENDS.items():
+        start = time.perf_counter()
+        for _ in range(repeat):
+            backend_class(file_path, pool).close()
+        results['open'][name] = (time.perf_counter() - start) / repeat
+
+        backend = backend_class(file_path, pool)
+        try:
+            page_indexes = range(min(pages, backend.page_count))
+            for operation in backend_class.operations:
+                calls = [(index,) for index in page_indexes] if operation != 'metadata' else [()]
+                start = time.perf_counter()
+                for _ in range(repeat):
+                    for args in calls:
+                        getattr(backend, operation)(*args)
+                elapsed = (time.perf_counter() - start) / (repeat * max(len(calls), 1))
+                results.setdefault(operation, {})[name] = elapsed
+        finally:
+            backend.close()
+    return results
+
+def fastest_routes(results):
+    """根据基准测试结果生成路由表：每项操作选择耗时最短的后端（不计打开文件的开销）"""
+    return {
+        operation: min(timings, key=timings.get)
+        for operation, timings in results.items() if operation != 'open'
+    }
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="PDF 后端基准测试")
+    parser.add_argument('file', help="用于测试的 PDF 文件")
+    parser.add_argument('--pages', type=int, default=5, help="每项操作测试的页数")
+    parser.add_argument('--repeat', type=int, default=3, help="重复次数")
+    parser.add_argument('--json', help="把结果写入 JSON 文件")
+    args = parser.parse_args(argv)
+
+    results = benchmark(args.file, args.pages, args.repeat)
+    for operation, timings in results.items():
+        line = "  ".join(f"{name}: {seconds * 1000:.2f}ms" for name, seconds in sorted(timings.items(), key=lambda x: x[1]))
+        print(f"{operation:<8} {line}")
+    routes = fastest_routes(results)
+    print(f"推荐路由: {routes}")
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump({'file': args.file, 'results': results, 'routes': routes}, f, ensure_ascii=False, indent=2)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
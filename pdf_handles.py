@@ -0,0 +1,189 @@
+# PDF 文档句柄模块
+# DocumentPool：同一个文件在进程内只打开一个 fitz.Document，由查看器、预加载和文本提取共用，
+# 每个句柄带一把锁（PyMuPDF 的文档对象不能被多个线程同时使用）。
+# MappedFile：以内存映射方式打开文件，供 PyPDF2 / pdfplumber 按需读取，不把整个文件读入内存。
+# （PyMuPDF 的 stream 参数只接受 bytes，会复制整个文件，因此 fitz 文档始终按文件名打开。）
+import io
+import mmap
+import os
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+import fitz  # PyMuPDF
+
+class SharedDocument:
+    """共享的 fitz.Document 句柄，使用文档前必须持有 lock"""
+
+    def __init__(self, file_path, key):
+        self.file_path = file_path
+        self.key = key
+        # 按文件名打开时 MuPDF 按需读取文件内容，不会把整个文件复制到内存
+        self.doc = fitz.open(file_path)
+        self.lock = threading.RLock()
+        self.refs = 0
+
+    def close(self):
+        with self.lock:
+            if not self.doc.is_closed:
+                self.doc.close()
+
+class DocumentPool:
+    """进程内共享的 PDF 文档句柄池
+
+    - acquire() 返回同一文件的同一个句柄，release() 后句柄保持打开，供之后的使用者直接复用
+    - 未被使用的句柄最多保留 max_idle 个，超出时关闭最久未使用的句柄
+    - 文件大小或修改时间变化后重新打开，旧句柄在最后一个使用者释放后关闭
+    """
+
+    def __init__(self, max_idle=8):
+        self.max_idle = max_idle
+        self._handles = {}  # 文件键 -> 使用中的或空闲的句柄
+        self._idle = OrderedDict()  # 空闲句柄，按最近使用排序
+        self._lock = threading.Lock()
+        self.opens = 0
+        self.reuses = 0
+
+    def acquire(self, file_path):
+        """获取文件的共享句柄（引用计数加一）"""
+        path = os.path.abspath(file_path)
+        stat = os.stat(path)
+        key = (path, stat.st_size, stat.st_mtime)
+        with self._lock:
+            handle = self._handles.get(key)
+            if handle is not None:
+                self._idle.pop(key, None)
+                handle.refs += 1
+                self.reuses += 1
+                return handle
+
+        # 打开文件不持有池的锁，避免大文件阻塞其他文件的获取
+        handle = SharedDocument(path, key)
+        with self._lock:
+            existing = self._handles.get(key)
+            if existing is not None:
+                # 另一个线程同时打开了同一个文件
+                self._idle.pop(key, None)
+                existing.refs += 1
+                self.reuses += 1
+                duplicate, handle = handle, existing
+            else:
+                self._handles[key] = handle
+                handle.refs += 1
+                self.opens += 1
+                duplicate = None
+            stale = self._stale_handles(path, key)
+        if duplicate is not None:
+            duplicate.close()
+        for old in stale:
+            old.close()
+        return handle
+
+    def release(self, handle):
+        """释放句柄（引用计数减一），空闲句柄超出上限时关闭最久未使用的"""
+        to_close = []
+        with self._lock:
+            handle.refs -= 1
+            if handle.refs > 0:
+                return
+            if self._handles.get(handle.key) is not handle:
+                # 文件已变化，旧句柄不再复用
+                to_close.append(handle)
+            else:
+                self._idle[handle.key] = handle
+                while len(self._idle) > self.max_idle:
+                    key, victim = self._idle.popitem(last=False)
+                    del self._handles[key]
+                    to_close.append(victim)
+        for victim in to_close:
+            victim.close()
+
+    @contextmanager
+    def document(self, file_path):
+        """在持有句柄锁的情况下使用文档：with pool.document(path) as doc: ..."""
+        handle = self.acquire(file_path)
+        try:
+            with handle.lock:
+                yield handle.doc
+        finally:
+            self.release(handle)
+
+    def close_idle(self):
+        """关闭全部空闲句柄，并释放 MuPDF 的对象缓存"""
+        with self._lock:
+            victims = list(self._idle.values())
+            for key in self._idle:
+                del self._handles[key]
+            self._idle.clear()
+        for victim in victims:
+            victim.close()
+        fitz.TOOLS.store_shrink(100)
+
+    def stats(self):
+        """句柄池统计信息"""
+        with self._lock:
+            return {
+                'open_handles': len(self._handles),
+                'idle_handles': len(self._idle),
+                'opens': self.opens,
+                'reuses': self.reuses
+            }
+
+    def _stale_handles(self, path, key):
+        """移除同一路径、已过期的空闲句柄（调用方需持有锁）"""
+        stale = []
+        for other_key in [k for k in self._handles if k[0] == path and k != key]:
+            handle = self._handles[other_key]
+            if handle.refs == 0:
+                self._idle.pop(other_key, None)
+                stale.append(handle)
+            del self._handles[other_key]
+        return stale
+
+# 进程内默认的句柄池
+DOCUMENT_POOL = DocumentPool()
+
+class MappedFile(io.RawIOBase):
+    """以只读内存映射方式打开的文件对象，可直接传给 PyPDF2 / pdfplumber
+
+    只有实际读取到的部分才会载入内存，并且由操作系统的页缓存在多个使用者之间共享。
+    """
+
+    def __init__(self, file_path):
+        super().__init__()
+        self._file = open(file_path, 'rb')
+        try:
+            self.buffer = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            # 空文件无法映射
+            self._file.close()
+            raise
+        self._position = 0
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def readinto(self, target):
+        data = self.buffer[self._position:self._position + len(target)]
+        target[:len(data)] = data
+        self._position += len(data)
+        return len(data)
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        if whence == io.SEEK_CUR:
+            offset += self._position
+        elif whence == io.SEEK_END:
+            offset += len(self.buffer)
+        self._position = max(offset, 0)
+        return self._position
+
+    def tell(self):
+        return self._position
+
+    def close(self):
+        if not self.closed:
+            self.buffer.close()
+            self._file.close()
+        super().close()
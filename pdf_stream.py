@@ -0,0 +1,94 @@
+# PDF 流式读取模块
+# 按页惰性产出文本、带坐标的单词和渲染图像：每次只加载当前一页，
+# 内存占用与文档长度无关，第一页无需等待整个文档解析完成即可显示。
+import fitz  # PyMuPDF
+from PIL import Image
+
+class PDFStream:
+    """逐页读取 PDF 的流式文档
+
+    用法：
+        with PDFStream(file_path) as stream:
+            for page_index, text in stream.iter_text():
+                ...
+
+    页码均从 0 开始；start/end 表示 [start, end) 区间，end 为空时读到最后一页。
+    文档关闭后，尚未结束的生成器会直接停止。
+    """
+
+    def __init__(self, file_path):
+        self.file_path = file_path
+        self._doc = None
+
+    def open(self):
+        """打开文档（只读取交叉引用表，不解析页面内容）"""
+        if self._doc is None:
+            self._doc = fitz.open(self.file_path)
+        return self
+
+    def close(self):
+        """关闭文档，释放文件句柄和已解析的对象"""
+        if self._doc is not None:
+            self._doc.close()
+            self._doc = None
+
+    @property
+    def closed(self):
+        return self._doc is None
+
+    @property
+    def page_count(self):
+        return self.open()._doc.page_count
+
+    def pages(self, start=0, end=None):
+        """逐页产出 (页码, fitz.Page)；页面对象只在本次迭代内有效"""
+        self.open()
+        end = self.page_count if end is None else min(end, self.page_count)
+        for index in range(max(start, 0), end):
+            if self._doc is None:
+                return
+            page = self._doc.load_page(index)
+            yield index, page
+            # 不保留页面引用，下一页加载前即可回收
+            del page
+
+    def iter_text(self, start=0, end=None):
+        """逐页产出 (页码, 文本)"""
+        for index, page in self.pages(start, end):
+            yield index, page.get_text("text").replace('\x00', '')
+
+    def iter_words(self, start=0, end=None):
+        """逐页产出 (页码, [(x0, y0, x1, y1, 单词), ...])，坐标单位为 PDF 点"""
+        for index, page in self.pages(start, end):
+            yield index, [tuple(word[:5]) for word in page.get_text("words")]
+
+    def iter_images(self, start=0, end=None, zoom=1.0):
+        """逐页产出 (页码, PIL 图像)"""
+        for index, page in self.pages(start, end):
+            yield index, render_page(page, zoom)
+
+    def render(self, index, zoom=1.0):
+        """渲染单独一页为 PIL 图像"""
+        self.open()
+        return render_page(self._doc.load_page(index), zoom)
+
+    def __iter__(self):
+        return self.iter_text()
+
+    def __len__(self):
+        return self.page_count
+
+    def __enter__(self):
+        return self.open()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+        return False
+
+def render_page(page, zoom=1.0, clip=None):
+    """把 fitz.Page 渲染为 RGB 格式的 PIL 图像
+
+    clip 为 (x0, y0, x1, y1)（PDF 点坐标）时只渲染该区域，内存占用与区域大小成正比。
+    """
+    pix = page.get_pixmap(matrix=fitz.Matrix(zoom, zoom), clip=fitz.Rect(clip) if clip else None, alpha=False)
+    return Image.frombytes("RGB", (pix.width, pix.height), pix.samples)
@@ -0,0 +1,191 @@
+# PDF 预加载调度模块
+# 在线程池中按优先级预加载页面：当前页 > 阅读方向上的相邻页 > 当前文件其余页 > 卷宗中的其他文件。
+# 跳转页面时丢弃已不需要的任务，加载结果通过 root.after 交回 Tk 主线程。
+import heapq
+import itertools
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+class PreloadScheduler:
+    """带优先级的后台页面预加载调度器
+
+    load_page(file_key, page) 在工作线程中执行，返回加载结果（不能创建 Tk 对象）；
+    on_loaded(file_key, page, result) 在 Tk 主线程中执行；
+    get_page_count(file_key) 在工作线程中执行，用于展开未知页数的文件；
+    is_loaded(file_key, page) 可选，已加载的页面不再重复调度；
+    has_capacity(file_key) 可选，返回 False 时（如该文件已占满缓存的预算）
+    不再加载该文件的后续页面（当前页和相邻页除外），丢弃其排队中的任务。
+    focus() 等公开方法只能在 Tk 主线程中调用。
+    """
+
+    PRIORITY_CURRENT_PAGE = 0
+    PRIORITY_NEIGHBOR = 1
+    PRIORITY_CURRENT_FILE = 2
+    PRIORITY_OTHER_FILES = 3
+
+    # 结果轮询间隔（毫秒）
+    POLL_INTERVAL = 30
+
+    def __init__(self, root, load_page, on_loaded, get_page_count,
+                 is_loaded=None, has_capacity=None, max_workers=2, neighbor_pages=3):
+        self.root = root
+        self._load_page = load_page
+        self._on_loaded = on_loaded
+        self._get_page_count = get_page_count
+        self._is_loaded = is_loaded or (lambda file_key, page: False)
+        self._has_capacity = has_capacity or (lambda file_key: True)
+        self.max_workers = max_workers
+        self.neighbor_pages = neighbor_pages
+
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="PreloadWorker")
+        self._heap = []  # (优先级, 序号, 代次, 任务类型, 文件, 页码)
+        self._sequence = itertools.count()
+        self._lock = threading.Lock()
+        self._generation = 0
+        self._active_workers = 0
+        self._results = queue.Queue()
+        self._polling = False
+        self._closed = False
+
+    @property
+    def is_idle(self):
+        """是否没有排队或进行中的任务"""
+        with self._lock:
+            return not self._heap and self._active_workers == 0
+
+    def focus(self, file_key, page, page_count=None, direction=1, other_files=()):
+        """跳转到某一页：取消旧任务，按新位置重新排列预加载顺序
+
+        page 从 0 开始；direction 为 1 表示向后阅读，-1 表示向前阅读；
+        other_files 为卷宗中其他需要预加载的文件。
+        """
+        with self._lock:
+            if self._closed:
+                return
+            self._generation += 1
+            self._heap = []
+            generation = self._generation
+
+            self._push(self.PRIORITY_CURRENT_PAGE, generation, 'page', file_key, page)
+            if page_count is None:
+                self._push(self.PRIORITY_CURRENT_FILE, generation, 'expand', file_key, (page, direction))
+            else:
+                self._push_file_pages(generation, file_key, page, page_count, direction)
+            for other in other_files:
+                if other != file_key:
+                    self._push(self.PRIORITY_OTHER_FILES, generation, 'expand', other, None)
+
+        self._start_workers()
+        self._ensure_polling()
+
+    def cancel_all(self):
+        """取消所有排队中的任务（进行中的页面加载完成后结果仍会交付）"""
+        with self._lock:
+            self._generation += 1
+            self._heap = []
+
+    def shutdown(self):
+        """停止调度并等待工作线程退出"""
+        with self._lock:
+            self._closed = True
+            self._heap = []
+        self._executor.shutdown(wait=True)
+
+    def _push(self, priority, generation, kind, file_key, page):
+        heapq.heappush(self._heap, (priority, next(self._sequence), generation, kind, file_key, page))
+
+    def _push_file_pages(self, generation, file_key, page, page_count, direction):
+        """当前文件：先排阅读方向上的相邻页，再排反方向的相邻页，最后排其余页"""
+        step = 1 if direction >= 0 else -1
+        scheduled = {page}
+        neighbors = [page + step * i for i in range(1, self.neighbor_pages + 1)]
+        neighbors += [page - step * i for i in range(1, self.neighbor_pages // 2 + 1)]
+        for neighbor in neighbors:
+            if 0 <= neighbor < page_count and neighbor not in scheduled:
+                scheduled.add(neighbor)
+                self._push(self.PRIORITY_NEIGHBOR, generation, 'page', file_key, neighbor)
+
+        # 其余页面按离当前页的距离排序，阅读方向优先
+        rest = sorted(
+            (p for p in range(page_count) if p not in scheduled),
+            key=lambda p: (abs(p - page), (p - page) * step < 0)
+        )
+        for other in rest:
+            self._push(self.PRIORITY_CURRENT_FILE, generation, 'page', file_key, other)
+
+    def _start_workers(self):
+        """按需启动工作线程，每个工作线程持续取出优先级最高的任务"""
+        with self._lock:
+            needed = min(self.max_workers - self._active_workers, len(self._heap))
+            self._active_workers += max(needed, 0)
+        for _ in range(max(needed, 0)):
+            self._executor.submit(self._worker)
+
+    def _worker(self):
+        while True:
+            with self._lock:
+                if self._closed or not self._heap:
+                    self._active_workers -= 1
+                    return
+                priority, _, generation, kind, file_key, page = heapq.heappop(self._heap)
+
+            try:
+                if kind == 'expand':
+                    self._expand(generation, priority, file_key, page)
+                    self._start_workers()
+                elif not self._is_loaded(file_key, page):
+                    if priority >= self.PRIORITY_CURRENT_FILE and not self._has_capacity(file_key):
+                        self._drop_file(generation, file_key)
+                        continue
+                    result = self._load_page(file_key, page)
+                    self._results.put((file_key, page, result))
+            except Exception as e:
+                print(f"预加载失败 {file_key} 第 {page} 页: {e}")
+
+    def _drop_file(self, generation, file_key):
+        """丢弃某个文件排队中的低优先级任务（当前页和相邻页保留）"""
+        with self._lock:
+            if generation != self._generation:
+                return
+            self._heap = [
+                item for item in self._heap
+                if item[4] != file_key or item[0] < self.PRIORITY_CURRENT_FILE
+            ]
+            heapq.heapify(self._heap)
+
+    def _expand(self, generation, priority, file_key, position):
+        """获取文件页数后把其全部页面加入队列（同一代次内）"""
+        page_count = self._get_page_count(file_key)
+        with self._lock:
+            if generation != self._generation:
+                return
+            if priority == self.PRIORITY_CURRENT_FILE:
+                page, direction = position
+                self._push_file_pages(generation, file_key, page, page_count, direction)
+            else:
+                for other in range(page_count):
+                    self._push(self.PRIORITY_OTHER_FILES, generation, 'page', file_key, other)
+
+    def _ensure_polling(self):
+        if not self._polling:
+            self._polling = True
+            self.root.after(self.POLL_INTERVAL, self._poll)
+
+    def _poll(self):
+        """在 Tk 主线程中交付加载结果"""
+        while True:
+            try:
+                file_key, page, result = self._results.get_nowait()
+            except queue.Empty:
+                break
+            try:
+                self._on_loaded(file_key, page, result)
+            except Exception as e:
+                # 回调出错不能中断轮询，否则之后的预加载结果都不再交付
+                print(f"预加载回调执行失败 {file_key} 第 {page} 页: {e}")
+
+        if self._closed or (self.is_idle and self._results.empty()):
+            self._polling = False
+        else:
+            self.root.after(self.POLL_INTERVAL, self._poll)
@@ -0,0 +1,104 @@
+# 查询结果缓存模块
+# 为卷宗、目录等读多写少的查询提供进程内缓存，写操作通过管理类显式失效。
+import threading
+import time
+from collections import OrderedDict
+
+class LRUCache:
+    """线程安全的 LRU + TTL 缓存
+
+    - 最多保存 max_entries 条记录，超出时淘汰最久未使用的记录
+    - 记录超过 ttl 秒后视为过期（防止其他客户端的修改长期不可见）
+    - 不缓存 None，get() 返回 None 即表示未命中
+    - 每次失效都会增加相关键的代次：查询前用 generation(key) 记下代次，
+      put(..., generation=...) 时代次已变化（查询期间有写操作失效了该键）就不写入，
+      避免查询开始早于写操作的读取方把旧数据放回缓存
+    """
+
+    def __init__(self, max_entries=512, ttl=120):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()  # 键 -> (过期时间, 值)
+        self._generations = {}  # 键或键前缀 -> 失效次数
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key):
+        """读取缓存，未命中或已过期时返回 None"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires_at, value = entry
+                if expires_at > time.monotonic():
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._entries[key]
+            self.misses += 1
+            return None
+
+    def generation(self, key):
+        """返回键当前的代次，在查询数据库之前调用"""
+        with self._lock:
+            return self._generation(key)
+
+    def put(self, key, value, ttl=None, generation=None):
+        """写入缓存（None 不缓存），ttl 可为单条记录指定更短的有效期
+
+        generation 为查询前 generation(key) 的返回值；其后该键被失效过时不写入，返回 False。
+        """
+        if value is None:
+            return False
+        ttl = self.ttl if ttl is None else min(ttl, self.ttl)
+        with self._lock:
+            if generation is not None and generation != self._generation(key):
+                return False
+            self._entries[key] = (time.monotonic() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+            return True
+
+    def invalidate(self, key):
+        """删除指定键"""
+        with self._lock:
+            self._entries.pop(key, None)
+            self._bump(key if isinstance(key, tuple) else (key,))
+
+    def invalidate_prefix(self, *prefix):
+        """删除以 prefix 开头的所有元组键，如 invalidate_prefix('case', 3)"""
+        size = len(prefix)
+        with self._lock:
+            for key in [key for key in self._entries if key[:size] == prefix]:
+                del self._entries[key]
+            self._bump(prefix)
+
+    def clear(self):
+        """清空缓存"""
+        with self._lock:
+            self._entries.clear()
+            self._bump(())
+
+    def stats(self):
+        """命中统计"""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'size': len(self._entries),
+                'max_entries': self.max_entries,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': self.hits / total if total else 0.0
+            }
+
+    def _generation(self, key):
+        # 键的代次由键本身及其所有前缀的失效次数组成，invalidate_prefix 和 clear 也会使其变化
+        key = key if isinstance(key, tuple) else (key,)
+        return tuple(self._generations.get(key[:size], 0) for size in range(len(key) + 1))
+
+    def _bump(self, prefix):
+        self._generations[prefix] = self._generations.get(prefix, 0) + 1
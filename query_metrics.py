@@ -0,0 +1,166 @@
+# 查询统计模块
+# 按归一化后的语句统计执行次数、耗时分布、返回/影响行数和错误次数，
+# 超过阈值的慢查询写入日志（logging，记录器名 lawyer_assistant.slow_query），
+# 并记录每条语句的调用方，便于定位是哪个界面产生了数据库负载。
+import logging
+import os
+import re
+import sys
+import threading
+from functools import lru_cache
+
+slow_query_logger = logging.getLogger('lawyer_assistant.slow_query')
+
+# 耗时直方图的桶上限（毫秒），最后一个桶收集更慢的语句
+HISTOGRAM_BOUNDS_MS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000)
+
+_STRING_LITERAL = re.compile(r"'(?:[^'\\]|\\.|'')*'")
+_NUMBER_LITERAL = re.compile(r"\b\d+(?:\.\d+)?\b")
+_IN_LIST = re.compile(r"\bIN\s*\(\s*(?:%s|\?)(?:\s*,\s*(?:%s|\?))*\s*\)", re.IGNORECASE)
+_VALUES_LIST = re.compile(r"\bVALUES\s*(\([^()]*\))(?:\s*,\s*\([^()]*\))+", re.IGNORECASE)
+_CASE_LIST = re.compile(r"(\bWHEN\s+%s\s+THEN\s+%s)(?:\s+WHEN\s+%s\s+THEN\s+%s)+", re.IGNORECASE)
+_WHITESPACE = re.compile(r"\s+")
+
+@lru_cache(maxsize=1024)
+def normalize_statement(query):
+    """把语句归一化为统计键：合并空白，字面量替换为 ?，
+    IN 列表、多行 VALUES、批量 CASE 分支折叠为一项，使不同批量大小的同类语句归为一类
+    """
+    statement = _WHITESPACE.sub(' ', query).strip()
+    statement = _STRING_LITERAL.sub('?', statement)
+    statement = _NUMBER_LITERAL.sub('?', statement)
+    statement = _IN_LIST.sub('IN (...)', statement)
+    statement = _VALUES_LIST.sub(r'VALUES \1, ...', statement)
+    statement = _CASE_LIST.sub(r'\1 ...', statement)
+    return statement
+
+class StatementStats:
+    """单条归一化语句的统计数据"""
+
+    __slots__ = ('count', 'errors', 'rows', 'total_time', 'max_time', 'histogram', 'callers')
+
+    def __init__(self):
+        self.count = 0
+        self.errors = 0
+        self.rows = 0
+        self.total_time = 0.0
+        self.max_time = 0.0
+        self.histogram = [0] * (len(HISTOGRAM_BOUNDS_MS) + 1)
+        self.callers = {}  # 调用方 -> 次数
+
+    def percentile(self, fraction):
+        """按直方图估算分位耗时（毫秒，取所在桶的上限）"""
+        target = self.count * fraction
+        seen = 0
+        for index, bucket in enumerate(self.histogram):
+            seen += bucket
+            if seen >= target and bucket:
+                if index < len(HISTOGRAM_BOUNDS_MS):
+                    return HISTOGRAM_BOUNDS_MS[index]
+                return self.max_time * 1000
+        return 0.0
+
+    def to_dict(self):
+        return {
+            'count': self.count,
+            'errors': self.errors,
+            'rows': self.rows,
+            'total_ms': self.total_time * 1000,
+            'avg_ms': self.total_time * 1000 / self.count if self.count else 0.0,
+            'p50_ms': self.percentile(0.5),
+            'p95_ms': self.percentile(0.95),
+            'max_ms': self.max_time * 1000,
+            'histogram': dict(zip([f"<={bound}ms" for bound in HISTOGRAM_BOUNDS_MS] + ['>5000ms'], self.histogram)),
+            'callers': dict(self.callers)
+        }
+
+class QueryMetrics:
+    """进程内的查询统计
+
+    record() 由 DatabaseManager 在每条语句执行后调用（线程安全）；
+    report() 返回按总耗时排序的文本报告，snapshot() 返回字典形式的数据。
+    """
+
+    # 调用方识别时跳过的函数（数据库层自身）
+    INTERNAL_PREFIXES = ('DatabaseManager.', 'Transaction.', 'QueryMetrics.')
+    INTERNAL_FILES = ('contextlib.py',)
+
+    def __init__(self, slow_query_threshold=0.2, track_callers=True):
+        self.slow_query_threshold = slow_query_threshold  # 慢查询阈值（秒）
+        self.track_callers = track_callers
+        self._stats = {}
+        self._lock = threading.Lock()
+
+    def record(self, query, elapsed, rows=0, error=False):
+        """记录一条语句的执行结果"""
+        statement = normalize_statement(query)
+        caller = self._caller() if self.track_callers else None
+        elapsed_ms = elapsed * 1000
+        bucket = len(HISTOGRAM_BOUNDS_MS)
+        for index, bound in enumerate(HISTOGRAM_BOUNDS_MS):
+            if elapsed_ms <= bound:
+                bucket = index
+                break
+
+        with self._lock:
+            stats = self._stats.get(statement)
+            if stats is None:
+                stats = self._stats[statement] = StatementStats()
+            stats.count += 1
+            stats.rows += max(rows or 0, 0)
+            stats.total_time += elapsed
+            stats.max_time = max(stats.max_time, elapsed)
+            stats.histogram[bucket] += 1
+            if error:
+                stats.errors += 1
+            if caller is not None:
+                stats.callers[caller] = stats.callers.get(caller, 0) + 1
+
+        if elapsed >= self.slow_query_threshold:
+            # 只记录语句结构，不记录参数（可能包含密码等敏感数据）
+            slow_query_logger.warning("慢查询 %.1fms [%s] %s", elapsed_ms, caller or '-', statement)
+
+    def snapshot(self):
+        """返回 {归一化语句: 统计字典}"""
+        with self._lock:
+            return {statement: stats.to_dict() for statement, stats in self._stats.items()}
+
+    def reset(self):
+        """清空统计数据"""
+        with self._lock:
+            self._stats.clear()
+
+    def report(self, limit=20):
+        """生成按总耗时排序的文本报告"""
+        snapshot = self.snapshot()
+        if not snapshot:
+            return "没有数据库查询记录"
+        items = sorted(snapshot.items(), key=lambda item: item[1]['total_ms'], reverse=True)
+        lines = [
+            f"数据库查询统计（共 {len(items)} 类语句，"
+            f"{sum(stats['count'] for _, stats in items)} 次执行，"
+            f"总耗时 {sum(stats['total_ms'] for _, stats in items):.1f}ms）",
+            f"{'次数':>6} {'错误':>4} {'总耗时ms':>10} {'平均ms':>8} {'p95ms':>8} {'最大ms':>8} {'行数':>8}  语句 / 主要调用方"
+        ]
+        for statement, stats in items[:limit]:
+            lines.append(
+                f"{stats['count']:>6} {stats['errors']:>4} {stats['total_ms']:>10.1f} {stats['avg_ms']:>8.2f} "
+                f"{stats['p95_ms']:>8.1f} {stats['max_ms']:>8.1f} {stats['rows']:>8}  {statement[:120]}"
+            )
+            callers = sorted(stats['callers'].items(), key=lambda item: item[1], reverse=True)[:3]
+            if callers:
+                lines.append(" " * 57 + "  <- " + ", ".join(f"{name} ×{count}" for name, count in callers))
+        return "\n".join(lines)
+
+    def _caller(self):
+        """找到数据库层之外的第一个调用方，如 'CaseManager.get_user_cases_page'、'search_index.CaseSearchIndex.sync_case'"""
+        frame = sys._getframe(2)
+        while frame is not None:
+            code = frame.f_code
+            name = getattr(code, 'co_qualname', code.co_name)
+            file_name = os.path.basename(code.co_filename)
+            if not name.startswith(self.INTERNAL_PREFIXES) and file_name not in self.INTERNAL_FILES:
+                module = os.path.splitext(file_name)[0]
+                return name if module == 'database_config' else f"{module}.{name}"
+            frame = frame.f_back
+        return None
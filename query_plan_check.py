@@ -0,0 +1,210 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+查询计划回归检查
+
+在合成数据（见 benchmark_suite.SyntheticDataGenerator）上调用各管理类的全部数据库方法，
+记录实际执行的每一条 SELECT / UPDATE / DELETE 语句，用 EXPLAIN 检查执行计划：
+出现全表（全索引）扫描或额外排序（filesort / 临时 B 树）时报告并以退出码 1 结束，
+修改表结构或查询语句后运行，防止热点查询悄悄失去索引。
+
+运行（默认使用临时 SQLite 库，--backend mysql 使用 DatabaseConfig.DB_CONFIG 中的本地 MySQL）：
+    python query_plan_check.py [--users 20] [--cases 50] [--directories 100] [--verbose]
+"""
+
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+from contextlib import contextmanager
+
+from benchmark_suite import BENCH_PASSWORD, SyntheticDataGenerator
+from database_config import DatabaseConfig, DatabaseManager, UserManager, CaseManager, DirectoryManager
+from query_metrics import normalize_statement
+from search_index import CaseSearchIndex
+
+# 允许出现额外排序的语句（语句片段 -> 原因）
+ALLOWED_SORTS = {
+    'ORDER BY score DESC': "全文检索按相关度排序，只对命中的页面排序",
+}
+
+class RecordingCursor:
+    """记录执行语句的游标代理"""
+
+    def __init__(self, cursor, statements):
+        self._cursor = cursor
+        self._statements = statements
+
+    def execute(self, query, params=()):
+        self._statements.append((query, tuple(params or ())))
+        return self._cursor.execute(query, params)
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+class RecordingConnection:
+    """记录执行语句的连接代理（只代理 cursor()，其余操作直接交给原连接）"""
+
+    def __init__(self, connection, statements):
+        self._connection = connection
+        self._statements = statements
+
+    def cursor(self, *args, **kwargs):
+        return RecordingCursor(self._connection.cursor(*args, **kwargs), self._statements)
+
+    def __getattr__(self, name):
+        return getattr(self._connection, name)
+
+class RecordingManager(DatabaseManager):
+    """记录所有经过连接池执行的语句（已转换为后端方言的 SQL 和参数）"""
+
+    def __init__(self, pool=None):
+        super().__init__(pool)
+        self.statements = []
+
+    @contextmanager
+    def checkout(self, timeout=None):
+        with super().checkout(timeout) as connection:
+            yield RecordingConnection(connection, self.statements)
+
+class QueryPlanChecker:
+    """对记录的语句逐条 EXPLAIN，找出全表扫描和额外排序"""
+
+    def __init__(self, db_manager):
+        self.db = db_manager
+
+    def check(self, statements):
+        """返回 [(归一化语句, 执行计划, 问题列表)]，每类语句只检查第一次出现"""
+        results = []
+        seen = set()
+        for query, params in statements:
+            statement = normalize_statement(query)
+            if statement in seen or not statement.upper().startswith(('SELECT', 'UPDATE', 'DELETE')):
+                continue
+            seen.add(statement)
+            with self.db.checkout() as connection:
+                plan = self.db.backend.explain(connection, query, params)
+            if self.db.backend.name == 'sqlite':
+                problems = self._problems_sqlite(plan)
+            else:
+                problems = self._problems_mysql(plan)
+            problems = [
+                problem for problem in problems
+                if not (problem.startswith('排序') and any(fragment in statement for fragment in ALLOWED_SORTS))
+            ]
+            results.append((statement, plan, problems))
+        return results
+
+    def _problems_sqlite(self, plan):
+        problems = []
+        for row in plan:
+            detail = row['detail']
+            if detail.startswith('SCAN ') and 'VIRTUAL TABLE' not in detail and detail != 'SCAN CONSTANT ROW':
+                problems.append(f"全表扫描: {detail}")
+            elif detail.startswith('USE TEMP B-TREE'):
+                problems.append(f"排序: {detail}")
+        return problems
+
+    def _problems_mysql(self, plan):
+        problems = []
+        for row in plan:
+            extra = row.get('Extra') or ''
+            if row.get('type') in ('ALL', 'index'):
+                problems.append(f"全表扫描: {row.get('table')} (type={row['type']})")
+            if 'Using filesort' in extra or 'Using temporary' in extra:
+                problems.append(f"排序: {row.get('table')} ({extra})")
+        return problems
+
+def exercise_managers(db_manager, data):
+    """调用各管理类的数据库方法，使其语句被记录"""
+    user_manager = UserManager(db_manager)
+    case_manager = CaseManager(db_manager)
+    directory_manager = DirectoryManager(db_manager)
+    search_index = CaseSearchIndex(db_manager, max_workers=1)
+    user = data['users'][0]
+    case_id = data['cases'][0]
+    db_manager.cache.clear()
+
+    user_manager.authenticate_user(user['username'], BENCH_PASSWORD)
+    user_manager.update_last_login(user['id'])
+    token = user_manager.create_session(user['id'])
+    user_manager.validate_session(token)
+    user_manager.logout_user(token)
+    user_manager.purge_expired_sessions(max_batches=1)
+
+    case_manager.get_user_cases(user['id'])
+    rows, after = case_manager.get_user_cases_page(user['id'], limit=5)
+    case_manager.get_user_cases_page(user['id'], limit=5, after=after)
+    case_manager.get_case_by_id(case_id, user['id'])
+
+    directories = directory_manager.get_case_directories(case_id)
+    directory_id = directory_manager.create_directory(case_id, '99', '补充证据', 999)
+    directory_manager.update_sort_orders_bulk(case_id, {row['id']: index for index, row in enumerate(directories[:10])})
+    directory_manager.delete_directory(case_id, directory_id)
+    entries = [{key: row[key] for key in ('sequence_number', 'file_name', 'page_number')} for row in directories]
+    directory_manager.create_directories_bulk(case_id, entries, replace=True)
+
+    search_index.sync_case(case_id, [])
+    search_index.remove_file(case_id, '/data/cases/missing.pdf')
+    search_index.search_case(case_id, '合同纠纷')
+    search_index.search_case(case_id, '合同')
+
+    # 登录时间和操作日志由后台线程写入
+    db_manager.get_activity_writer().flush()
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="查询计划回归检查")
+    parser.add_argument('--backend', choices=['sqlite', 'mysql'], default='sqlite', help="数据库后端")
+    parser.add_argument('--users', type=int, default=20, help="合成用户数")
+    parser.add_argument('--cases', type=int, default=50, help="每个用户的卷宗数")
+    parser.add_argument('--directories', type=int, default=100, help="每个卷宗的目录条数")
+    parser.add_argument('--verbose', action='store_true', help="输出每条语句的执行计划")
+    args = parser.parse_args(argv)
+
+    work_dir = tempfile.mkdtemp(prefix='lawyer_plans_')
+    DatabaseConfig.BACKEND = args.backend
+    if args.backend == 'sqlite':
+        DatabaseConfig.SQLITE_CONFIG['path'] = os.path.join(work_dir, 'plans.db')
+
+    db_manager = RecordingManager()
+    if not db_manager.connect():
+        print("数据库连接失败")
+        shutil.rmtree(work_dir, ignore_errors=True)
+        return 1
+    generator = SyntheticDataGenerator(db_manager)
+    try:
+        if args.backend == 'sqlite' and not db_manager.initialize_schema():
+            return 1
+        data = generator.generate(args.users, args.cases, args.directories)
+        # 让优化器掌握数据分布，与长期运行的数据库一致
+        if args.backend == 'sqlite':
+            db_manager.execute_query("ANALYZE")
+        else:
+            db_manager.execute_query("ANALYZE TABLE users, cases, case_directories, user_sessions")
+
+        db_manager.statements.clear()
+        exercise_managers(db_manager, data)
+        results = QueryPlanChecker(db_manager).check(list(db_manager.statements))
+    finally:
+        generator.cleanup()
+        db_manager.close()
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    failures = 0
+    for statement, plan, problems in results:
+        if problems:
+            failures += 1
+            print(f"[失败] {statement}")
+            for problem in problems:
+                print(f"    {problem}")
+        elif args.verbose:
+            print(f"[通过] {statement}")
+        if args.verbose:
+            for row in plan:
+                print(f"        {row}")
+    print(f"共检查 {len(results)} 类语句，{failures} 类存在全表扫描或额外排序")
+    return 1 if failures else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,221 @@
+# 页面渲染磁盘缓存模块
+# 渲染好的页面和缩略图按 (文件内容哈希, 页码, DPI) 保存为 PNG，
+# 重新打开卷宗时直接读取，不必再经过 PyMuPDF 渲染。
+# 按内容哈希寻址：文件移动或重命名后缓存仍然有效，文件内容变化后自动失效。
+import json
+import os
+import tempfile
+import threading
+import time
+from PIL import Image
+from file_fingerprint import hash_file, stat_file
+
+DEFAULT_CACHE_DIR = os.environ.get(
+    'LAWYER_RENDER_CACHE_DIR', os.path.join('~', '.cache', 'lawyer_assistant')
+)
+
+class RenderCache:
+    """内容寻址的页面渲染磁盘缓存
+
+    - 键为 (文件内容哈希, 页码, DPI)，同一页面的不同缩放级别分别缓存
+    - 写入先写临时文件再原子替换，进程中断不会留下损坏的缓存
+    - 总大小超过 max_bytes 时按最近使用时间淘汰（读取时更新文件的修改时间）
+    - 文件内容哈希按 (路径, 大小, 修改时间) 记录在 hashes.json 中，未变化的文件无需重新计算
+    """
+
+    PNG_COMPRESS_LEVEL = 1  # 压缩级别越低写入越快，页面图像压缩率差别不大
+    HASH_INDEX_FILE = 'hashes.json'
+
+    def __init__(self, cache_dir=None, max_bytes=1024 * 1024 * 1024):
+        self.cache_dir = os.path.expanduser(cache_dir or DEFAULT_CACHE_DIR)
+        self.render_dir = os.path.join(self.cache_dir, 'renders')
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._entries = {}  # 缓存文件路径 -> [字节数, 最近使用时间]
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        os.makedirs(self.render_dir, exist_ok=True)
+        self._hashes = self._load_hash_index()
+        self._scan()
+
+    def known_file_key(self, file_path):
+        """返回记录的文件内容哈希（只读取大小和修改时间），没有记录或文件已变化时返回 None"""
+        file_size, file_mtime = stat_file(file_path)
+        with self._lock:
+            known = self._hashes.get(os.path.abspath(file_path))
+        if known and known[0] == file_size and abs(known[1] - file_mtime) < 0.001:
+            return known[2]
+        return None
+
+    def file_key(self, file_path):
+        """返回文件内容哈希，文件大小和修改时间未变化时使用记录的哈希
+
+        需要计算时会读取整个文件，大文件不应在 Tk 主线程中调用。
+        """
+        content_hash = self.known_file_key(file_path)
+        if content_hash is not None:
+            return content_hash
+
+        file_size, file_mtime = stat_file(file_path)
+        path = os.path.abspath(file_path)
+        content_hash = hash_file(file_path)
+        with self._lock:
+            self._hashes[path] = [file_size, file_mtime, content_hash]
+            self._save_hash_index()
+        return content_hash
+
+    def get(self, content_hash, page, dpi):
+        """读取缓存的渲染图像，不存在时返回 None"""
+        path = self._path(content_hash, page, dpi)
+        with self._lock:
+            entry = self._entries.get(path)
+            if entry is None:
+                self.misses += 1
+                return None
+            entry[1] = time.time()
+        try:
+            with Image.open(path) as image:
+                image.load()
+                result = image.copy()
+            os.utime(path)
+        except OSError:
+            # 缓存文件被外部删除或损坏，当作未命中
+            self._discard(path)
+            with self._lock:
+                self.misses += 1
+            return None
+        with self._lock:
+            self.hits += 1
+        return result
+
+    def put(self, content_hash, page, dpi, image):
+        """写入渲染图像（原子写入），返回是否成功"""
+        path = self._path(content_hash, page, dpi)
+        directory = os.path.dirname(path)
+        os.makedirs(directory, exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                image.save(f, format='PNG', compress_level=self.PNG_COMPRESS_LEVEL)
+            os.replace(temp_path, path)
+        except OSError as e:
+            print(f"写入渲染缓存失败: {e}")
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            return False
+
+        size = os.path.getsize(path)
+        with self._lock:
+            previous = self._entries.get(path)
+            if previous is not None:
+                self.total_bytes -= previous[0]
+            self._entries[path] = [size, time.time()]
+            self.total_bytes += size
+            victims = self._select_victims()
+        for victim in victims:
+            self._remove_file(victim)
+        return True
+
+    def get_or_render(self, file_path, page, dpi, render, content_hash=None):
+        """读取缓存，未命中时调用 render() 渲染并写入缓存（content_hash 为空时计算文件内容哈希）"""
+        content_hash = content_hash or self.file_key(file_path)
+        image = self.get(content_hash, page, dpi)
+        if image is None:
+            image = render()
+            if image is not None:
+                self.put(content_hash, page, dpi, image)
+        return image
+
+    def clear(self):
+        """删除全部缓存的渲染图像"""
+        with self._lock:
+            paths = list(self._entries)
+            self._entries.clear()
+            self.total_bytes = 0
+        for path in paths:
+            self._remove_file(path)
+
+    def stats(self):
+        """缓存统计信息"""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'total_bytes': self.total_bytes,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': self.hits / total if total else 0.0
+            }
+
+    def _path(self, content_hash, page, dpi):
+        # 按哈希前两位分目录，避免单个目录下文件过多
+        return os.path.join(self.render_dir, content_hash[:2], f"{content_hash}_{page}_{int(dpi)}.png")
+
+    def _scan(self):
+        """启动时扫描已有的缓存文件，清理中断写入留下的临时文件"""
+        for directory, _, names in os.walk(self.render_dir):
+            for name in names:
+                path = os.path.join(directory, name)
+                try:
+                    if name.endswith('.tmp'):
+                        os.remove(path)
+                        continue
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                self._entries[path] = [stat.st_size, stat.st_mtime]
+                self.total_bytes += stat.st_size
+        for victim in self._select_victims():
+            self._remove_file(victim)
+
+    def _select_victims(self):
+        """选出需要淘汰的缓存文件（调用方需持有锁）"""
+        if self.total_bytes <= self.max_bytes:
+            return []
+        victims = []
+        for path, (size, _) in sorted(self._entries.items(), key=lambda item: item[1][1]):
+            if self.total_bytes <= self.max_bytes:
+                break
+            del self._entries[path]
+            self.total_bytes -= size
+            self.evictions += 1
+            victims.append(path)
+        return victims
+
+    def _discard(self, path):
+        with self._lock:
+            entry = self._entries.pop(path, None)
+            if entry is not None:
+                self.total_bytes -= entry[0]
+
+    def _remove_file(self, path):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+    def _load_hash_index(self):
+        path = os.path.join(self.cache_dir, self.HASH_INDEX_FILE)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _save_hash_index(self):
+        """原子写入文件哈希记录（调用方需持有锁）"""
+        path = os.path.join(self.cache_dir, self.HASH_INDEX_FILE)
+        fd, temp_path = tempfile.mkstemp(dir=self.cache_dir, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(self._hashes, f)
+            os.replace(temp_path, path)
+        except OSError as e:
+            print(f"保存文件哈希记录失败: {e}")
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
@@ -0,0 +1,368 @@
+# 卷宗全文检索模块
+# 用进程池并行提取卷宗 PDF 每一页的文本，写入 case_page_text 表：
+# MySQL 使用 ngram 全文索引，SQLite 使用 FTS5 trigram 倒排索引（case_page_text_fts）。
+# 文件指纹保存在 case_file_fingerprints 表，重新同步时只处理新增或变化的文件和页面。
+import multiprocessing
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+from pdf_handles import DOCUMENT_POOL
+from pdf_stream import PDFStream
+from file_fingerprint import file_fingerprint, is_unchanged, page_hash
+
+def extract_page_texts(file_path, start_page, end_page, known_hashes=None):
+    """提取 [start_page, end_page) 页的文本（在子进程中执行），页码从 0 开始
+
+    known_hashes 为 {页码: 页面哈希}，哈希未变化的页面不提取文本。
+    返回 [(页码（从1开始）, 页面哈希, 文本或 None), ...]
+    """
+    known_hashes = known_hashes or {}
+    pages = []
+    with PDFStream(file_path) as stream:
+        for index, page in stream.pages(start_page, end_page):
+            current_hash = page_hash(page)
+            if known_hashes.get(index + 1) == current_hash:
+                pages.append((index + 1, current_hash, None))
+            else:
+                text = page.get_text("text").replace('\x00', '')
+                pages.append((index + 1, current_hash, text))
+    return pages
+
+def find_case_pdf_files(case_path):
+    """卷宗路径可以是单个 PDF 文件或包含 PDF 的文件夹，返回其中全部 PDF 文件"""
+    if not case_path:
+        return []
+    case_path = os.path.expanduser(case_path)
+    if os.path.isfile(case_path):
+        return [case_path]
+    files = []
+    for directory, _, names in os.walk(case_path):
+        files.extend(os.path.join(directory, name) for name in names if name.lower().endswith('.pdf'))
+    return sorted(files)
+
+def make_snippet(content, terms, width=40):
+    """截取第一个检索词附近的文本作为摘要"""
+    text = re.sub(r'\s+', ' ', content or '').strip()
+    lowered = text.lower()
+    position, length = -1, 0
+    for term in terms:
+        position, length = lowered.find(term.lower()), len(term)
+        if position >= 0:
+            break
+    if position < 0:
+        return text[:width * 2]
+    start = max(position - width, 0)
+    end = min(position + length + width, len(text))
+    return ('…' if start > 0 else '') + text[start:end] + ('…' if end < len(text) else '')
+
+class CaseSearchIndex:
+    """卷宗全文检索
+
+    sync_case() 增量同步卷宗 PDF 的文本索引（index_case() 强制全部重建），
+    search_case() 返回按相关度排序的命中页面。
+    """
+
+    # 每个子进程任务处理的页数
+    PAGES_PER_TASK = 50
+    # 每条 INSERT 写入的页数
+    INSERT_CHUNK_SIZE = 200
+    # SQLite trigram 分词要求检索词至少 3 个字符，更短的检索词改用 LIKE 扫描
+    TRIGRAM_MIN_LENGTH = 3
+
+    def __init__(self, db_manager, max_workers=None):
+        self.db = db_manager
+        self.max_workers = max_workers or max(1, (os.cpu_count() or 2) - 1)
+
+    def case_pdf_files(self, case_id):
+        """读取卷宗记录的文件路径，返回卷宗中的全部 PDF 文件"""
+        result = self.db.execute_query("SELECT file_path FROM cases WHERE id = %s", (case_id,))
+        if not result:
+            return []
+        return find_case_pdf_files(result[0]['file_path'])
+
+    def extract_files(self, file_paths, known_hashes=None):
+        """并行提取多个文件的页面文本
+
+        known_hashes 为 {文件路径: {页码: 页面哈希}}，哈希未变化的页面不提取文本。
+        返回 {文件路径: [(页码, 页面哈希, 文本或 None), ...]}
+        """
+        known_hashes = known_hashes or {}
+        tasks = []
+        for file_path in file_paths:
+            with DOCUMENT_POOL.document(file_path) as doc:
+                page_count = doc.page_count
+            file_hashes = known_hashes.get(file_path, {})
+            for start in range(0, page_count, self.PAGES_PER_TASK):
+                end = start + self.PAGES_PER_TASK
+                task_hashes = {
+                    number: value for number, value in file_hashes.items() if start < number <= end
+                }
+                tasks.append((file_path, start, end, task_hashes))
+
+        pages = {file_path: [] for file_path in file_paths}
+        if len(tasks) <= 1 or self.max_workers <= 1:
+            # 任务很少时直接在当前进程中提取，省去启动子进程的开销
+            for task in tasks:
+                pages[task[0]].extend(extract_page_texts(*task))
+            return pages
+
+        # 在多线程的界面进程中 fork 会让子进程继承其他线程持有的锁，子进程改用 spawn 启动
+        with ProcessPoolExecutor(
+            max_workers=min(self.max_workers, len(tasks)), mp_context=multiprocessing.get_context('spawn')
+        ) as executor:
+            results = executor.map(extract_page_texts, *zip(*tasks))
+            for task, task_pages in zip(tasks, results):
+                pages[task[0]].extend(task_pages)
+        return pages
+
+    def index_case(self, case_id, file_paths=None):
+        """重新索引卷宗中的全部文件（忽略已保存的指纹），返回索引的页数，失败时返回 -1"""
+        summary = self.sync_case(case_id, file_paths, force=True)
+        return summary['pages_indexed'] if summary is not None else -1
+
+    def sync_case(self, case_id, file_paths=None, force=False):
+        """增量同步卷宗的全文索引
+
+        - 大小和修改时间未变化的文件直接跳过（不读取内容）
+        - 修改时间变化但内容哈希相同的文件只更新指纹
+        - 内容变化的文件按页面哈希比较，只提取、写入新增或变化的页面
+        - 已不存在的文件删除其索引
+        file_paths 为空时使用卷宗记录中的路径，并把文件总大小写回 cases.file_size。
+        返回同步统计，失败时返回 None。
+        """
+        use_case_path = file_paths is None
+        if use_case_path:
+            file_paths = self.case_pdf_files(case_id)
+
+        stored = self.db.execute_query(
+            "SELECT file_path, file_size, file_mtime, content_hash FROM case_file_fingerprints WHERE case_id = %s",
+            (case_id,)
+        )
+        if stored is None:
+            return None
+        stored = {row['file_path']: row for row in stored}
+
+        summary = {
+            'files_unchanged': 0,
+            'files_changed': 0,
+            'files_removed': 0,
+            'pages_indexed': 0,
+            'pages_skipped': 0,
+            'changed_pages': {}  # 文件路径 -> 新增或变化的页码列表
+        }
+
+        try:
+            fingerprints = {}
+            for file_path in file_paths:
+                previous = stored.get(file_path)
+                if not force and is_unchanged(file_path, previous):
+                    summary['files_unchanged'] += 1
+                    continue
+                fingerprint = file_fingerprint(file_path)
+                if not force and previous is not None and previous['content_hash'] == fingerprint.content_hash:
+                    # 只是修改时间变化（如重新复制），内容相同
+                    if not self._save_fingerprint(case_id, fingerprint, None):
+                        return None
+                    summary['files_unchanged'] += 1
+                    continue
+                fingerprints[file_path] = fingerprint
+
+            known_hashes = {} if force else self._stored_page_hashes(case_id, list(fingerprints))
+            if known_hashes is None:
+                return None
+            pages = self.extract_files(list(fingerprints), known_hashes)
+        except (OSError, RuntimeError) as e:
+            print(f"提取PDF文本失败: {e}")
+            return None
+
+        for file_path, file_pages in pages.items():
+            changed = [(number, value, text) for number, value, text in file_pages if text is not None]
+            if self.write_pages(case_id, file_path, changed, len(file_pages), replace_all=force) < 0:
+                return None
+            if not self._save_fingerprint(case_id, fingerprints[file_path], len(file_pages)):
+                return None
+            summary['files_changed'] += 1
+            summary['pages_indexed'] += len(changed)
+            summary['pages_skipped'] += len(file_pages) - len(changed)
+            summary['changed_pages'][file_path] = [number for number, _, _ in changed]
+
+        if use_case_path:
+            removed = [file_path for file_path in stored if file_path not in set(file_paths)]
+            for file_path in removed:
+                if not self.remove_file(case_id, file_path):
+                    return None
+            summary['files_removed'] = len(removed)
+            total_size = sum(os.path.getsize(file_path) for file_path in file_paths)
+            # 文件大小是派生值，显式保留 updated_at，同步索引不改变卷宗列表的排序
+            updated = self.db.execute_update(
+                "UPDATE cases SET file_size = %s, updated_at = updated_at "
+                "WHERE id = %s AND (file_size IS NULL OR file_size <> %s)",
+                (total_size, case_id, total_size)
+            )
+            if updated < 0:
+                return None
+            if updated > 0:
+                # 与 CaseManager.invalidate_case 一致，清除缓存的卷宗记录
+                self.db.cache.invalidate_prefix('case', case_id)
+        return summary
+
+    def _stored_page_hashes(self, case_id, file_paths):
+        """读取已索引页面的哈希，返回 {文件路径: {页码: 页面哈希}}"""
+        hashes = {}
+        for file_path in file_paths:
+            rows = self.db.execute_query(
+                "SELECT page_number, page_hash FROM case_page_text WHERE case_id = %s AND file_path = %s",
+                (case_id, file_path)
+            )
+            if rows is None:
+                return None
+            hashes[file_path] = {row['page_number']: row['page_hash'] for row in rows}
+        return hashes
+
+    def _save_fingerprint(self, case_id, fingerprint, page_count):
+        """保存文件指纹；page_count 为 None 时保留原页数"""
+        try:
+            with self.db.transaction() as tx:
+                if page_count is None:
+                    tx.execute(
+                        "UPDATE case_file_fingerprints SET file_size = %s, file_mtime = %s "
+                        "WHERE case_id = %s AND file_path = %s",
+                        (fingerprint.file_size, fingerprint.file_mtime, case_id, fingerprint.file_path)
+                    )
+                    return True
+                tx.execute(
+                    "DELETE FROM case_file_fingerprints WHERE case_id = %s AND file_path = %s",
+                    (case_id, fingerprint.file_path)
+                )
+                tx.insert(
+                    "INSERT INTO case_file_fingerprints "
+                    "(case_id, file_path, file_size, file_mtime, content_hash, page_count) "
+                    "VALUES (%s, %s, %s, %s, %s, %s)",
+                    (case_id, fingerprint.file_path, fingerprint.file_size, fingerprint.file_mtime,
+                     fingerprint.content_hash, page_count)
+                )
+            return True
+        except self.db.errors as e:
+            print(f"保存文件指纹失败: {e}")
+            return False
+
+    def remove_file(self, case_id, file_path):
+        """删除某个文件的索引和指纹"""
+        try:
+            with self.db.transaction() as tx:
+                tx.execute("DELETE FROM case_page_text WHERE case_id = %s AND file_path = %s", (case_id, file_path))
+                tx.execute(
+                    "DELETE FROM case_file_fingerprints WHERE case_id = %s AND file_path = %s",
+                    (case_id, file_path)
+                )
+            return True
+        except self.db.errors as e:
+            print(f"删除文件索引失败: {e}")
+            return False
+
+    def write_pages(self, case_id, file_path, pages, page_count, replace_all=False):
+        """写入新增或变化的页面，删除超出新页数的旧页面
+
+        pages 为 [(页码, 页面哈希, 文本), ...]；replace_all 为 True 时先清空该文件的全部页面。
+        返回写入的页数，失败时返回 -1。
+        """
+        columns = ('case_id', 'file_path', 'page_number', 'page_hash', 'content')
+        rows = [(case_id, file_path, number, value, text) for number, value, text in pages]
+        try:
+            with self.db.transaction() as tx:
+                if replace_all:
+                    tx.execute(
+                        "DELETE FROM case_page_text WHERE case_id = %s AND file_path = %s",
+                        (case_id, file_path)
+                    )
+                else:
+                    tx.execute(
+                        "DELETE FROM case_page_text WHERE case_id = %s AND file_path = %s AND page_number > %s",
+                        (case_id, file_path, page_count)
+                    )
+                    for start in range(0, len(rows), self.INSERT_CHUNK_SIZE):
+                        numbers = [row[2] for row in rows[start:start + self.INSERT_CHUNK_SIZE]]
+                        tx.execute(
+                            "DELETE FROM case_page_text WHERE case_id = %s AND file_path = %s AND page_number IN ("
+                            + ", ".join(["%s"] * len(numbers)) + ")",
+                            (case_id, file_path, *numbers)
+                        )
+                for start in range(0, len(rows), self.INSERT_CHUNK_SIZE):
+                    tx.insert_many('case_page_text', columns, rows[start:start + self.INSERT_CHUNK_SIZE])
+        except self.db.errors as e:
+            print(f"写入页面文本失败: {e}")
+            return -1
+        return len(rows)
+
+    def search_case(self, case_id, query, limit=20):
+        """在卷宗中检索文本
+
+        多个检索词用空格分隔，页面须包含全部检索词。
+        返回按相关度排序的 [{'file_path', 'file_name', 'page_number', 'snippet', 'score'}, ...]，
+        查询失败时返回 None。
+        """
+        terms = [term for term in query.split() if term]
+        if not terms:
+            return []
+
+        if self.db.backend.name == 'sqlite':
+            rows = self._search_sqlite(case_id, terms, limit)
+        else:
+            rows = self._search_mysql(case_id, terms, limit)
+        if rows is None:
+            return None
+
+        return [
+            {
+                'file_path': row['file_path'],
+                'file_name': os.path.basename(row['file_path']),
+                'page_number': row['page_number'],
+                'snippet': make_snippet(row['content'], terms),
+                'score': row['score']
+            }
+            for row in rows
+        ]
+
+    def _search_mysql(self, case_id, terms, limit):
+        """MySQL：ngram 全文索引，布尔模式下每个检索词按短语匹配"""
+        against = ' '.join('+"' + term.replace('"', ' ') + '"' for term in terms)
+        return self.db.execute_query("""
+            SELECT file_path, page_number, content,
+                   MATCH(content) AGAINST (%s IN BOOLEAN MODE) as score
+            FROM case_page_text
+            WHERE case_id = %s AND MATCH(content) AGAINST (%s IN BOOLEAN MODE)
+            ORDER BY score DESC, file_path, page_number
+            LIMIT %s
+        """, (against, case_id, against, limit))
+
+    def _search_sqlite(self, case_id, terms, limit):
+        """SQLite：FTS5 trigram 倒排索引，按 bm25 排序；过短的检索词退化为 LIKE"""
+        if all(len(term) >= self.TRIGRAM_MIN_LENGTH for term in terms):
+            match = ' '.join('"' + term.replace('"', '""') + '"' for term in terms)
+            return self.db.execute_query("""
+                SELECT t.file_path, t.page_number, t.content, -bm25(case_page_text_fts) as score
+                FROM case_page_text_fts
+                JOIN case_page_text t ON t.id = case_page_text_fts.rowid
+                WHERE case_page_text_fts MATCH %s AND t.case_id = %s
+                ORDER BY score DESC, t.file_path, t.page_number
+                LIMIT %s
+            """, (match, case_id, limit))
+
+        conditions = ' AND '.join(["content LIKE %s ESCAPE '!'"] * len(terms))
+        patterns = [
+            '%' + term.replace('!', '!!').replace('%', '!%').replace('_', '!_') + '%'
+            for term in terms
+        ]
+        rows = self.db.execute_query(f"""
+            SELECT file_path, page_number, content
+            FROM case_page_text
+            WHERE case_id = %s AND {conditions}
+        """, (case_id, *patterns))
+        if rows is None:
+            return None
+        # 按检索词出现次数排序
+        for row in rows:
+            content = (row['content'] or '').lower()
+            row['score'] = sum(content.count(term.lower()) for term in terms)
+        rows.sort(key=lambda row: (-row['score'], row['file_path'], row['page_number']))
+        return rows[:limit]
@@ -0,0 +1,35 @@
+# 测试配置：模块都在仓库根目录下，直接导入
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database_config import DatabaseConfig, DatabaseManager  # noqa: E402
+
+@pytest.fixture
+def db_manager(tmp_path, monkeypatch):
+    """连接临时 SQLite 库并创建表结构，测试结束后关闭连接池"""
+    monkeypatch.setattr(DatabaseConfig, 'BACKEND', 'sqlite')
+    monkeypatch.setitem(DatabaseConfig.SQLITE_CONFIG, 'path', str(tmp_path / 'test.db'))
+    monkeypatch.setitem(DatabaseConfig.METRICS_CONFIG, 'enabled', False)
+    manager = DatabaseManager()
+    assert manager.connect()
+    assert manager.initialize_schema()
+    yield manager
+    manager.close()
+
+@pytest.fixture
+def case_id(db_manager, tmp_path):
+    """创建一个用户和一个卷宗（卷宗路径为空的临时文件夹），返回卷宗ID"""
+    case_dir = tmp_path / 'case'
+    case_dir.mkdir()
+    user_id = db_manager.execute_insert(
+        "INSERT INTO users (username, password, email) VALUES (%s, %s, %s)",
+        ('lawyer', 'hashed', 'lawyer@example.com')
+    )
+    return db_manager.execute_insert(
+        "INSERT INTO cases (case_name, case_number, file_path, created_by) VALUES (%s, %s, %s, %s)",
+        ('合同纠纷', '(2024)京01民初1号', str(case_dir), user_id)
+    )
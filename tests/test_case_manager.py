@@ -0,0 +1,42 @@
+# CaseManager 键集分页测试（临时 SQLite 库）
+from datetime import datetime, timedelta
+
+from database_config import CaseManager
+
+def create_cases(db_manager, user_id, count):
+    """创建 count 个卷宗，前两个的更新时间相同（检验按 id 区分先后）"""
+    base = datetime(2024, 1, 1)
+    ids = []
+    for index in range(count):
+        case_id = db_manager.execute_insert(
+            "INSERT INTO cases (case_name, case_number, file_path, created_by) VALUES (%s, %s, %s, %s)",
+            (f'卷宗{index}', f'No.{index}', '/tmp', user_id)
+        )
+        stamp = base + timedelta(minutes=max(index, 1))
+        db_manager.execute_update("UPDATE cases SET updated_at = %s WHERE id = %s", (stamp, case_id))
+        ids.append(case_id)
+    return ids
+
+def test_keyset_pages_cover_every_case_once(db_manager, case_id):
+    user_id = db_manager.execute_query("SELECT created_by FROM cases WHERE id = %s", (case_id,))[0]['created_by']
+    db_manager.execute_update("UPDATE cases SET status = 'archived' WHERE id = %s", (case_id,))
+    ids = create_cases(db_manager, user_id, 7)
+    manager = CaseManager(db_manager)
+
+    pages = []
+    rows, cursor = manager.get_user_cases_page(user_id, limit=3)
+    pages.append([row['id'] for row in rows])
+    while cursor is not None:
+        rows, cursor = manager.get_user_cases_page(user_id, limit=3, after=cursor)
+        pages.append([row['id'] for row in rows])
+
+    assert [len(page) for page in pages] == [3, 3, 1]
+    # 按 (updated_at, id) 倒序；前两个卷宗更新时间相同，id 大的在前
+    assert [case for page in pages for case in page] == ids[::-1]
+    assert [row['id'] for row in manager.iter_user_cases(user_id, page_size=2)] == ids[::-1]
+
+def test_exact_page_has_no_next_cursor(db_manager, case_id):
+    user_id = db_manager.execute_query("SELECT created_by FROM cases WHERE id = %s", (case_id,))[0]['created_by']
+    rows, cursor = CaseManager(db_manager).get_user_cases_page(user_id, limit=1)
+    assert [row['id'] for row in rows] == [case_id]
+    assert cursor is None
@@ -0,0 +1,55 @@
+# 紧凑行测试
+import json
+
+import pytest
+
+from compact_rows import Row, make_rows, row_class
+
+def test_mapping_access():
+    row = make_rows(['id', 'case_name', 'status'], [(1, '合同纠纷', 'active')])[0]
+    assert row['case_name'] == '合同纠纷'
+    assert row[0] == 1
+    assert row.status == 'active'
+    assert row.get('missing') is None and row.get('missing', 5) == 5
+    assert 'id' in row and 'missing' not in row
+    assert list(row) == ['id', 'case_name', 'status']
+    assert len(row) == 3
+    with pytest.raises(KeyError):
+        row['missing']
+    with pytest.raises(AttributeError):
+        row.missing
+
+def test_dict_compatibility():
+    row = make_rows(['a', 'b'], [(2, 3)])[0]
+    assert dict(row) == {'a': 2, 'b': 3}
+    assert row == {'a': 2, 'b': 3}
+    assert row != {'a': 2}
+    assert list(row.keys()) == ['a', 'b']
+    assert row.values() == [2, 3]
+    assert row.items() == [('a', 2), ('b', 3)]
+    assert json.dumps(row.to_dict()) == '{"a": 2, "b": 3}'
+
+def test_rows_are_read_only_and_unhashable():
+    row = make_rows(['a'], [(1,)])[0]
+    with pytest.raises(TypeError):
+        row['a'] = 2
+    with pytest.raises(AttributeError):
+        row.a = 2
+    with pytest.raises(TypeError):
+        hash(row)
+
+def test_rows_share_one_class_per_column_set():
+    first, second = make_rows(['a', 'b'], [(1, 2), (3, 4)])
+    assert type(first) is type(second)
+    assert row_class(('a', 'b')) is type(first)
+    assert not hasattr(first, '__dict__')
+    assert isinstance(first, Row)
+
+def test_equality_requires_same_columns():
+    assert make_rows(['a', 'b'], [(1, 2)])[0] == make_rows(['a', 'b'], [(1, 2)])[0]
+    assert make_rows(['a', 'b'], [(1, 2)])[0] != make_rows(['b', 'a'], [(1, 2)])[0]
+
+def test_duplicate_columns_keep_last():
+    row = make_rows(['id', 'name', 'id'], [(1, 'x', 2)])[0]
+    assert row['id'] == 2
+    assert dict(row) == {'id': 2, 'name': 'x'}
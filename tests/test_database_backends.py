@@ -0,0 +1,27 @@
+# MySQL -> SQLite 方言转换测试
+from database_backends import _translate_mysql_to_sqlite as translate
+
+def test_placeholders():
+    assert translate("SELECT * FROM cases WHERE id = %s AND created_by = %s") == \
+        "SELECT * FROM cases WHERE id = ? AND created_by = ?"
+
+def test_string_literals_are_not_translated():
+    assert translate("SELECT '%s', name FROM users WHERE note = '100%s' AND id = %s") == \
+        "SELECT '%s', name FROM users WHERE note = '100%s' AND id = ?"
+
+def test_escaped_quotes_inside_literals():
+    assert translate("SELECT 'it''s %s' AS a, %s") == "SELECT 'it''s %s' AS a, ?"
+    assert translate("SELECT 'a\\'%s' AS a, %s") == "SELECT 'a\\'%s' AS a, ?"
+
+def test_now_outside_literals():
+    assert translate("UPDATE users SET last_login = NOW() WHERE id = %s") == \
+        "UPDATE users SET last_login = CURRENT_TIMESTAMP WHERE id = ?"
+    assert translate("SELECT 'NOW()', now()") == "SELECT 'NOW()', CURRENT_TIMESTAMP"
+
+def test_show_tables_like():
+    assert translate("SHOW TABLES LIKE 'cases'") == \
+        "SELECT name FROM sqlite_master WHERE type = 'table' AND name LIKE 'cases'"
+
+def test_query_without_placeholders_unchanged():
+    query = "SELECT COUNT(*) FROM case_directories"
+    assert translate(query) == query
@@ -0,0 +1,83 @@
+# DirectoryManager 测试（临时 SQLite 库）：批量写入、目录数量维护、整体替换
+from database_config import DirectoryManager
+from database_maintenance import find_directory_count_mismatches
+
+def entries(count, prefix='证据'):
+    return [
+        {'sequence_number': str(index + 1), 'file_name': f'{prefix}{index + 1}', 'page_number': index * 3 + 1}
+        for index in range(count)
+    ]
+
+def directory_count(db_manager, case_id):
+    return db_manager.execute_query("SELECT directory_count FROM cases WHERE id = %s", (case_id,))[0]['directory_count']
+
+def updated_at(db_manager, case_id):
+    return db_manager.execute_query("SELECT updated_at FROM cases WHERE id = %s", (case_id,))[0]['updated_at']
+
+def test_bulk_create_in_chunks(db_manager, case_id):
+    manager = DirectoryManager(db_manager)
+    ids = manager.create_directories_bulk(case_id, entries(7), chunk_size=3)
+    assert len(ids) == 7 and len(set(ids)) == 7
+
+    directories = manager.get_case_directories(case_id)
+    assert [row['id'] for row in directories] == ids
+    assert [row['file_name'] for row in directories] == [f'证据{index}' for index in range(1, 8)]
+    assert [row['sort_order'] for row in directories] == list(range(7))
+    assert directory_count(db_manager, case_id) == 7
+
+def test_count_follows_single_create_and_delete(db_manager, case_id):
+    manager = DirectoryManager(db_manager)
+    manager.create_directories_bulk(case_id, entries(3))
+    directory_id = manager.create_directory(case_id, '4', '补充证据', 20, sort_order=3)
+    assert directory_id > 0
+    assert directory_count(db_manager, case_id) == 4
+
+    assert manager.delete_directory(case_id, directory_id) is True
+    assert manager.delete_directory(case_id, directory_id) is False
+    assert directory_count(db_manager, case_id) == 3
+    assert find_directory_count_mismatches(db_manager) == []
+
+def test_replace_swaps_all_directories(db_manager, case_id):
+    manager = DirectoryManager(db_manager)
+    old_ids = manager.create_directories_bulk(case_id, entries(5))
+    new_ids = manager.create_directories_bulk(case_id, entries(2, prefix='目录'), replace=True)
+
+    directories = manager.get_case_directories(case_id)
+    assert [row['id'] for row in directories] == new_ids
+    assert not set(old_ids) & set(new_ids)
+    assert [row['file_name'] for row in directories] == ['目录1', '目录2']
+    assert directory_count(db_manager, case_id) == 2
+    assert find_directory_count_mismatches(db_manager) == []
+
+def test_failed_bulk_create_rolls_back(db_manager, case_id):
+    manager = DirectoryManager(db_manager)
+    manager.create_directories_bulk(case_id, entries(2))
+    bad = entries(4)
+    bad[3]['file_name'] = None  # file_name 不能为空
+    assert manager.create_directories_bulk(case_id, bad, chunk_size=2, replace=True) is None
+
+    assert [row['file_name'] for row in manager.get_case_directories(case_id)] == ['证据1', '证据2']
+    assert directory_count(db_manager, case_id) == 2
+
+def test_update_sort_orders_bulk(db_manager, case_id):
+    manager = DirectoryManager(db_manager)
+    ids = manager.create_directories_bulk(case_id, entries(5))
+    reversed_orders = {directory_id: len(ids) - index for index, directory_id in enumerate(ids)}
+    assert manager.update_sort_orders_bulk(case_id, reversed_orders, chunk_size=2) == 5
+    assert [row['id'] for row in manager.get_case_directories(case_id)] == ids[::-1]
+
+def test_directory_changes_keep_case_updated_at(db_manager, case_id):
+    db_manager.execute_update("UPDATE cases SET updated_at = %s WHERE id = %s", ('2020-01-01 00:00:00', case_id))
+    before = updated_at(db_manager, case_id)
+    manager = DirectoryManager(db_manager)
+    ids = manager.create_directories_bulk(case_id, entries(3))
+    manager.delete_directory(case_id, ids[0])
+    manager.create_directories_bulk(case_id, entries(1), replace=True)
+    assert updated_at(db_manager, case_id) == before
+
+def test_writes_invalidate_cached_directories(db_manager, case_id):
+    manager = DirectoryManager(db_manager)
+    manager.create_directories_bulk(case_id, entries(2))
+    assert len(manager.get_case_directories(case_id)) == 2  # 写入缓存
+    manager.create_directory(case_id, '3', '新增', 9, sort_order=2)
+    assert len(manager.get_case_directories(case_id)) == 3
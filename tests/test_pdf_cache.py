@@ -0,0 +1,97 @@
+# PDFCache / PageImageWindow 测试
+import random
+
+from pdf_cache import PDFCache, PageImageWindow, estimate_size
+
+def test_lru_eviction_by_bytes():
+    cache = PDFCache(max_bytes=3000)
+    for page in range(3):
+        cache[('f', page)] = b'x' * 1000
+    cache.get(('f', 0))  # 第 0 页变为最近使用
+    cache[('f', 3)] = b'x' * 1000
+    assert ('f', 1) not in cache
+    assert ('f', 0) in cache and ('f', 3) in cache
+    assert cache.total_bytes == 3000
+    assert cache.evictions == 1
+
+def test_replace_updates_byte_accounting():
+    cache = PDFCache(max_bytes=10_000)
+    cache['a'] = b'x' * 1000
+    cache['a'] = b'x' * 400
+    assert cache.total_bytes == 400
+    del cache['a']
+    assert cache.total_bytes == 0 and len(cache) == 0
+
+def test_oversized_entry_rejected():
+    cache = PDFCache(max_bytes=1000)
+    assert cache.put('big', b'x' * 1001) is False
+    assert 'big' not in cache
+    assert cache.rejected == 1 and cache.total_bytes == 0
+
+def test_pinned_entries_are_not_evicted():
+    cache = PDFCache(max_bytes=3000)
+    cache.pin_only({('f', 0), ('f', 1)})
+    cache[('f', 0)] = b'x' * 1000
+    cache[('f', 1)] = b'x' * 1000
+    for page in range(2, 10):
+        cache[('f', page)] = b'x' * 1000
+    assert ('f', 0) in cache and ('f', 1) in cache
+    assert cache.stats()['pinned'] == 2
+
+def test_put_rejected_when_pinned_entries_fill_capacity():
+    cache = PDFCache(max_bytes=3000)
+    cache.pin_only({('f', page) for page in range(3)})
+    for page in range(3):
+        assert cache.put(('f', page), b'x' * 1000)
+    assert cache.put('other', b'y' * 10) is False
+    assert 'other' not in cache
+    assert cache.rejected == 1
+    assert cache.total_bytes == 3000
+
+def test_total_bytes_never_exceeds_max_bytes():
+    """任意写入顺序下（包括固定记录占满容量），每次 put 之后总大小都不超过上限"""
+    rng = random.Random(7)
+    cache = PDFCache(max_bytes=10_000)
+    for page in range(8):
+        cache.pin(('f', page))
+    for i in range(2000):
+        key = ('f', rng.randrange(20)) if i % 3 else ('g', i)
+        cache.put(key, b'x' * rng.randrange(1, 2000))
+        assert cache.total_bytes <= cache.max_bytes
+        assert cache.total_bytes == sum(len(cache.get(k)) for k in list(cache._entries))
+
+def test_pin_only_replaces_pins_and_evicts():
+    cache = PDFCache(max_bytes=2000)
+    cache.pin_only({('f', 0), ('f', 1), ('f', 2)})
+    for page in range(3):
+        cache.put(('f', page), b'x' * 1000)
+    assert len(cache) == 2
+    cache.pin_only(('f', 5))
+    assert cache.stats()['pinned'] == 0
+    cache.pin_only(None)
+    cache.put('a', b'x' * 2000)
+    assert list(cache._entries) == ['a']
+
+def test_bytes_for_counts_one_file():
+    cache = PDFCache(max_bytes=10_000)
+    cache[('a.pdf', 0)] = b'x' * 100
+    cache[('a.pdf', 1)] = b'x' * 200
+    cache[('b.pdf', 0)] = b'x' * 400
+    cache['plain'] = b'x' * 800
+    assert cache.bytes_for('a.pdf') == 300
+    assert cache.bytes_for('missing.pdf') == 0
+
+def test_estimate_size():
+    assert estimate_size(None) == 0
+    assert estimate_size(b'abc') == 3
+    assert estimate_size(bytearray(10)) == 10
+
+def test_page_image_window_keeps_pages_near_current():
+    window = PageImageWindow(max_images=3)
+    window.set_current(10)
+    for page in (8, 9, 10, 11, 12):
+        window.put(page, f'image{page}')
+    assert sorted(page for page in range(20) if page in window) == [9, 10, 11]
+    window.set_current(11)
+    window.put(12, 'image12')
+    assert 9 not in window and window.get(12) == 'image12'
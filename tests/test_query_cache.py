@@ -0,0 +1,81 @@
+# LRUCache 测试
+import query_cache
+from query_cache import LRUCache
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+def test_lru_eviction():
+    cache = LRUCache(max_entries=2)
+    cache.put('a', 1)
+    cache.put('b', 2)
+    assert cache.get('a') == 1  # a 变为最近使用
+    cache.put('c', 3)
+    assert cache.get('b') is None
+    assert cache.get('a') == 1 and cache.get('c') == 3
+    assert cache.evictions == 1
+
+def test_ttl_expiry(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(query_cache.time, 'monotonic', clock)
+    cache = LRUCache(ttl=120)
+    cache.put('a', 1)
+    cache.put('short', 2, ttl=10)
+    cache.put('long', 3, ttl=1000)  # 不能超过缓存的 ttl
+    clock.now += 11
+    assert cache.get('short') is None
+    assert cache.get('a') == 1
+    clock.now += 110
+    assert cache.get('a') is None
+    assert cache.get('long') is None
+    assert cache.stats()['size'] == 0
+
+def test_none_is_not_cached():
+    cache = LRUCache()
+    assert cache.put('a', None) is False
+    assert cache.get('a') is None
+    assert cache.stats()['size'] == 0
+
+def test_invalidate_prefix():
+    cache = LRUCache()
+    cache.put(('case', 1, 10), 'x')
+    cache.put(('case', 1, 11), 'y')
+    cache.put(('case', 2, 10), 'z')
+    cache.put(('directories', 1), 'd')
+    cache.invalidate_prefix('case', 1)
+    assert cache.get(('case', 1, 10)) is None
+    assert cache.get(('case', 1, 11)) is None
+    assert cache.get(('case', 2, 10)) == 'z'
+    assert cache.get(('directories', 1)) == 'd'
+
+def test_put_skipped_after_invalidation_during_query():
+    """查询开始后发生的失效会使查询结果不写入缓存"""
+    cache = LRUCache()
+    key = ('case', 1, 10)
+    generation = cache.generation(key)
+    cache.invalidate_prefix('case', 1)  # 查询期间的写操作
+    assert cache.put(key, 'stale', generation=generation) is False
+    assert cache.get(key) is None
+
+    generation = cache.generation(key)
+    assert cache.put(key, 'fresh', generation=generation) is True
+    assert cache.get(key) == 'fresh'
+
+def test_generation_changes_on_invalidate_and_clear():
+    cache = LRUCache()
+    key = ('directories', 5)
+    generation = cache.generation(key)
+    cache.invalidate(key)
+    assert cache.generation(key) != generation
+
+    generation = cache.generation(key)
+    cache.invalidate(('directories', 6))
+    assert cache.generation(key) == generation  # 其他键的失效不影响
+
+    cache.clear()
+    assert cache.put(key, 'stale', generation=generation) is False
+    assert cache.put('plain', 'v', generation=cache.generation('plain')) is True
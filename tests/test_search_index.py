@@ -0,0 +1,45 @@
+# CaseSearchIndex 测试（临时 SQLite 库）
+import os
+
+import fitz
+
+from database_config import CaseManager
+from search_index import CaseSearchIndex
+
+def write_pdf(path, texts):
+    doc = fitz.open()
+    for text in texts:
+        doc.new_page().insert_text((72, 72), text)
+    doc.save(path)
+    doc.close()
+
+def case_row(db_manager, case_id):
+    return db_manager.execute_query("SELECT file_path, file_size, updated_at, created_by FROM cases WHERE id = %s", (case_id,))[0]
+
+def test_sync_case_indexes_and_skips_unchanged_files(db_manager, case_id):
+    case_dir = case_row(db_manager, case_id)['file_path']
+    write_pdf(os.path.join(case_dir, 'a.pdf'), ['contract dispute', 'payment schedule'])
+    index = CaseSearchIndex(db_manager, max_workers=1)
+
+    summary = index.sync_case(case_id)
+    assert summary['files_changed'] == 1 and summary['pages_indexed'] == 2
+    hits = index.search_case(case_id, 'payment')
+    assert [(hit['file_name'], hit['page_number']) for hit in hits] == [('a.pdf', 2)]
+
+    summary = index.sync_case(case_id)
+    assert summary['files_unchanged'] == 1 and summary['pages_indexed'] == 0
+
+def test_sync_case_updates_file_size_without_touching_updated_at(db_manager, case_id):
+    row = case_row(db_manager, case_id)
+    db_manager.execute_update("UPDATE cases SET updated_at = %s WHERE id = %s", ('2020-01-01 00:00:00', case_id))
+    write_pdf(os.path.join(row['file_path'], 'a.pdf'), ['evidence list'])
+    case_manager = CaseManager(db_manager)
+    assert case_manager.get_case_by_id(case_id, row['created_by'])['file_size'] in (None, 0)
+
+    assert CaseSearchIndex(db_manager, max_workers=1).sync_case(case_id) is not None
+
+    row = case_row(db_manager, case_id)
+    assert row['file_size'] == os.path.getsize(os.path.join(row['file_path'], 'a.pdf'))
+    assert str(row['updated_at']).startswith('2020-01-01')
+    # 缓存的卷宗记录已失效
+    assert case_manager.get_case_by_id(case_id, row['created_by'])['file_size'] == row['file_size']
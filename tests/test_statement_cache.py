@@ -0,0 +1,55 @@
+# StatementCache 测试（SQLite 内存连接）
+import sqlite3
+
+from database_backends import SQLiteBackend
+from database_config import StatementCache
+
+class TrackingCursor:
+    def __init__(self, cursor):
+        self.cursor = cursor
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+        self.cursor.close()
+
+class TrackingBackend:
+    Error = sqlite3.Error
+
+    def prepared_cursor(self, connection):
+        return TrackingCursor(connection.cursor())
+
+def test_lru_eviction_closes_cursors():
+    cache = StatementCache(TrackingBackend(), sqlite3.connect(':memory:'), max_statements=2)
+    first = cache.cursor("SELECT 1")
+    second = cache.cursor("SELECT 2")
+    assert cache.cursor("SELECT 1") is first  # SELECT 1 变为最近使用
+    cache.cursor("SELECT 3")
+    assert second.closed and not first.closed
+    assert cache.hits == 1 and cache.misses == 3
+
+def test_discard_and_close():
+    cache = StatementCache(TrackingBackend(), sqlite3.connect(':memory:'))
+    cursor = cache.cursor("SELECT 1")
+    cache.discard("SELECT 1")
+    assert cursor.closed
+    assert cache.cursor("SELECT 1") is not cursor
+    remaining = cache.cursor("SELECT 2")
+    cache.close()
+    assert remaining.closed
+
+def test_accepts_only_short_dml():
+    assert StatementCache.accepts("SELECT * FROM cases WHERE id = ?")
+    assert StatementCache.accepts("  update cases SET status = ? WHERE id = ?")
+    assert not StatementCache.accepts("CREATE INDEX idx ON cases(id)")
+    assert not StatementCache.accepts("PRAGMA table_info(cases)")
+    long_query = "SELECT * FROM cases WHERE id IN (" + ", ".join(["?"] * 600) + ")"
+    assert not StatementCache.accepts(long_query)
+
+def test_sqlite_backend_cursor_executes(tmp_path):
+    backend = SQLiteBackend(str(tmp_path / 'statements.db'))
+    connection = backend.connect()
+    cache = StatementCache(backend, connection)
+    cursor = cache.cursor("SELECT ? + 1")
+    cursor.execute("SELECT ? + 1", (1,))
+    assert cursor.fetchone() == (2,)
@@ -0,0 +1,207 @@
+# 分块渐进渲染模块
+# 高倍缩放时不再渲染整页位图：先显示低分辨率预览，
+# 再在后台线程中通过 PyMuPDF 的 clip 区域只渲染可见的图块，渲染好的图块缓存复用。
+# 结果通过 root.after 交回 Tk 主线程。
+import math
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pdf_cache import PDFCache
+
+class TileRenderer:
+    """页面分块渲染器
+
+    render_clip(file_path, page, zoom, clip) 在工作线程中执行，返回 PIL 图像，
+    clip 为 (x0, y0, x1, y1)（PDF 点坐标），为 None 时渲染整页（用于预览）；
+    on_tile(file_path, page, zoom, (x, y), image) 在 Tk 主线程中执行，(x, y) 为图块在整页图像中的像素位置；
+    on_preview(file_path, page, preview_zoom, image) 在 Tk 主线程中执行；
+    get_page_size(file_path, page) 在工作线程中执行，返回页面尺寸（PDF 点），
+    读取页面需要文档锁，可能要等其他线程渲染完成，所以不在 Tk 主线程中调用。
+    show() 等公开方法只能在 Tk 主线程中调用。
+    """
+
+    # 图块边长（像素）
+    TILE_SIZE = 512
+    # 预览图的缩放比例
+    PREVIEW_ZOOM = 0.5
+    # 结果轮询间隔（毫秒）
+    POLL_INTERVAL = 15
+
+    def __init__(self, root, render_clip, on_tile, on_preview=None, get_page_size=None,
+                 max_workers=2, cache_bytes=256 * 1024 * 1024, tile_size=None):
+        self.root = root
+        self._render_clip = render_clip
+        self._on_tile = on_tile
+        self._on_preview = on_preview
+        self._get_page_size = get_page_size
+        self._page_sizes = {}  # (文件, 页码) -> 页面尺寸，在工作线程中读取
+        self.tile_size = tile_size or self.TILE_SIZE
+        self.cache = PDFCache(cache_bytes)  # (文件, 页码, 缩放, 列, 行) -> 图块图像
+
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="TileWorker")
+        self._lock = threading.Lock()
+        self._generation = 0
+        self._current = None  # 当前显示的 (文件, 页码, 缩放)
+        self._pending = 0
+        self._results = queue.Queue()
+        self._polling = False
+        self._closed = False
+
+    def tiles_for(self, page_size, zoom, viewport=None):
+        """计算与可见区域相交的图块
+
+        page_size 为页面尺寸（PDF 点），viewport 为 (x0, y0, x1, y1)（缩放后的像素坐标），
+        为空时返回整页的全部图块。按离可见区域中心的距离排序，
+        返回 [(列, 行, (x, y), clip), ...]。
+        """
+        width, height = page_size[0] * zoom, page_size[1] * zoom
+        x0, y0, x1, y1 = viewport or (0, 0, width, height)
+        x0, y0 = max(x0, 0), max(y0, 0)
+        x1, y1 = min(x1, width), min(y1, height)
+        if x1 <= x0 or y1 <= y0:
+            return []
+
+        size = self.tile_size
+        center_x, center_y = (x0 + x1) / 2, (y0 + y1) / 2
+        tiles = []
+        for row in range(int(y0 // size), math.ceil(y1 / size)):
+            for col in range(int(x0 // size), math.ceil(x1 / size)):
+                left, top = col * size, row * size
+                right, bottom = min(left + size, width), min(top + size, height)
+                clip = (left / zoom, top / zoom, right / zoom, bottom / zoom)
+                distance = ((left + right) / 2 - center_x) ** 2 + ((top + bottom) / 2 - center_y) ** 2
+                tiles.append((distance, col, row, (left, top), clip))
+        tiles.sort()
+        return [tile[1:] for tile in tiles]
+
+    def page_size(self, file_path, page):
+        """已读取的页面尺寸，尚未读取时返回 None"""
+        return self._page_sizes.get((file_path, page))
+
+    def show(self, file_path, page, page_size, zoom, viewport=None, preview=True):
+        """显示页面的可见区域：缓存中的图块立即交付，缺少的图块在后台渲染
+
+        之前请求但尚未开始渲染的图块会被取消（滚动或改变缩放时）。
+        preview 为 True 时先渲染一张低分辨率的整页预览。
+        page_size 为 None 时使用已读取的尺寸，尚未读取时在工作线程中通过 get_page_size 读取后再安排图块。
+        """
+        if page_size is None:
+            page_size = self.page_size(file_path, page)
+        with self._lock:
+            if self._closed:
+                return
+            self._generation += 1
+            generation = self._generation
+            self._current = (file_path, page, zoom)
+
+        if preview and self._on_preview is not None and zoom > self.PREVIEW_ZOOM:
+            key = (file_path, page, self.PREVIEW_ZOOM, 'preview')
+            image = self.cache.get(key)
+            if image is not None:
+                self._on_preview(file_path, page, self.PREVIEW_ZOOM, image)
+            else:
+                self._submit(generation, key, file_path, page, self.PREVIEW_ZOOM, None, None)
+
+        if page_size is None:
+            with self._lock:
+                self._pending += 1
+            self._executor.submit(self._layout, generation, file_path, page, zoom, viewport)
+        else:
+            self._submit_tiles(generation, file_path, page, page_size, zoom, viewport, self._on_tile)
+        self._ensure_polling()
+
+    def _submit_tiles(self, generation, file_path, page, page_size, zoom, viewport, on_cached):
+        """缓存中的图块交给 on_cached，缺少的图块提交渲染"""
+        for col, row, position, clip in self.tiles_for(page_size, zoom, viewport):
+            key = (file_path, page, zoom, col, row)
+            image = self.cache.get(key)
+            if image is not None:
+                on_cached(file_path, page, zoom, position, image)
+            else:
+                self._submit(generation, key, file_path, page, zoom, position, clip)
+
+    def cancel(self):
+        """取消尚未开始的图块渲染"""
+        with self._lock:
+            self._generation += 1
+
+    def clear(self):
+        """清空图块缓存和页面尺寸（如文件内容变化）"""
+        self.cache.clear()
+        self._page_sizes.clear()
+
+    def shutdown(self):
+        """停止渲染并等待工作线程退出"""
+        with self._lock:
+            self._closed = True
+            self._generation += 1
+        self._executor.shutdown(wait=True)
+
+    def _submit(self, generation, key, file_path, page, zoom, position, clip):
+        with self._lock:
+            self._pending += 1
+        self._executor.submit(self._render, generation, key, file_path, page, zoom, position, clip)
+
+    def _render(self, generation, key, file_path, page, zoom, position, clip):
+        """工作线程：跳过已过期的请求，渲染图块并放入结果队列"""
+        try:
+            with self._lock:
+                if generation != self._generation:
+                    return
+            # 同一图块可能在之前的请求中已经渲染完成
+            image = self.cache.get(key)
+            if image is None:
+                image = self._render_clip(file_path, page, zoom, clip)
+                self.cache.put(key, image)
+            self._results.put((file_path, page, zoom, position, image))
+        except Exception as e:
+            print(f"渲染图块失败 {file_path} 第 {page} 页: {e}")
+        finally:
+            with self._lock:
+                self._pending -= 1
+
+    def _layout(self, generation, file_path, page, zoom, viewport):
+        """工作线程：读取页面尺寸，再安排可见区域的图块（缓存中的图块经结果队列交付）"""
+        try:
+            with self._lock:
+                if generation != self._generation:
+                    return
+            page_size = self._get_page_size(file_path, page)
+            self._page_sizes[(file_path, page)] = page_size
+            self._submit_tiles(
+                generation, file_path, page, page_size, zoom, viewport,
+                lambda *result: self._results.put(result)
+            )
+        except Exception as e:
+            print(f"读取页面尺寸失败 {file_path} 第 {page} 页: {e}")
+        finally:
+            with self._lock:
+                self._pending -= 1
+
+    def _ensure_polling(self):
+        if not self._polling:
+            self._polling = True
+            self.root.after(self.POLL_INTERVAL, self._poll)
+
+    def _poll(self):
+        """在 Tk 主线程中交付渲染结果"""
+        while True:
+            try:
+                file_path, page, zoom, position, image = self._results.get_nowait()
+            except queue.Empty:
+                break
+            with self._lock:
+                current = self._current
+            if current is None or current[:2] != (file_path, page):
+                continue  # 已切换到其他页面，结果只保留在缓存中
+            if position is None:
+                self._on_preview(file_path, page, zoom, image)
+            elif zoom == current[2]:
+                self._on_tile(file_path, page, zoom, position, image)
+
+        with self._lock:
+            idle = self._pending == 0
+        if self._closed or (idle and self._results.empty()):
+            self._polling = False
+        else:
+            self.root.after(self.POLL_INTERVAL, self._poll)
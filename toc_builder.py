@@ -0,0 +1,178 @@
+# 卷宗目录自动生成模块
+# 上传卷宗后自动填写 case_directories：优先读取 PDF 书签（几乎没有开销），
+# 没有书签的文件用进程池并行扫描每页顶部的标题，结果通过一次批量写入保存。
+import multiprocessing
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+from pdf_handles import DOCUMENT_POOL
+from pdf_stream import PDFStream
+
+# 只在页面上部查找标题（占页面高度的比例）
+HEADING_AREA_RATIO = 0.3
+# 标题字号至少为正文字号的倍数
+HEADING_SIZE_RATIO = 1.25
+# 标题文字长度范围
+HEADING_MIN_LENGTH = 2
+HEADING_MAX_LENGTH = 40
+# 页码、日期等不作为标题
+NON_HEADING_PATTERN = re.compile(r'^[\d\s\-—/.()（）第页共]+$')
+
+def scan_page_headings(file_path, start_page, end_page):
+    """扫描 [start_page, end_page) 页的标题（在子进程中执行），页码从 0 开始
+
+    标题为页面上部字号明显大于正文的一行文字；返回 [(页码, 标题或 None), ...]。
+    """
+    headings = []
+    with PDFStream(file_path) as stream:
+        for index, page in stream.pages(start_page, end_page):
+            headings.append((index, _page_heading(page)))
+    return headings
+
+def _page_heading(page):
+    lines = []
+    sizes = {}  # 字号 -> 字符数
+    limit = page.rect.height * HEADING_AREA_RATIO
+    for block in page.get_text("dict")["blocks"]:
+        for line in block.get("lines", []):
+            spans = [span for span in line["spans"] if span["text"].strip()]
+            if not spans:
+                continue
+            for span in spans:
+                sizes[span["size"]] = sizes.get(span["size"], 0) + len(span["text"])
+            if line["bbox"][1] <= limit:
+                text = "".join(span["text"] for span in spans).strip()
+                lines.append((max(span["size"] for span in spans), line["bbox"][1], text))
+    if not lines:
+        return None
+
+    # 按字符数加权的字号中位数作为正文字号
+    half = sum(sizes.values()) / 2
+    for body_size in sorted(sizes):
+        half -= sizes[body_size]
+        if half <= 0:
+            break
+    candidates = [
+        (-size, top, text) for size, top, text in lines
+        if size >= body_size * HEADING_SIZE_RATIO
+        and HEADING_MIN_LENGTH <= len(text) <= HEADING_MAX_LENGTH
+        and not NON_HEADING_PATTERN.match(text)
+    ]
+    if not candidates:
+        return None
+    # 字号最大的一行，字号相同时取最靠上的
+    return min(candidates)[2]
+
+class TocBuilder:
+    """根据 PDF 书签或页面标题生成卷宗目录
+
+    目录页码为卷宗内的连续页码（从 1 开始，多个文件按文件名顺序依次累加）。
+    """
+
+    # 每个子进程任务扫描的页数
+    PAGES_PER_TASK = 50
+
+    def __init__(self, directory_manager, max_workers=None, max_level=1):
+        self.directory_manager = directory_manager
+        self.max_workers = max_workers or max(1, (os.cpu_count() or 2) - 1)
+        self.max_level = max_level  # 书签最多读取的层级
+
+    def build_entries(self, file_paths):
+        """生成目录条目，返回 create_directories_bulk() 所需的字典列表"""
+        offset = 0
+        missing = []  # 没有书签的文件：(文件, 页码偏移, 页数)
+        outlines = {}
+        for file_path in file_paths:
+            with DOCUMENT_POOL.document(file_path) as doc:
+                page_count = doc.page_count
+                outline = [item for item in doc.get_toc(simple=True) if item[0] <= self.max_level]
+            if outline:
+                outlines[file_path] = (offset, outline)
+            else:
+                missing.append((file_path, offset, page_count))
+            offset += page_count
+
+        headings = self.scan_headings(missing)
+        items = []
+        for file_path in file_paths:
+            if file_path in outlines:
+                offset, outline = outlines[file_path]
+                items.extend(
+                    (level, title, page + offset) for level, title, page in outline
+                    if page > 0 and title.strip()
+                )
+            elif headings.get(file_path):
+                items.extend((1, title, page) for title, page in headings[file_path])
+            else:
+                # 既没有书签也没有识别出标题：整个文件作为一条目录
+                offset = next(offset for path, offset, _ in missing if path == file_path)
+                items.append((1, os.path.splitext(os.path.basename(file_path))[0], offset + 1))
+        return self._number(items)
+
+    def scan_headings(self, files):
+        """并行扫描页面标题，返回 {文件: [(标题, 卷宗页码), ...]}
+
+        连续多页标题相同时（同一份文件跨页）只保留第一页。
+        """
+        tasks = [
+            (file_path, start, min(start + self.PAGES_PER_TASK, page_count))
+            for file_path, _, page_count in files
+            for start in range(0, page_count, self.PAGES_PER_TASK)
+        ]
+        if not tasks:
+            return {}
+        if len(tasks) == 1 or self.max_workers <= 1:
+            results = [scan_page_headings(*task) for task in tasks]
+        else:
+            # 在多线程的界面进程中 fork 会让子进程继承其他线程持有的锁，子进程改用 spawn 启动
+            with ProcessPoolExecutor(
+                max_workers=min(self.max_workers, len(tasks)), mp_context=multiprocessing.get_context('spawn')
+            ) as executor:
+                results = list(executor.map(scan_page_headings, *zip(*tasks)))
+
+        offsets = {file_path: offset for file_path, offset, _ in files}
+        headings = {}
+        for task, task_headings in zip(tasks, results):
+            file_headings = headings.setdefault(task[0], [])
+            for index, title in task_headings:
+                if title and (not file_headings or file_headings[-1][0] != title):
+                    file_headings.append((title, index + 1 + offsets[task[0]]))
+        return headings
+
+    def build_case_directories(self, case_id, file_paths, replace=False):
+        """生成目录并一次性批量写入
+
+        卷宗已有目录且 replace 为 False 时不写入（避免覆盖人工整理的目录）。
+        返回写入的目录数，失败时返回 -1。
+        """
+        existing = self.directory_manager.get_case_directories(case_id)
+        if existing is None:
+            return -1
+        if existing and not replace:
+            return 0
+
+        try:
+            entries = self.build_entries(file_paths)
+        except (OSError, RuntimeError) as e:
+            print(f"生成目录失败: {e}")
+            return -1
+
+        if not entries:
+            return 0
+        ids = self.directory_manager.create_directories_bulk(case_id, entries, replace=bool(existing))
+        return len(ids) if ids is not None else -1
+
+    def _number(self, items):
+        """为条目编排序号：一级条目为 1、2、3，下级条目为 1.1、1.2"""
+        entries = []
+        counters = []
+        for level, title, page in items:
+            del counters[level:]
+            counters.extend([0] * (level - len(counters)))
+            counters[level - 1] += 1
+            entries.append({
+                'sequence_number': '.'.join(str(number) for number in counters),
+                'file_name': title.strip()[:300],
+                'page_number': page
+            })
+        return entries